@@ -0,0 +1,63 @@
+"""Shared helpers for the benchmark scripts in this folder."""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+PROCESSED_GEOJSON = PROJECT_ROOT / "data" / "processed" / "squirrels_clean.geojson"
+
+
+def census_gdf():
+    """Load the processed 2018 census as a GeoDataFrame."""
+    from data_processing import load_geojson
+
+    return load_geojson(str(PROCESSED_GEOJSON))
+
+
+def census_points():
+    """The processed census as a flat frame with longitude / latitude columns."""
+    from data_processing import to_flat_df
+
+    flat = to_flat_df(census_gdf())
+    return flat.drop(columns=["date"], errors="ignore").rename(columns={"date_clean": "date"})
+
+
+def scale_points(points, n: int, seed: int = 0):
+    """
+    Resample a longitude / latitude frame to n rows, jittering each point by a
+    few metres so that repeated rows do not stack on top of each other.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    out = points.iloc[rng.integers(0, len(points), size=n)].reset_index(drop=True)
+    jitter = rng.normal(scale=5e-5, size=(n, 2))
+    out["longitude"] = out["longitude"].to_numpy() + jitter[:, 0]
+    out["latitude"] = out["latitude"].to_numpy() + jitter[:, 1]
+    return out
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    """Return the fastest of `repeat` wall-clock runs of fn(), in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def print_table(headers: list[str], rows: list[list]) -> None:
+    """Print rows as a fixed-width text table."""
+    widths = [
+        max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)
+    ]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
@@ -0,0 +1,60 @@
+"""
+Column cleaning: per-distinct-value to_bool / fill_unknown vs. string passes.
+
+Builds object-string columns the way a messy raw dump arrives (booleans as
+mixed-case text with blanks, categories with nulls and '?') by repeating the
+2018 census, checks both implementations agree, then times them per column.
+
+    python benchmarks/bench_cleaning.py
+    python benchmarks/bench_cleaning.py --sizes 1000000 10000000
+"""
+from __future__ import annotations
+
+import argparse
+
+from _common import best_of, print_table
+
+import numpy as np
+import pandas as pd
+
+from data_processing import fill_unknown, to_bool
+
+BOOL_TOKENS = np.array(["true", "false", "TRUE", "False", " yes", "no", None], dtype=object)
+FUR_TOKENS = np.array(["Gray", "Cinnamon", "Black", "?", None], dtype=object)
+
+
+def legacy_to_bool(series: pd.Series) -> pd.Series:
+    normalized = series.astype(str).str.strip().str.lower()
+    return normalized.isin({"true", "t", "1", "yes"}).fillna(False)
+
+
+def legacy_fill_unknown(series: pd.Series) -> pd.Series:
+    return series.fillna("Unknown").replace("?", "Unknown")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for n in args.sizes:
+        flags = pd.Series(BOOL_TOKENS[rng.integers(0, len(BOOL_TOKENS), n)], dtype=object)
+        fur = pd.Series(FUR_TOKENS[rng.integers(0, len(FUR_TOKENS), n)], dtype=str)
+        pd.testing.assert_series_equal(to_bool(flags), legacy_to_bool(flags))
+        pd.testing.assert_series_equal(fill_unknown(fur), legacy_fill_unknown(fur))
+        for name, series, old, new in [
+            ("to_bool", flags, legacy_to_bool, to_bool),
+            ("fill_unknown", fur, legacy_fill_unknown, fill_unknown),
+        ]:
+            before = best_of(lambda: old(series), args.repeat)
+            after = best_of(lambda: new(series), args.repeat)
+            rows.append([f"{n:,}", name, f"{before * 1000:.1f}", f"{after * 1000:.1f}", f"{before / after:.1f}x"])
+
+    print_table(["rows", "step", "string ms", "per-value ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Table download cost: the old whole-frame CSV against streamed exports.
+
+The census is repeated to --rows rows in a DuckDB table, then exported the
+way download_csv used to (one DataFrame, one to_csv string) and through
+exports.stream_export as CSV and Parquet. Reports the time to the first
+chunk, the total time, the bytes sent and the peak Python-side allocation
+traced by tracemalloc (pandas / NumPy buffers and encoded chunks; DuckDB's
+own buffers are not traced).
+
+    python benchmarks/bench_exports.py
+    python benchmarks/bench_exports.py --rows 3000000 --chunk-rows 131072
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from _common import PROJECT_ROOT, print_table
+
+import duckdb
+
+from data_processing import parquet_source
+from exports import EXPORT_CHUNK_ROWS, stream_export
+from query_pool import QueryPool
+
+SQL = "SELECT * EXCLUDE (\"lat/long\") FROM squirrels WHERE shift = ?"
+
+
+async def _legacy(pool: QueryPool):
+    cursor = pool.cursor()
+    df = await cursor.df(SQL, ["AM"])
+    cursor.close()
+    yield df.to_csv(index=False).encode("utf-8")
+
+
+def measure(chunks) -> list:
+    async def drain():
+        first = None
+        total = 0
+        async for chunk in chunks:
+            if first is None:
+                first = time.perf_counter() - start
+            total += len(chunk)
+        return first, total
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    first, total = asyncio.run(drain())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return [f"{first * 1000:.0f}", f"{elapsed * 1000:.0f}", f"{total / 2**20:.1f}", f"{peak / 2**20:.1f}"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    con = duckdb.connect()
+    source = parquet_source(PROJECT_ROOT / "data" / "processed" / "squirrels.parquet")
+    (n,) = con.execute(f"SELECT count(*) FROM {source}").fetchone()
+    con.execute(
+        f"CREATE TABLE squirrels AS SELECT s.* FROM {source} AS s, range(?) LIMIT ?",
+        [-(-args.rows // n), args.rows],
+    )
+    pool = QueryPool(con)
+
+    rows = [["legacy csv", *measure(_legacy(pool))]]
+    for fmt in ("csv", "parquet"):
+        rows.append([f"stream {fmt}", *measure(stream_export(pool.cursor(), SQL, ["AM"], fmt, args.chunk_rows))])
+    print(f"{args.rows:,} rows, chunks of {args.chunk_rows:,}\n")
+    print_table(["export", "first chunk ms", "total ms", "MiB sent", "peak traced MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Sidebar filter latency: bitmap index vs. DuckDB SQL.
+
+Times the FilterIndex used by filtered_df against the previous path, which
+built an `IN (...)` query per input change and scanned the Parquet view.
+Each dataset size is the census repeated (or truncated) and written to a
+temporary Parquet file; every filter combination is checked for identical
+results first.
+
+    python benchmarks/bench_filter_index.py
+    python benchmarks/bench_filter_index.py --sizes 3023 300000 3000000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from _common import PROJECT_ROOT, best_of, print_table
+
+import duckdb
+
+from data_processing import BEHAVIOR_COLS
+from filter_index import FilterIndex
+
+PARQUET = PROJECT_ROOT / "data" / "processed" / "squirrels.parquet"
+COLUMNS = ["unique_squirrel_id", "date", "shift", "age", "primary_fur_color", "hectare", *BEHAVIOR_COLS]
+
+# (shift, fur, age, behaviours) — typical sidebar states.
+CASES = {
+    "all": ([], [], [], []),
+    "PM gray adults": (["PM"], ["Gray"], ["Adult"], []),
+    "foraging|eating": ([], [], [], ["foraging", "eating"]),
+    "mixed": (["AM"], ["Cinnamon", "Black"], ["Adult", "Juvenile"], ["running", "chasing", "climbing"]),
+}
+
+
+def sql_filter(con, shift, fur, age, behaviors):
+    """The f-string IN (...) query filtered_df ran before the bitmap index."""
+    conditions = []
+    if shift:
+        conditions.append(f"shift IN ({', '.join(repr(v) for v in shift)})")
+    if fur:
+        conditions.append(f"primary_fur_color IN ({', '.join(repr(v) for v in fur)})")
+    if age:
+        conditions.append(f"age IN ({', '.join(repr(v) for v in age)})")
+    if behaviors:
+        conditions.append("(" + " OR ".join(f"{c} = TRUE" for c in behaviors) + ")")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return con.execute(f"SELECT {', '.join(COLUMNS)} FROM squirrels {where}").df()
+
+
+def index_filter(table, index, shift, fur, age, behaviors):
+    mask = index.mask({"shift": shift, "primary_fur_color": fur, "age": age}, any_flags=behaviors)
+    return table[mask].reset_index(drop=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3_023, 30_000, 300_000, 3_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = Path(tmp) / f"squirrels_{n}.parquet"
+            duckdb.execute(f"""
+                COPY (
+                    SELECT s.* FROM range({-(-n // 3_023)}) r, read_parquet('{PARQUET.as_posix()}') s
+                    LIMIT {n}
+                ) TO '{path.as_posix()}' (FORMAT PARQUET)
+            """)
+            con = duckdb.connect()
+            con.execute(f"CREATE VIEW squirrels AS SELECT * FROM read_parquet('{path.as_posix()}')")
+            table = con.execute(f"SELECT {', '.join(COLUMNS)} FROM squirrels").df()
+            build = best_of(
+                lambda: FilterIndex(table, ["shift", "primary_fur_color", "age"], flags=BEHAVIOR_COLS), 1
+            )
+            index = FilterIndex(table, ["shift", "primary_fur_color", "age"], flags=BEHAVIOR_COLS)
+
+            for name, case in CASES.items():
+                expected = sql_filter(con, *case)
+                got = index_filter(table, index, *case)
+                assert expected["unique_squirrel_id"].tolist() == got["unique_squirrel_id"].tolist(), name
+
+                sql = best_of(lambda: sql_filter(con, *case), args.repeat)
+                mask = best_of(
+                    lambda: index.mask(
+                        {"shift": case[0], "primary_fur_color": case[1], "age": case[2]},
+                        any_flags=case[3],
+                    ),
+                    args.repeat,
+                )
+                rows_ = best_of(lambda: index_filter(table, index, *case), args.repeat)
+                rows.append([
+                    f"{n:,}", name, f"{len(got):,}", f"{build * 1000:.1f}",
+                    f"{sql * 1000:.2f}", f"{mask * 1000:.3f}", f"{rows_ * 1000:.2f}",
+                    f"{sql / mask:.0f}x",
+                ])
+            con.close()
+
+    print_table(
+        ["rows", "filter", "matches", "build ms", "sql ms", "mask ms", "mask+rows ms", "mask speedup"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Import-time profile of src/app.py.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters and reports
+the best wall time plus a per-module breakdown of the modules app.py imports
+directly (cumulative and self time, from the run with the best wall time). A second
+table shows what the modules deferred to first use would add if they were
+imported eagerly again.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --repeat 5 --top 20
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+from _common import SRC_DIR, print_table
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+# Loaded on first use rather than by `import app`.
+DEFERRED = ["querychat", "geopandas", "altair", "folium"]
+
+
+def run(code: str, setup: str = "pass") -> tuple[float, str]:
+    """Time code in a fresh interpreter under -X importtime; return (wall s, stderr)."""
+    timed = f"import time; {setup}; _t = time.perf_counter(); {code}; print(time.perf_counter() - _t)"
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", timed],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, "SQUIRREL_PRELOAD_CHAT": "0"},
+    )
+    return float(out.stdout.strip().splitlines()[-1]), out.stderr
+
+
+def direct_imports(stderr: str, parent: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) for the modules `parent` imported directly."""
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match and len(match.group(3)) == 3 and match.group(4) != parent:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    wall, stderr = min(run("import app") for _ in range(args.repeat))
+    modules = sorted(direct_imports(stderr, "app"), key=lambda r: -r[2])[: args.top]
+    print(f"import app: {wall * 1000:.0f} ms (best of {args.repeat})\n")
+    print_table(
+        ["module", "cumulative ms", "self ms"],
+        [[name, f"{cum / 1000:.1f}", f"{own / 1000:.1f}"] for name, own, cum in modules],
+    )
+
+    rows = []
+    for name in DEFERRED:
+        extra = min(run(f"import {name}", setup="import app")[0] for _ in range(args.repeat))
+        rows.append([name, f"{extra * 1000:.0f}"])
+    print()
+    print_table(["deferred module", "extra ms if eager"], rows)
+
+
+if __name__ == "__main__":
+    main()
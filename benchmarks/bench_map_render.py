@@ -0,0 +1,88 @@
+"""
+Map render time vs. point count.
+
+Compares the columnar PointLayer used by map_render.map_html against the
+original per-row folium.CircleMarker loop, and reports the size of the
+visibility-mask update the app sends instead of a new document once the map
+is on screen. Run from the project root:
+
+    python benchmarks/bench_map_render.py
+    python benchmarks/bench_map_render.py --sizes 1000 10000 100000 --legacy-max 30000
+"""
+from __future__ import annotations
+
+import argparse
+import html
+
+from _common import best_of, census_points, print_table, scale_points
+
+import folium
+
+from map_render import DEFAULT_CENTER, DEFAULT_ZOOM, encode_mask, map_html
+from utils import color_for_fur
+
+ALL_FUR = ["Gray", "Cinnamon", "Black"]
+
+
+def legacy_map_html(filtered, tile_choice: str) -> str:
+    """The per-row marker loop map_html used before the columnar layer."""
+    fmap = folium.Map(location=DEFAULT_CENTER, zoom_start=DEFAULT_ZOOM, tiles=tile_choice)
+    for _, row in filtered.iterrows():
+        fur = str(row.get("primary_fur_color", "Unknown"))
+        popup_html = (
+            f"<b>ID:</b> {html.escape(str(row.get('unique_squirrel_id', 'Unknown')))}<br/>"
+            f"<b>Hectare:</b> {html.escape(str(row.get('hectare', 'Unknown')))}<br/>"
+            f"<b>Shift:</b> {html.escape(str(row.get('shift', 'Unknown')))}<br/>"
+            f"<b>Fur:</b> {html.escape(fur)}<br/>"
+            f"<b>Age:</b> {html.escape(str(row.get('age', 'Unknown')))}<br/>"
+            f"<b>Date:</b> {html.escape(str(row.get('date', 'Unknown'))[:10])}"
+        )
+        folium.CircleMarker(
+            location=(row["latitude"], row["longitude"]),
+            radius=4,
+            color=color_for_fur(fur),
+            fill=True,
+            fill_color=color_for_fur(fur),
+            fill_opacity=0.8,
+            weight=0,
+            tooltip=folium.Tooltip(popup_html, max_width=250),
+        ).add_to(fmap)
+    return fmap.get_root().render()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 3_023, 10_000, 30_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--legacy-max", type=int, default=30_000,
+        help="largest point count to time the per-row renderer at (it is slow)",
+    )
+    args = parser.parse_args()
+
+    base = census_points()
+    rows = []
+    for n in args.sizes:
+        points = scale_points(base, n)
+        doc = map_html(points, "OpenStreetMap", ALL_FUR)
+        columnar = best_of(lambda: map_html(points, "OpenStreetMap", ALL_FUR), args.repeat)
+        if n <= args.legacy_max:
+            legacy = best_of(lambda: legacy_map_html(points, "OpenStreetMap"), 1)
+            legacy_doc = legacy_map_html(points, "OpenStreetMap")
+            legacy_cols = [f"{legacy * 1000:.0f}", f"{len(legacy_doc) / 1e6:.2f}", f"{legacy / columnar:.0f}x"]
+        else:
+            legacy_cols = ["-", "-", "-"]
+        update = encode_mask(points.index.to_numpy() % 2 == 0)
+        rows.append([
+            f"{n:,}", f"{columnar * 1000:.1f}", f"{len(doc) / 1e6:.2f}",
+            f"{len(update) / 1e3:.1f}", *legacy_cols,
+        ])
+
+    print_table(
+        ["points", "columnar ms", "columnar MB", "update KB", "per-row ms", "per-row MB", "speedup"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Resident memory and load time of the app's startup data.
+
+Each variant runs in a fresh interpreter so the numbers do not share an
+allocator. The "legacy" variant keeps what app.py held before the store: the
+GeoDataFrame from the processed GeoJSON plus its flattened querychat copy.
+The "store" variants build SquirrelStore with coordinates taken either from
+the GeoJSON geometry or from the memory-mapped point sidecar, which is what
+app.py does now. RSS is read
+from /proc/self/status (Linux only) after the heavy imports, so the delta is
+the data itself; freed temporaries are returned to the OS with malloc_trim
+before the final reading.
+
+    python benchmarks/bench_memory.py
+"""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+from _common import PROJECT_ROOT, SRC_DIR, print_table
+
+PRELUDE = f"""
+import ctypes, gc, json, sys, time
+sys.path.insert(0, {str(SRC_DIR)!r})
+
+def rss_mb():
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+import duckdb, geopandas, numpy, pandas
+from data_processing import load_geojson, load_points, to_flat_df
+from store import SquirrelStore
+GEOJSON = {str(PROJECT_ROOT / "data" / "processed" / "squirrels_clean.geojson")!r}
+PARQUET = {str(PROJECT_ROOT / "data" / "processed" / "squirrels.parquet")!r}
+POINTS = {str(PROJECT_ROOT / "data" / "processed" / "squirrels_points.npy")!r}
+gc.collect()
+before = rss_mb()
+start = time.perf_counter()
+"""
+
+VARIANTS = {
+    "legacy": """
+gdf = load_geojson(GEOJSON)
+flat = to_flat_df(gdf)
+held = gdf.memory_usage(deep=True).sum() + flat.memory_usage(deep=True).sum()
+""",
+    "store (GeoJSON)": """
+gdf = load_geojson(GEOJSON)
+table = duckdb.execute(f"SELECT * FROM read_parquet('{PARQUET}')").df()
+store = SquirrelStore.from_frame(table, lon=gdf.geometry.x, lat=gdf.geometry.y)
+del gdf, table
+held = store.nbytes()
+""",
+    "store (sidecar)": """
+points = load_points(POINTS, fallback=None)
+table = duckdb.execute(f"SELECT * FROM read_parquet('{PARQUET}')").df()
+store = SquirrelStore.from_frame(table, lon=points["longitude"], lat=points["latitude"])
+del points, table
+held = store.nbytes()
+""",
+}
+
+EPILOGUE = """
+elapsed = time.perf_counter() - start
+gc.collect()
+ctypes.CDLL("libc.so.6").malloc_trim(0)
+print(json.dumps({"rss": rss_mb() - before, "held": held / 2**20, "ms": elapsed * 1000}))
+"""
+
+
+def measure(body: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PRELUDE + body + EPILOGUE],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    rows = []
+    for name, body in VARIANTS.items():
+        result = measure(body)
+        rows.append([name, f"{result['ms']:.0f}", f"{result['held']:.2f}", f"{result['rss']:.1f}"])
+    print_table(["startup", "load ms", "held MB", "RSS delta MB"], rows)
+
+
+if __name__ == "__main__":
+    main()
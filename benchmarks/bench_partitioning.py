@@ -0,0 +1,113 @@
+"""
+DuckDB scan cost: single Parquet file vs. the Hive-partitioned layout.
+
+Each dataset size is the census repeated (with suffixed ids) in survey order
+and written both as one Parquet file, as process_csv does, and through
+write_partitioned() (date / shift directories, sorted by hectare). Typical
+sidebar and querychat filters are run against both; the table reports the
+rows DuckDB has to read (rows in the files and row groups that survive
+partition and min/max pruning, from the Parquet metadata) and the best-of
+latency, after checking that both layouts return identical results.
+
+    python benchmarks/bench_partitioning.py
+    python benchmarks/bench_partitioning.py --sizes 300000 3000000 30000000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from _common import PROJECT_ROOT, best_of, print_table
+
+import duckdb
+
+from data_processing import parquet_source, write_partitioned
+
+PARQUET = PROJECT_ROOT / "data" / "processed" / "squirrels.parquet"
+
+# Equality filters of the kind the sidebar and querychat produce.
+CASES = {
+    "shift": {"shift": "PM"},
+    "date": {"date": "2018-10-13"},
+    "date + shift": {"date": "2018-10-13", "shift": "AM"},
+    "hectare": {"hectare": "14D"},
+    "fur + age": {"primary_fur_color": "Cinnamon", "age": "Adult"},
+}
+
+
+def query(source: str, filters: dict[str, str]) -> str:
+    where = " AND ".join(f"{col} = '{value}'" for col, value in filters.items())
+    return f"SELECT primary_fur_color, count(*) AS n FROM {source} WHERE {where} GROUP BY 1 ORDER BY 1"
+
+
+def rows_read(con, path: Path, filters: dict[str, str]) -> int:
+    """
+    Rows in the row groups a scan cannot skip: files whose Hive path
+    contradicts a filter are dropped, then row groups whose min/max range
+    excludes a filter value. Statistics are compared as text, cut to the
+    filter value's length so that '2018-10-13' matches a timestamp.
+    """
+    files = [path] if path.is_file() else sorted(path.rglob("*.parquet"))
+    total = 0
+    for file in files:
+        parts = dict(p.split("=", 1) for p in file.relative_to(path).parts[:-1]) if path.is_dir() else {}
+        if any(parts.get(col, value) != value for col, value in filters.items()):
+            continue
+        stats = {}
+        for group, col, lo, hi, n in con.execute(
+            "SELECT row_group_id, path_in_schema, stats_min, stats_max, row_group_num_rows "
+            "FROM parquet_metadata(?)", [str(file)]
+        ).fetchall():
+            stats.setdefault(group, [n, {}])[1][col] = (lo, hi)
+        for n, ranges in stats.values():
+            if all(ranges[col][0][:len(value)] <= value <= ranges[col][1][:len(value)]
+                   for col, value in filters.items() if col in ranges):
+                total += n
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[300_000, 3_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for n in args.sizes:
+            single = tmp / f"squirrels_{n}.parquet"
+            partitioned = tmp / f"squirrels_{n}"
+            duckdb.execute(f"""
+                COPY (
+                    SELECT s.* REPLACE (s.unique_squirrel_id || '-' || r.range AS unique_squirrel_id)
+                    FROM range({-(-n // 3_023)}) r, read_parquet('{PARQUET.as_posix()}') s
+                    LIMIT {n}
+                ) TO '{single.as_posix()}' (FORMAT PARQUET)
+            """)
+            write_partitioned(str(single), str(partitioned))
+
+            con = duckdb.connect()
+            layouts = {"single": single, "partitioned": partitioned}
+            for name, filters in CASES.items():
+                sql = {layout: query(parquet_source(path), filters) for layout, path in layouts.items()}
+                assert con.execute(sql["single"]).fetchall() == con.execute(sql["partitioned"]).fetchall(), name
+                scanned = {layout: rows_read(con, path, filters) for layout, path in layouts.items()}
+                latency = {k: best_of(lambda: con.execute(v).fetchall(), args.repeat) for k, v in sql.items()}
+                rows.append([
+                    f"{n:,}", name,
+                    f"{scanned['single']:,}", f"{scanned['partitioned']:,}",
+                    f"{latency['single'] * 1000:.1f}", f"{latency['partitioned'] * 1000:.1f}",
+                    f"{latency['single'] / latency['partitioned']:.1f}x",
+                ])
+            con.close()
+
+    print_table(
+        ["rows", "filter", "single read", "partitioned read", "single ms", "partitioned ms", "speedup"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
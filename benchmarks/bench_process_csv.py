@@ -0,0 +1,82 @@
+"""
+process_csv throughput and peak memory: pandas vs. DuckDB streaming.
+
+Synthetic raw inputs are built by repeating the 2018 census rows up to each
+size. Every run happens in a fresh interpreter, which reports its own wall
+time and peak RSS (ru_maxrss), so the two pipelines do not share memory.
+
+    python benchmarks/bench_process_csv.py
+    python benchmarks/bench_process_csv.py --sizes 30000 1000000 --pandas-max 300000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from _common import PROJECT_ROOT, SRC_DIR, print_table
+
+import duckdb
+
+RAW_CSV = PROJECT_ROOT / "data" / "raw" / "2018_Central_Park_Squirrel_Census.csv"
+
+RUNNER = """
+import json, resource, sys, time
+sys.path.insert(0, {src!r})
+import data_processing
+process = getattr(data_processing, {func!r})
+start = time.perf_counter()
+process({raw!r}, {out!r} + "/s.csv", {out!r} + "/s.parquet", {out!r} + "/p.npy", {out!r} + "/catalog.json")
+elapsed = time.perf_counter() - start
+print(json.dumps({{"s": elapsed, "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def make_input(path: Path, n: int) -> None:
+    """Write n raw census rows (the 2018 file repeated) to path."""
+    raw = f"read_csv('{RAW_CSV.as_posix()}', header = true, types = {{'Date': 'VARCHAR'}})"
+    duckdb.execute(f"""
+        COPY (SELECT s.* FROM range({-(-n // 3_023)}) r, {raw} s LIMIT {n})
+        TO '{path.as_posix()}' (HEADER, DELIMITER ',')
+    """)
+
+
+def measure(func: str, raw: Path, out: Path) -> dict:
+    out.mkdir()
+    code = RUNNER.format(src=str(SRC_DIR), func=func, raw=str(raw), out=str(out))
+    result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30_000, 300_000, 1_000_000])
+    parser.add_argument("--pandas-max", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            raw = Path(tmp) / f"raw_{n}.csv"
+            make_input(raw, n)
+            cols = [f"{n:,}", f"{raw.stat().st_size / 2**20:.0f}"]
+            for func, limit in [("process_csv", args.pandas_max), ("process_csv_streaming", None)]:
+                if limit is not None and n > limit:
+                    cols += ["-", "-"]
+                    continue
+                result = measure(func, raw, Path(tmp) / f"{func}_{n}")
+                cols += [f"{n / result['s']:,.0f}", f"{result['rss']:.0f}"]
+            rows.append(cols)
+            raw.unlink()
+
+    print_table(
+        ["rows", "input MB", "pandas rows/s", "pandas peak MB", "stream rows/s", "stream peak MB"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+AI-tab prompt cost with and without the prompt → SQL cache, offline.
+
+Runs the chat pipeline the app uses (QueryChat over the DuckDB chat table,
+querychat's dashboard tool, the AI tab's GROUPING SETS aggregate) with the
+keyword StubChat in place of the LLM. `--latency` seconds of sleep stand in
+for the model round trip on a miss. The first pass over the prompts fills
+the cache; the second, with the same prompts re-worded in case and spacing,
+is answered from it. Also reports a bare cache lookup at --entries entries.
+
+    python benchmarks/bench_prompt_cache.py
+    python benchmarks/bench_prompt_cache.py --latency 2.0 --entries 100000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from _common import PROJECT_ROOT, best_of, print_table
+
+import duckdb
+from querychat import QueryChat
+
+from aggregations import query_counts
+from chat_source import DuckDBSource, StubChat, chat_database
+from data_processing import BEHAVIOR_COLS, parquet_source
+from prompt_cache import PromptCache
+from store import SquirrelStore
+
+PROMPTS = [
+    "Show only gray squirrels",
+    "Show adult squirrels that were foraging",
+    "cinnamon squirrels in the morning",
+    "juvenile black squirrels that were climbing",
+    "afternoon squirrels that were eating or running",
+]
+CATEGORIES = {"shift": ["AM", "PM"], "primary_fur_color": ["Gray", "Cinnamon", "Black"], "age": ["Adult", "Juvenile"]}
+SYNONYMS = {"grey": "Gray", "morning": "AM", "afternoon": "PM"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=1.0, help="simulated model round trip, seconds")
+    parser.add_argument("--entries", type=int, default=1_000)
+    args = parser.parse_args()
+
+    parquet = duckdb.execute(f"SELECT * FROM {parquet_source(PROJECT_ROOT / 'data' / 'processed' / 'squirrels.parquet')}").df()
+    db = chat_database(SquirrelStore.from_frame(parquet).frame(), "squirrels")
+    source = DuckDBSource(db.con, "squirrels")
+    version = source.schema_version()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PromptCache(Path(tmp) / "prompts.sqlite3", maxsize=args.entries + len(PROMPTS))
+        stub = StubChat(cache, version, "squirrels", CATEGORIES, BEHAVIOR_COLS, SYNONYMS, latency=args.latency)
+        qc = QueryChat(source, "squirrels", client=stub, greeting="Hi", tools="update")
+
+        async def ask(prompt: str) -> None:
+            queries = []
+            client = qc.client(update_dashboard=lambda data: queries.append(data["query"]))
+            async for _ in await client.stream_async(prompt, content="all"):
+                pass
+            query_counts(db.cursor(), queries[-1], ["primary_fur_color", "shift"], BEHAVIOR_COLS)
+
+        rows = []
+        for label, prompts in [("cold", PROMPTS), ("warm", [f"  {p.upper()}. " for p in PROMPTS])]:
+            start = time.perf_counter()
+            for prompt in prompts:
+                asyncio.run(ask(prompt))
+            per_prompt = (time.perf_counter() - start) / len(prompts)
+            stats = cache.stats()
+            rows.append([label, len(prompts), f"{per_prompt * 1000:.1f}", stats["hits"], stats["misses"]])
+        print_table(["pass", "prompts", "ms / prompt", "hits", "misses"], rows)
+
+        for i in range(args.entries):
+            cache.put(version, f"prompt number {i}", "SELECT 1", "")
+        lookup = best_of(lambda: cache.get(version, f"prompt number {args.entries // 2}"), 200)
+        print(f"\nlookup at {len(cache):,} entries: {lookup * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Fixtures for the pytest-benchmark suite: synthetic census files at the
+sizes given with --census-rows, generated once per session.
+"""
+from __future__ import annotations
+
+from functools import cache
+
+import pytest
+
+from _common import SRC_DIR  # noqa: F401  (puts src/ on sys.path)
+from synthetic_census import write_census_csv, write_census_geojson
+
+DEFAULT_ROWS = "10000,100000"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--census-rows",
+        default=DEFAULT_ROWS,
+        help="comma-separated synthetic census sizes to benchmark, e.g. 10000,100000,1000000,10000000",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "census_rows" in metafunc.fixturenames:
+        sizes = [int(n) for n in metafunc.config.getoption("census_rows").split(",")]
+        metafunc.parametrize("census_rows", sizes, ids=[f"{n:,}".replace(",", "_") for n in sizes])
+
+
+class CensusFiles:
+    """Synthetic raw and processed census data per size, built on first use."""
+
+    def __init__(self, root):
+        self.root = root
+
+    @cache
+    def csv(self, n: int):
+        return write_census_csv(self.root / f"census_{n}.csv", n)
+
+    @cache
+    def geojson(self, n: int):
+        return write_census_geojson(self.root / f"census_{n}.geojson", n)
+
+    @cache
+    def processed(self, n: int):
+        """The cleaned frame and Parquet file process_csv makes of the synthetic CSV."""
+        from data_processing import process_csv
+
+        out = self.root / f"processed_{n}"
+        out.mkdir()
+        df = process_csv(
+            str(self.csv(n)),
+            str(out / "squirrels.csv"),
+            str(out / "squirrels.parquet"),
+            str(out / "squirrels_points.npy"),
+            str(out / "catalog.json"),
+        )
+        return df, out / "squirrels.parquet"
+
+
+@pytest.fixture(scope="session")
+def census(tmp_path_factory) -> CensusFiles:
+    return CensusFiles(tmp_path_factory.mktemp("census"))
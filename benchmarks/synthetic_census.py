@@ -0,0 +1,211 @@
+"""
+Deterministic synthetic squirrel census at any size, for benchmarks.
+
+Rows follow the raw 2018 census CSV's schema and its marginal
+distributions: hectares on the park's 42 x 9 grid (none under the
+Reservoir), points scattered inside their hectare, shift, survey date, age,
+fur colours, location and true/false rates as counted in the real data.
+Rows are generated in fixed-size chunks, each from its own seeded stream,
+so the same (n, seed) always gives the same rows and a 10M-row file can be
+written without holding it in memory.
+
+    python benchmarks/synthetic_census.py 1000000 /tmp/census_1m.csv
+    python benchmarks/synthetic_census.py 100000 /tmp/census_100k.geojson
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 250_000
+
+CENSUS_COLUMNS = [
+    "X", "Y", "Unique Squirrel ID", "Hectare", "Shift", "Date", "Hectare Squirrel Number",
+    "Age", "Primary Fur Color", "Highlight Fur Color", "Combination of Primary and Highlight Color",
+    "Color notes", "Location", "Above Ground Sighter Measurement", "Specific Location",
+    "Running", "Chasing", "Climbing", "Eating", "Foraging", "Other Activities",
+    "Kuks", "Quaas", "Moans", "Tail flags", "Tail twitches", "Approaches", "Indifferent", "Runs from",
+    "Other Interactions", "Lat/Long",
+]
+
+# Centres of hectares 01A, 42A and 01I in the 2018 census (longitude,
+# latitude). Rows 01-42 run north up the park, columns A-I east across it.
+_ORIGIN = np.array([-73.980887, 40.768198])
+_ROW_STEP = (np.array([-73.957981, 40.799902]) - _ORIGIN) / 41
+_COL_STEP = (np.array([-73.973197, 40.765116]) - _ORIGIN) / 8
+_COLUMNS = "ABCDEFGHI"
+# Hectares covered by the Reservoir, where nobody saw a squirrel.
+_RESERVOIR = {(row, col) for row in range(24, 30) for col in "CDEFGH"}
+HECTARES = [
+    (row, col) for row in range(1, 43) for col in range(9) if (row, _COLUMNS[col]) not in _RESERVOIR
+]
+
+# Value shares in the 2018 census; None is a missing value.
+SHIFT = {"PM": 0.554, "AM": 0.446}
+DATES = {
+    "10132018": 0.144, "10072018": 0.134, "10142018": 0.122, "10062018": 0.111, "10102018": 0.111,
+    "10082018": 0.094, "10122018": 0.072, "10172018": 0.071, "10182018": 0.066, "10192018": 0.052,
+    "10202018": 0.022,
+}
+AGE = {"Adult": 0.849, "Juvenile": 0.109, None: 0.04, "?": 0.002}
+FUR = {"Gray": 0.818, "Cinnamon": 0.13, "Black": 0.034, None: 0.018}
+HIGHLIGHT = {
+    None: 0.359, "Cinnamon": 0.254, "White": 0.194, "Cinnamon, White": 0.089, "Gray": 0.056,
+    "Gray, White": 0.02, "Black": 0.011, "Black, Cinnamon, White": 0.011, "Black, White": 0.003,
+    "Black, Cinnamon": 0.003, "Gray, Black": 0.001,
+}
+LOCATION = {"Ground Plane": 0.7, "Above Ground": 0.279, None: 0.021}
+TRUE_RATES = {
+    "Running": 0.241, "Chasing": 0.092, "Climbing": 0.218, "Eating": 0.251, "Foraging": 0.475,
+    "Kuks": 0.034, "Quaas": 0.017, "Moans": 0.001, "Tail flags": 0.051, "Tail twitches": 0.144,
+    "Approaches": 0.059, "Indifferent": 0.481, "Runs from": 0.224,
+}
+# Shares of rows with a free-text note, and the note they get.
+NOTES = {
+    "Color notes": (0.06, "Gray with white on tail"),
+    "Specific Location": (0.157, "on tree stump"),
+    "Other Activities": (0.145, "sitting"),
+    "Other Interactions": (0.079, "stared at observer"),
+}
+
+
+def _sample(rng: np.random.Generator, shares: dict, n: int) -> np.ndarray:
+    values = np.array(list(shares), dtype=object)
+    p = np.array(list(shares.values()))
+    return values[rng.choice(len(values), size=n, p=p / p.sum())]
+
+
+def census_chunks(n: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Yield n synthetic census rows in the raw CSV's columns, `chunk_rows` at a
+    time. Hectare squirrel numbers count up per hectare, shift and date
+    across chunks, so unique squirrel IDs are unique over all n rows.
+    """
+    n_keys = len(HECTARES) * len(SHIFT) * len(DATES)
+    seen = np.zeros(n_keys, dtype=np.int64)
+    hectare_rows = np.array([row for row, _ in HECTARES])
+    hectare_cols = np.array([col for _, col in HECTARES])
+    hectare_names = np.array([f"{row:02d}{_COLUMNS[col]}" for row, col in HECTARES], dtype=object)
+    shifts, dates = list(SHIFT), list(DATES)
+    for i, start in enumerate(range(0, n, chunk_rows)):
+        size = min(chunk_rows, n - start)
+        rng = np.random.default_rng([seed, i])
+
+        hectare = rng.integers(0, len(HECTARES), size=size)
+        offsets = rng.uniform(-0.5, 0.5, size=(size, 2))
+        row = hectare_rows[hectare] - 1 + offsets[:, 0]
+        col = hectare_cols[hectare] + offsets[:, 1]
+        lon = _ORIGIN[0] + row * _ROW_STEP[0] + col * _COL_STEP[0]
+        lat = _ORIGIN[1] + row * _ROW_STEP[1] + col * _COL_STEP[1]
+
+        shift = rng.choice(len(shifts), size=size, p=list(SHIFT.values()))
+        p_dates = np.array(list(DATES.values()))
+        date = rng.choice(len(dates), size=size, p=p_dates / p_dates.sum())
+        key = (hectare * len(shifts) + shift) * len(dates) + date
+        number = seen[key] + pd.Series(key).groupby(key).cumcount().to_numpy() + 1
+        seen += np.bincount(key, minlength=n_keys)
+
+        hectare_name = pd.Series(hectare_names[hectare])
+        shift_name = pd.Series(np.array(shifts, dtype=object)[shift])
+        date_name = pd.Series(np.array(dates, dtype=object)[date])
+        squirrel_id = (
+            hectare_name + "-" + shift_name + "-" + date_name.str[:4] + "-" + pd.Series(number).map("{:02d}".format)
+        )
+
+        fur = _sample(rng, FUR, size)
+        highlight = _sample(rng, HIGHLIGHT, size)
+        location = _sample(rng, LOCATION, size)
+        heights = rng.choice(np.array(["2", "5", "10", "15", "20", "30"], dtype=object), size=size)
+        chunk = {
+            "X": lon,
+            "Y": lat,
+            "Unique Squirrel ID": squirrel_id,
+            "Hectare": hectare_name,
+            "Shift": shift_name,
+            "Date": date_name,
+            "Hectare Squirrel Number": number,
+            "Age": _sample(rng, AGE, size),
+            "Primary Fur Color": fur,
+            "Highlight Fur Color": highlight,
+            "Combination of Primary and Highlight Color": (
+                pd.Series(fur).fillna("") + "+" + pd.Series(highlight).fillna("")
+            ),
+            "Location": location,
+            "Above Ground Sighter Measurement": np.where(
+                location == "Above Ground", heights, np.where(location == "Ground Plane", "FALSE", None)
+            ),
+        }
+        for name, (share, note) in NOTES.items():
+            chunk[name] = np.where(rng.random(size) < share, note, None)
+        for name, rate in TRUE_RATES.items():
+            chunk[name] = rng.random(size) < rate
+        chunk["Lat/Long"] = "POINT (" + pd.Series(lon).astype(str) + " " + pd.Series(lat).astype(str) + ")"
+        frame = pd.DataFrame(chunk)[CENSUS_COLUMNS]
+        frame.index += start
+        yield frame
+
+
+def synthetic_census(n: int, seed: int = 0) -> pd.DataFrame:
+    """n synthetic census rows as one frame, in the raw CSV's columns."""
+    return pd.concat(census_chunks(n, seed))
+
+
+def write_census_csv(path: str | Path, n: int, seed: int = 0) -> Path:
+    """Write n synthetic rows as a raw census CSV, chunk by chunk."""
+    path = Path(path)
+    with open(path, "w", newline="") as fh:
+        for i, chunk in enumerate(census_chunks(n, seed)):
+            chunk.to_csv(fh, index=False, header=i == 0)
+    return path
+
+
+def write_census_geojson(path: str | Path, n: int, seed: int = 0) -> Path:
+    """
+    Write n synthetic rows as a raw census GeoJSON: one Point feature per
+    row, with snake_case properties as in the NYC Open Data export.
+    """
+    path = Path(path)
+    with open(path, "w") as fh:
+        fh.write('{"type": "FeatureCollection", "features": [\n')
+        first = True
+        for chunk in census_chunks(n, seed):
+            props = chunk.drop(columns=["Lat/Long"]).rename(columns=_property_name)
+            props["x"], props["y"] = props["x"].astype(str), props["y"].astype(str)
+            props["hectare_squirrel_number"] = props["hectare_squirrel_number"].astype(str)
+            records = props.astype(object).where(props.notna(), None).to_dict("records")
+            for lon, lat, record in zip(chunk["X"], chunk["Y"], records):
+                feature = {"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]}, "properties": record}
+                fh.write(("" if first else ",\n") + json.dumps(feature))
+                first = False
+        fh.write("\n]}\n")
+    return path
+
+
+# The Open Data export truncates these two property names.
+_GEOJSON_NAMES = {
+    "Combination of Primary and Highlight Color": "combination_of_primary_and",
+    "Above Ground Sighter Measurement": "above_ground_sighter",
+}
+
+
+def _property_name(column: str) -> str:
+    return _GEOJSON_NAMES.get(column, column.lower().replace(" ", "_"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("rows", type=int)
+    parser.add_argument("path", type=Path, help="output file; .geojson writes GeoJSON, anything else CSV")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write = write_census_geojson if args.path.suffix == ".geojson" else write_census_csv
+    print(write(args.path, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
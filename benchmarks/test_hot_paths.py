@@ -0,0 +1,157 @@
+"""
+pytest-benchmark suite over the data pipeline and the app's per-filter hot
+paths, on synthetic census data (synthetic_census.py) at --census-rows sizes.
+
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+    python -m pytest benchmarks --census-rows 10000,100000,1000000,10000000 -k "not geojson"
+
+--benchmark-autosave stores the run as JSON under .benchmarks/, named after
+the current commit; --benchmark-compare compares against the latest stored
+run (or a given one, e.g. --benchmark-compare=0003). Generating the data is
+not timed. Pipeline steps run a fixed number of rounds, fewer at large sizes;
+the in-memory steps are calibrated by pytest-benchmark.
+"""
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import duckdb
+import geopandas as gpd
+
+from aggregations import chart_counts
+from data_processing import (
+    BEHAVIOR_COLS,
+    parquet_source,
+    process_csv,
+    process_csv_streaming,
+    process_geojson,
+    to_bool,
+    to_flat_df,
+)
+from filter_index import FilterIndex
+from map_render import TOOLTIP_FIELDS, map_html, valid_points
+from query_pool import filter_where
+
+# A typical sidebar state: both shifts, two fur colours, adults, two behaviours.
+SELECTION = {"shift": ["AM", "PM"], "primary_fur_color": ["Gray", "Cinnamon"], "age": ["Adult"]}
+FLAGS = ["foraging", "eating"]
+
+# Sizes above these are skipped: the GeoJSON read and the map document grow
+# past what the app could serve long before the data pipeline does.
+MAX_ROWS = {"geojson": 1_000_000, "map": 1_000_000}
+
+
+def _rounds(n: int) -> int:
+    return 1 if n >= 1_000_000 else 3
+
+
+def _limit(kind: str, n: int) -> None:
+    if n > MAX_ROWS[kind]:
+        pytest.skip(f"{kind} benchmarks stop at {MAX_ROWS[kind]:,} rows")
+
+
+# ── Data pipeline ─────────────────────────────────────────────────────────────
+
+
+def _outputs(tmp_path):
+    return [str(tmp_path / name) for name in ("squirrels.csv", "squirrels.parquet", "points.npy", "catalog.json")]
+
+
+def test_process_csv(benchmark, census, census_rows, tmp_path):
+    src = str(census.csv(census_rows))
+    df = benchmark.pedantic(process_csv, args=(src, *_outputs(tmp_path)), rounds=_rounds(census_rows))
+    assert len(df) == census_rows
+
+
+def test_process_csv_streaming(benchmark, census, census_rows, tmp_path):
+    src = str(census.csv(census_rows))
+    benchmark.pedantic(process_csv_streaming, args=(src, *_outputs(tmp_path)), rounds=_rounds(census_rows))
+
+
+def test_process_geojson(benchmark, census, census_rows, tmp_path):
+    _limit("geojson", census_rows)
+    src = str(census.geojson(census_rows))
+    gdf = benchmark.pedantic(
+        process_geojson, args=(src, str(tmp_path / "squirrels_clean.geojson")), rounds=_rounds(census_rows)
+    )
+    assert len(gdf) == census_rows
+
+
+def test_to_bool(benchmark, census_rows):
+    rng = np.random.default_rng(0)
+    tokens = np.array(["true", "false", "TRUE", " False ", "t", None], dtype=object)
+    raw = pd.Series(tokens[rng.choice(len(tokens), size=census_rows, p=[0.2, 0.6, 0.05, 0.1, 0.03, 0.02])])
+    result = benchmark(to_bool, raw)
+    assert result.dtype == bool
+
+
+def test_to_flat_df(benchmark, census, census_rows):
+    df, _ = census.processed(census_rows)
+    gdf = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df["x"], df["y"]), crs="EPSG:4326")
+    flat = benchmark(to_flat_df, gdf)
+    assert len(flat) == census_rows
+
+
+# ── Per-filter hot paths ──────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def index(census, census_rows) -> FilterIndex:
+    df, _ = census.processed(census_rows)
+    return FilterIndex(df, ["shift", "primary_fur_color", "age"], flags=BEHAVIOR_COLS)
+
+
+def test_filter_mask(benchmark, index):
+    mask = benchmark(index.mask, SELECTION, any_flags=FLAGS)
+    assert 0 < mask.sum() < index.n_rows
+
+
+def test_filter_query(benchmark, census, census_rows):
+    """The sidebar's filtered rows as a DuckDB query on the Parquet file."""
+    _, parquet = census.processed(census_rows)
+    con = duckdb.connect()
+    con.execute(f"CREATE VIEW squirrels AS SELECT * FROM {parquet_source(parquet)}")
+    where, params = filter_where(SELECTION, any_flags=FLAGS)
+    df = benchmark(lambda: con.execute(f"SELECT * FROM squirrels {where}", params).df())
+    assert 0 < len(df) < census_rows
+
+
+def test_map_html(benchmark, census, census_rows):
+    _limit("map", census_rows)
+    df, _ = census.processed(census_rows)
+    points = valid_points(
+        df[[name for name, _ in TOOLTIP_FIELDS]].assign(longitude=df["x"], latitude=df["y"])
+    )
+    html = benchmark.pedantic(
+        map_html, args=(points, "OpenStreetMap", ["Gray", "Cinnamon", "Black"]), rounds=_rounds(census_rows)
+    )
+    assert "squirrelPointLayer" in html
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    import app
+
+    return app
+
+
+def test_chart_html(benchmark, app_module, index, census_rows):
+    """Mask, chart counts, the map tab's chart specs and their HTML, for one filter state."""
+    keys = itertools.count()
+
+    def charts():
+        mask = index.mask(SELECTION, any_flags=FLAGS)
+        counts = chart_counts(index, mask, ["primary_fur_color", "shift"], flags=BEHAVIOR_COLS)
+        # A fresh key per run, so the app's render cache never answers.
+        specs = app_module.sidebar_chart_specs(("benchmark", census_rows, next(keys)), counts)
+        return [app_module.chart_output(spec, element_id) for element_id, spec in specs.items()]
+
+    tags = benchmark(charts)
+    assert len(tags) == 3
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from filter_index import FilterIndex, pack_mask, popcount
+from query_pool import quote_identifier, result_columns, subquery
+
+# ── Chart aggregations ────────────────────────────────────────────────────────
+
+
+def behavior_label(col: str) -> str:
+    """Display name for a behaviour column, e.g. 'tail_flags' -> 'Tail Flags'."""
+    return col.replace("_", " ").title()
+
+
+def chart_counts(
+    index: FilterIndex,
+    mask: np.ndarray,
+    columns: Iterable[str],
+    flags: Iterable[str] = (),
+    top_n: int = 5,
+) -> dict[str, pd.DataFrame]:
+    """
+    Group counts for every sidebar chart from one pass over the filtered rows.
+
+    The category codes of `columns` are combined into a single key and counted
+    with one np.bincount; each column's counts are the marginals of that joint
+    table. Behaviour flags are counted by intersecting the packed row mask with
+    each flag's bitset. Only categories that occur are returned, so the charts
+    receive a few rows regardless of how many sightings match.
+
+    Returns one (value, count) frame per column, a 'behavior' frame with the
+    top_n flags by count, and a 'total' frame holding the matching row count.
+    """
+    columns = list(columns)
+    mask = np.asarray(mask, dtype=bool)
+    sizes = [len(index.labels[col]) for col in columns]
+    key = np.ravel_multi_index([index.codes[col][mask] for col in columns], sizes)
+    joint = np.bincount(key, minlength=int(np.prod(sizes))).reshape(sizes)
+
+    counts: dict[str, pd.DataFrame] = {}
+    for axis, col in enumerate(columns):
+        other = tuple(a for a in range(len(columns)) if a != axis)
+        marginal = joint.sum(axis=other)
+        present = np.flatnonzero(marginal)
+        counts[col] = pd.DataFrame({
+            col: [index.labels[col][i] for i in present],
+            "count": marginal[present],
+        })
+
+    bits = pack_mask(mask)
+    behavior = pd.DataFrame({
+        "behavior": [behavior_label(col) for col in flags],
+        "count": [popcount(bits & index.flags[col]) for col in flags],
+    })
+    counts["behavior"] = behavior.nlargest(top_n, "count")
+    counts["total"] = pd.DataFrame({"count": [int(mask.sum())]})
+    return counts
+
+
+def query_counts(
+    con: duckdb.DuckDBPyConnection,
+    query: str,
+    columns: Iterable[str],
+    flags: Iterable[str] = (),
+    top_n: int = 5,
+) -> dict[str, pd.DataFrame]:
+    """
+    chart_counts for the rows a SQL query returns, computed inside DuckDB.
+
+    The query is wrapped as a subquery and aggregated with one GROUPING SETS
+    pass: a count per value of each of `columns` plus, on the grand-total
+    row, the row count and the number of True values of each flag. Only
+    these few rows reach pandas. Columns and flags the query does not return
+    are left out: their key is missing and the 'behavior' frame only covers
+    the flags present. NULL values are not counted as a category.
+    """
+    available = set(result_columns(con, query))
+    columns = [c for c in columns if c in available]
+    flags = [c for c in flags if c in available]
+
+    quoted = [quote_identifier(c) for c in columns]
+    select = [f"{q} AS g{i}_value, GROUPING({q}) AS g{i}_rolled" for i, q in enumerate(quoted)]
+    select.append("count(*) AS n")
+    select += [f"coalesce(count_if({quote_identifier(c)}), 0) AS f{i}" for i, c in enumerate(flags)]
+    sets = ", ".join([f"({q})" for q in quoted] + ["()"])
+    result = con.execute(
+        f"SELECT {', '.join(select)} FROM {subquery(query)} GROUP BY GROUPING SETS ({sets})"
+    ).df()
+
+    rolled = np.ones((len(result), len(columns)), dtype=bool)
+    for i in range(len(columns)):
+        rolled[:, i] = result[f"g{i}_rolled"].to_numpy() != 0
+    total = result[rolled.all(axis=1)]
+    counts: dict[str, pd.DataFrame] = {}
+    for i, col in enumerate(columns):
+        rows = result[~rolled[:, i] & result[f"g{i}_value"].notna()].sort_values(f"g{i}_value")
+        counts[col] = pd.DataFrame({
+            col: rows[f"g{i}_value"].astype(str).to_numpy(),
+            "count": rows["n"].to_numpy(dtype=np.int64),
+        })
+
+    behavior = pd.DataFrame({
+        "behavior": [behavior_label(col) for col in flags],
+        "count": [int(total[f"f{i}"].iloc[0]) if len(total) else 0 for i in range(len(flags))],
+    })
+    counts["behavior"] = behavior.nlargest(top_n, "count")
+    counts["total"] = pd.DataFrame({"count": [int(total["n"].iloc[0]) if len(total) else 0]})
+    return counts
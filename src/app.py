@@ -1,31 +1,58 @@
 from __future__ import annotations
-from utils import color_for_fur, color_for_shift
 
-import html
 import json
+import os
+from collections.abc import Callable
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import altair as alt
-import folium
+import numpy as np
 import pandas as pd
-from chatlas import ChatGithub
 from dotenv import load_dotenv
-from querychat import QueryChat
-from shiny import App, reactive, render, ui
-import geopandas as gpd
+from shiny import App, reactive, render, req, ui
 import duckdb
 
 from data_processing import (
     BEHAVIOR_COLS,
-    load_geojson,
-    to_flat_df,
+    build_catalog,
+    load_catalog,
+    load_points,
+    parquet_source,
+    points_from_geojson,
 )
+from aggregations import chart_counts, query_counts
+from exports import EXPORT_FORMATS, export_filename, stream_export
+from filter_index import FilterIndex
+from filter_state import CoalesceStats, SidebarFilters, coalesce
+from map_render import (
+    TOOLTIP_FIELDS,
+    cluster_payload,
+    density_payload,
+    encode_mask,
+    hectare_counts_payload,
+    hectare_payload,
+    map_html,
+    point_payload,
+    tile_spec,
+    valid_points,
+)
+from paged_table import TableSource, paged_table_server, paged_table_ui
+from query_pool import QueryPool, SessionCursor, WorkerPool, filter_where, quote_identifier, subquery
+from render_cache import RenderCache, filter_key, sql_key
+from spatial import ClusterIndex, GridIndex, HectareGrid, KernelDensity, bounds_contain, pad_bounds
+from store import SquirrelStore
+
+# querychat is imported on first use of the AI tab (get_querychat), altair
+# with the first chart spec built and folium with the first map document.
+if TYPE_CHECKING:
+    import altair as alt
+
+    from chat_source import ChatDatabase
 
 # ── Config ────────────────────────────────────────────────────────────────────
 
 BEHAVIOUR_COLOUR = "#6A9E6F"
-DEFAULT_CENTER = (40.78204, -73.96399)
-DEFAULT_ZOOM = 14
 FUR_COLOURS = ["#808080", "#A66A3F", "#000000"]
 FUR_ORDER = ["Gray", "Cinnamon", "Black"]
 SHIFT_COLOURS = ["#D9C27A", "#5B87D9"]
@@ -39,25 +66,124 @@ load_dotenv(PROJECT_ROOT / ".env")
 
 OUT_PAR = PROJECT_ROOT / "data" / "processed" / "squirrels.parquet"
 OUT_GEOJSON = PROJECT_ROOT / "data" / "processed" / "squirrels_clean.geojson"
+OUT_POINTS = PROJECT_ROOT / "data" / "processed" / "squirrels_points.npy"
+OUT_CATALOG = PROJECT_ROOT / "data" / "processed" / "catalog.json"
+OUT_PARTITIONED = PROJECT_ROOT / "data" / "processed" / "squirrels_partitioned"
+
+# SQUIRREL_PARTITIONED=1 points the DuckDB view at the Hive-partitioned copy
+# (`data_processing.py --partitioned`) so date / shift / hectare filters skip
+# files and row groups. The in-memory store always loads the single file.
+USE_PARTITIONED = os.environ.get("SQUIRREL_PARTITIONED", "0") == "1" and OUT_PARTITIONED.is_dir()
 
 con = duckdb.connect()
 con.execute(
-    f"CREATE VIEW squirrels AS SELECT * FROM read_parquet('{OUT_PAR.as_posix()}')"
+    f"CREATE VIEW squirrels AS SELECT * FROM {parquet_source(OUT_PARTITIONED if USE_PARTITIONED else OUT_PAR)}"
 )
 
-# ── Bootstrap: load already-cleaned processed GeoJSON ────────────────────────
+# ── Bootstrap: one columnar store shared by both tabs ────────────────────────
+
+# Sidebar choices come from the catalog written by data_processing.py; the
+# view is only scanned when the catalog is missing or out of date.
+catalog = load_catalog(OUT_CATALOG, OUT_PAR) or build_catalog(con, "squirrels")
+all_shift = [value for value, _ in catalog["categories"]["shift"]]
+all_fur   = [value for value, _ in catalog["categories"]["primary_fur_color"]]
+all_age   = [value for value, _ in catalog["categories"]["age"]]
+
+# Attributes come from the processed Parquet and coordinates from the
+# memory-mapped point sidecar, which holds the same rows in the same order.
+# A missing or stale sidecar falls back to the processed GeoJSON. The sidebar
+# filters, table and map all read views of this one store, and querychat
+# queries it through a locked-down DuckDB database (get_chat_database).
+_parquet = con.execute(f"SELECT * FROM {parquet_source(OUT_PAR)}").df()
+_ids = _parquet["unique_squirrel_id"].to_numpy(dtype="S16")
+_points = load_points(OUT_POINTS, fallback=OUT_GEOJSON)
+if not np.array_equal(_points["unique_squirrel_id"], _ids):
+    _points = points_from_geojson(OUT_GEOJSON)
+    if not np.array_equal(_points["unique_squirrel_id"], _ids):
+        raise RuntimeError(
+            f"{OUT_PAR.name} and {OUT_GEOJSON.name} are out of sync; rerun src/data_processing.py"
+        )
+_store = SquirrelStore.from_frame(_parquet, lon=_points["longitude"], lat=_points["latitude"])
+del _parquet, _ids, _points
+
+TABLE_COLS = ["unique_squirrel_id", "date", "shift", "age", "primary_fur_color", "hectare", *BEHAVIOR_COLS]
+TABLE_VIEW_COLS = TABLE_COLS[:6]
+AI_TABLE_COLS = [*TABLE_VIEW_COLS, "longitude", "latitude", *BEHAVIOR_COLS]
+MAP_COLS = [name for name, _ in TOOLTIP_FIELDS] + ["longitude", "latitude"]
+
+# Sidebar filters are answered from an in-memory bitmap index rather than a
+# DuckDB scan per input change; one row-position mask drives the table,
+# charts and map.
+_index = FilterIndex(
+    _store.frame(["shift", "primary_fur_color", "age", *BEHAVIOR_COLS]),
+    ["shift", "primary_fur_color", "age"],
+    flags=BEHAVIOR_COLS,
+)
+_map_points = valid_points(_store.frame(MAP_COLS))
+_map_rows = _map_points.index.to_numpy()
+
+# Zoom-dependent grid clusters of the map points, with per-fur-colour counts,
+# for the "Cluster points" map mode.
+_clusters = ClusterIndex(
+    _map_points["longitude"].to_numpy(),
+    _map_points["latitude"].to_numpy(),
+    _index.codes["primary_fur_color"][_map_rows],
+    _index.labels["primary_fur_color"],
+)
 
-_gdf     = load_geojson(OUT_GEOJSON)
-all_shift = con.execute("SELECT DISTINCT shift FROM squirrels ORDER BY shift").df()["shift"].tolist()
-all_fur   = con.execute("SELECT DISTINCT primary_fur_color FROM squirrels ORDER BY primary_fur_color").df()["primary_fur_color"].tolist()
-all_age   = con.execute("SELECT DISTINCT age FROM squirrels ORDER BY age").df()["age"].tolist()
-_chat_base_df = to_flat_df(_gdf)
+# Above SQUIRREL_MAP_VIEWPORT_POINTS map points (0 = always), the map document
+# embeds no points: each session is sent only the filtered points in and
+# around its current view, looked up in a uniform-grid index. A view holding
+# more than MAX_VIEW_POINTS points is shown as clusters instead.
+MAP_VIEWPORT_POINTS = int(os.environ.get("SQUIRREL_MAP_VIEWPORT_POINTS", "50000"))
+MAX_VIEW_POINTS = 50_000
+VIEWPORT_MODE = len(_map_points) > MAP_VIEWPORT_POINTS
+# Each side of the view is padded by this fraction of its size, so small pans
+# are served from points already sent.
+VIEW_MARGIN = 0.5
+_grid = GridIndex(_map_points["longitude"].to_numpy(), _map_points["latitude"].to_numpy())
+_map_bounds = (_grid.x0, _grid.y0, _grid.x1, _grid.y1)
+
+# Census hectare polygons, fitted once to the sightings' coordinates, for the
+# "Shade hectares" choropleth; updates send only per-hectare counts.
+_hectare_col = _store.columns["hectare"]
+_hectares = HectareGrid(
+    _hectare_col.codes,
+    list(_hectare_col.categories),
+    _store.columns["longitude"],
+    _store.columns["latitude"],
+)
+_hectare_geometry = hectare_payload(_hectares)
+del _hectare_col
+
+# Binned FFT kernel density of the sightings for the "Hotspots" layer; one
+# surface per filter state is kept in the render cache.
+_density = KernelDensity(_store.columns["longitude"], _store.columns["latitude"])
+
+# Rendered chart specs, map documents and map masks, shared by every session
+# in this process. Like the store and the indexes above, it is built from the
+# processed data as loaded at startup, so the app must be restarted after
+# rerunning data_processing.py. Size is set with SQUIRREL_RENDER_CACHE_SIZE.
+_render_cache = RenderCache()
+
+# DuckDB queries made on behalf of a session run on a bounded thread pool,
+# each session on its own cursor of the shared `squirrels` database, so they
+# neither block the event loop nor queue behind one connection. Pool size is
+# set with SQUIRREL_QUERY_WORKERS.
+_query_pool = QueryPool(con)
+
+# Chart specs and map documents are built on their own small thread pool
+# (SQUIRREL_RENDER_WORKERS) so a slow render never stalls the event loop.
+_render_pool = WorkerPool(int(os.environ.get("SQUIRREL_RENDER_WORKERS", "2")), thread_name_prefix="render")
+
+# Sidebar filter changes coalesced across all sessions: `_filter_stats.stats()`
+# reports how many recomputations debouncing (SQUIRREL_FILTER_DEBOUNCE) and
+# duplicate suppression avoided.
+_filter_stats = CoalesceStats()
  
-qc = QueryChat(
-    _chat_base_df,
-    "squirrels",
-    client=ChatGithub(model="gpt-4.1"),
-    greeting="""
+# ── AI assistant ──────────────────────────────────────────────────────────────
+
+CHAT_GREETING = """
 Hello! I can help you explore the **2018 Central Park Squirrel Census**. Try one of these:
 
 **Filter the data:**
@@ -68,136 +194,211 @@ Hello! I can help you explore the **2018 Central Park Squirrel Census**. Try one
 - <span class="suggestion">Which fur color is most common?</span>
 - <span class="suggestion">How many juvenile vs adult squirrels were recorded?</span>
 """
-)
+
+
+@cache
+def get_chat_database() -> ChatDatabase:
+    """
+    The locked-down DuckDB database querychat's SQL runs against, a view
+    over the in-memory store created on first use. The AI tab's charts,
+    table and download query it too, through per-session cursors.
+    """
+    from chat_source import chat_database
+
+    return chat_database(_store.frame(), "squirrels")
+
+
+# Filters the chat has already translated are kept in a SQLite file shared by
+# every worker (SQUIRREL_PROMPT_CACHE; empty keeps it in memory), so a repeated
+# prompt applies its SQL without a model call. SQUIRREL_CHAT_CLIENT=stub swaps
+# the LLM for the offline keyword translator.
+PROMPT_CACHE_PATH = os.environ.get("SQUIRREL_PROMPT_CACHE", str(PROJECT_ROOT / ".cache" / "prompt_cache.sqlite3"))
+CHAT_CLIENT = os.environ.get("SQUIRREL_CHAT_CLIENT", "github")
+CHAT_SYNONYMS = {"grey": "Gray", "morning": "AM", "afternoon": "PM"}
+
+
+@cache
+def get_querychat():
+    """
+    The QueryChat instance shared by every session, created on first use.
+
+    querychat, chatlas and the LLM client are imported and built here rather
+    than at module import, so workers that never serve the AI tab skip them.
+    Set SQUIRREL_PRELOAD_CHAT=1 to build it at startup instead.
+    """
+    from chatlas import ChatGithub
+    from querychat import QueryChat
+
+    from chat_source import CachedChat, DuckDBSource, StubChat
+    from prompt_cache import PromptCache
+
+    source = DuckDBSource(get_chat_database().con, "squirrels")
+    prompts = PromptCache(PROMPT_CACHE_PATH or None)
+    if CHAT_CLIENT == "stub":
+        client = StubChat(
+            prompts,
+            source.schema_version(),
+            "squirrels",
+            {col: [v for v, _ in catalog["categories"][col]] for col in ("shift", "primary_fur_color", "age")},
+            flags=BEHAVIOR_COLS,
+            synonyms=CHAT_SYNONYMS,
+        )
+    else:
+        client = CachedChat.wrap(ChatGithub(model="gpt-4.1"), prompts, source.schema_version(), "squirrels")
+    return QueryChat(source, "squirrels", client=client, greeting=CHAT_GREETING)
+
+
+if os.environ.get("SQUIRREL_PRELOAD_CHAT") == "1":
+    get_querychat()
 
 # ── Presentation helpers ──────────────────────────────────────────────────────
 
 
-def chart_html(chart: alt.Chart, element_id: str) -> ui.Tag:
-    spec = chart.to_dict()
+def chart_html(spec_json: str, element_id: str) -> ui.Tag:
     return ui.TagList(
         ui.tags.div(id=element_id),
-        ui.tags.script(f"vegaEmbed('#{element_id}', {json.dumps(spec)}, {{actions: false}});"),
+        ui.tags.script(f"vegaEmbed('#{element_id}', {spec_json}, {{actions: false}});"),
     )
 
 
-def map_html(filtered, tile_choice: str, selected_fur: list) -> str:
-    fmap = folium.Map(
-        location=DEFAULT_CENTER,
-        zoom_start=DEFAULT_ZOOM,
-        tiles=tile_choice,
-        control_scale=True,
-    )
+def chart_output(spec: str | ui.Tag, element_id: str) -> ui.Tag:
+    """Chart HTML for a serialised spec; anything else (a "No data." note) is shown as is."""
+    return chart_html(spec, element_id) if isinstance(spec, str) else spec
 
-    for _, row in filtered.iterrows():
-        geom = row.geometry
-        if geom is None or geom.is_empty:
-            continue
-        lon, lat = geom.x, geom.y
-        fur = str(row.get("primary_fur_color", "Unknown"))
-        popup_html = (
-            f"<b>ID:</b> {html.escape(str(row.get('unique_squirrel_id', 'Unknown')))}<br/>"
-            f"<b>Hectare:</b> {html.escape(str(row.get('hectare', 'Unknown')))}<br/>"
-            f"<b>Shift:</b> {html.escape(str(row.get('shift', 'Unknown')))}<br/>"
-            f"<b>Fur:</b> {html.escape(fur)}<br/>"
-            f"<b>Age:</b> {html.escape(str(row.get('age', 'Unknown')))}<br/>"
-            f"<b>Date:</b> {html.escape(str(row.get('date_clean', 'Unknown'))[:10])}"
-        )
 
-        marker = folium.CircleMarker(
-            location=(lat, lon),
-            radius=4,
-            color=color_for_fur(fur),
-            fill=True,
-            fill_color=color_for_fur(fur),
-            fill_opacity=0.8,
-            weight=0,
-            tooltip=folium.Tooltip(popup_html, max_width=250),
-        )
-        marker.add_to(fmap)
-
-    if not filtered.empty:
-        minx, miny, maxx, maxy = filtered.total_bounds
-        fmap.fit_bounds([[miny, minx], [maxy, maxx]])
-
-    fur_palette = {"Gray": "#808080", "Cinnamon": "#B87333", "Black": "#1F1F1F"}
-    all_fur_keys = list(fur_palette.keys())
-    selected_json = json.dumps(selected_fur)
-    all_fur_json  = json.dumps(all_fur_keys)
-
-    legend_items_html = "".join(
-        f"""
-        <div class="legend-item" data-fur="{name}"
-             style="display:flex; align-items:center; gap:7px; padding:4px 6px;
-                    border-radius:5px; cursor:pointer; transition:background 0.15s;
-                    background: {'rgba(255,255,255,0.25)' if name in selected_fur else 'transparent'};">
-            <span style="display:inline-block; width:13px; height:13px; border-radius:50%;
-                         background:{color}; flex-shrink:0;
-                         opacity:{'1' if name in selected_fur else '0.35'};"></span>
-            <span style="font-size:12px; font-weight:500;
-                         opacity:{'1' if name in selected_fur else '0.45'}">{name}</span>
-        </div>
-        """
-        for name, color in fur_palette.items()
+def cached_spec(key: tuple | str, element_id: str, build: Callable[[], alt.Chart]) -> str:
+    """Serialised spec for a filter key, building and serialising it only on a cache miss."""
+    return _render_cache.get_or_render(
+        ("chart", element_id, key), lambda: json.dumps(build().to_dict())
     )
 
-    total_squirrels = len(filtered)
-    
-    legend_html = f"""
-    <div id="fur-legend"
-         style="position:absolute; top:12px; right:12px; z-index:9999;
-                background:rgba(255,255,255,0.88); backdrop-filter:blur(4px);
-                border-radius:8px; padding:8px 10px; box-shadow:0 2px 8px rgba(0,0,0,0.18);
-                min-width:110px; user-select:none;">
-        <div style="font-size:11px; font-weight:700; color:#444;
-                    margin-bottom:5px; letter-spacing:0.04em;">FUR COLOR</div>
-        {legend_items_html}
-        
-        <div style="border-top:1px solid rgba(0,0,0,0.1); margin-top:8px; padding-top:8px;">
-            <div style="font-size:11px; color:#666; margin-bottom:2px;">Total Squirrels</div>
-            <div style="font-size:18px; font-weight:700; color:#6A9E6F;">{total_squirrels:,}</div>
-        </div>
-    </div>
-
-    <script>
-    (function() {{
-        var selected = {selected_json};
-        var allFur   = {all_fur_json};
-
-        function updateVisuals() {{
-            document.querySelectorAll('.legend-item').forEach(function(el) {{
-                var fur = el.getAttribute('data-fur');
-                var active = selected.indexOf(fur) >= 0;
-                el.style.background = active ? 'rgba(255,255,255,0.25)' : 'transparent';
-                el.querySelectorAll('span').forEach(function(s, i) {{
-                    s.style.opacity = active ? '1' : (i === 0 ? '0.35' : '0.45');
-                }});
-            }});
-        }}
-
-        document.querySelectorAll('.legend-item').forEach(function(el) {{
-            el.addEventListener('click', function() {{
-                var fur = el.getAttribute('data-fur');
-                var idx = selected.indexOf(fur);
-                if (idx >= 0) {{
-                    // Don't allow deselecting all
-                    if (selected.length > 1) selected.splice(idx, 1);
-                }} else {{
-                    selected.push(fur);
-                }}
-                updateVisuals();
-                // Push new value into Shiny input 'fur'
-                if (window.parent && window.parent.Shiny) {{
-                    window.parent.Shiny.setInputValue('fur', selected, {{priority: 'event'}});
-                }}
-            }});
-        }});
-    }})();
-    </script>
+
+def sidebar_chart_specs(key: tuple, counts: dict[str, pd.DataFrame]) -> dict[str, str | ui.Tag]:
+    """The map tab's three charts for one filter state, keyed by element id."""
+    import altair as alt
+
+    fur, shift = counts["primary_fur_color"], counts["shift"]
+    specs: dict[str, str | ui.Tag] = {}
+    if fur.empty:
+        specs["fur_color_hist_chart"] = ui.em("No data.")
+    else:
+        specs["fur_color_hist_chart"] = cached_spec(key, "fur_color_hist_chart", lambda: (
+            alt.Chart(fur)
+            .mark_bar()
+            .encode(
+                x=alt.X("count:Q", title="Sightings"),
+                y=alt.Y("primary_fur_color:N", title="Fur color", sort=FUR_ORDER),
+                color=alt.Color(
+                    "primary_fur_color:N",
+                    scale=alt.Scale(domain=FUR_ORDER, range=FUR_COLOURS),
+                    legend=None,
+                ),
+            )
+            .properties(height=60, width="container")
+        ))
+    if shift.empty:
+        specs["shift_hist_chart"] = ui.em("No data.")
+    else:
+        specs["shift_hist_chart"] = cached_spec(key, "shift_hist_chart", lambda: (
+            alt.Chart(shift)
+            .mark_bar()
+            .encode(
+                x=alt.X("count:Q", title="Sightings"),
+                y=alt.Y("shift:N", title="Shift", sort=SHIFT_ORDER),
+                color=alt.Color(
+                    "shift:N",
+                    scale=alt.Scale(domain=SHIFT_ORDER, range=SHIFT_COLOURS),
+                    legend=None,
+                ),
+            )
+            .properties(height=60, width="container")
+        ))
+    if counts["total"]["count"].iloc[0] == 0:
+        specs["behavior_hist_chart"] = ui.em("No data.")
+    else:
+        specs["behavior_hist_chart"] = cached_spec(key, "behavior_hist_chart", lambda: (
+            alt.Chart(counts["behavior"])
+            .mark_bar()
+            .encode(
+                x=alt.X("count:Q", title="Sightings"),
+                y=alt.Y("behavior:N", title="Behavior", sort="-x"),
+                color=alt.value(BEHAVIOUR_COLOUR),
+            )
+            .properties(height=60, width="container")
+        ))
+    return specs
+
+
+def ai_chart_specs(key: str, counts: dict[str, pd.DataFrame]) -> dict[str, str | ui.Tag]:
+    """
+    The AI tab's three charts for one querychat filter, keyed by element id,
+    from that filter's query_counts aggregate.
+    """
+    import altair as alt
+
+    specs: dict[str, str | ui.Tag] = {}
+    empty = counts["total"]["count"].iloc[0] == 0
+    fur, shift = counts.get("primary_fur_color"), counts.get("shift")
+    if empty or fur is None:
+        specs["ai_fur_chart"] = ui.em("No data.")
+    else:
+        specs["ai_fur_chart"] = cached_spec(key, "ai_fur_chart", lambda: (
+            alt.Chart(fur)
+            .mark_bar(cornerRadiusTopRight=4, cornerRadiusBottomRight=4)
+            .encode(
+                x=alt.X("count:Q", title="Sightings"),
+                y=alt.Y("primary_fur_color:N", title=None, sort="-x"),
+                color=alt.Color(
+                    "primary_fur_color:N", 
+                    scale=alt.Scale(domain=FUR_ORDER, range=FUR_COLOURS), 
+                    legend=None),
+                tooltip=[alt.Tooltip("primary_fur_color:N", title="Fur Color"), alt.Tooltip("count:Q", title="Count")],
+            )
+            .properties(height=100, width="container")
+        ))
+    if empty or shift is None:
+        specs["ai_shift_chart"] = ui.em("No data.")
+    else:
+        specs["ai_shift_chart"] = cached_spec(key, "ai_shift_chart", lambda: (
+            alt.Chart(shift)
+            .mark_bar(cornerRadiusTopRight=4, cornerRadiusBottomRight=4)
+            .encode(
+                x=alt.X("count:Q", title="Sightings"),
+                y=alt.Y("shift:N", title=None, sort=SHIFT_ORDER),
+                color=alt.Color("shift:N", scale=alt.Scale(domain=SHIFT_ORDER, range=SHIFT_COLOURS), legend=None),
+                tooltip=[alt.Tooltip("shift:N", title="Shift"), alt.Tooltip("count:Q", title="Count")],
+            )
+            .properties(height=100, width="container")
+        ))
+    if empty:
+        specs["ai_behavior_chart_elem"] = ui.em("No data.")
+    elif counts["behavior"].empty:
+        specs["ai_behavior_chart_elem"] = ui.em("No behavior data.")
+    else:
+        specs["ai_behavior_chart_elem"] = cached_spec(key, "ai_behavior_chart_elem", lambda: (
+            alt.Chart(counts["behavior"])
+            .mark_bar()
+            .encode(
+                x=alt.X("count:Q", title="Sightings"),
+                y=alt.Y("behavior:N", title="Behavior", sort="-x"),
+                color=alt.value(BEHAVIOUR_COLOUR),
+            )
+            .properties(height=100, width="container")
+        ))
+    return specs
+
+
+def task_result(task: reactive.ExtendedTask):
+    """
+    An extended task's result, for a render function. A run cancelled because
+    a newer one superseded it counts as still in progress, so the previous
+    output stays on screen, faded under Shiny's busy spinner, until the new
+    result arrives.
     """
+    if task.status() == "cancelled":
+        req(False, cancel_output="progress")
+    return task.result()
 
-    fmap.get_root().html.add_child(folium.Element(legend_html))
-    return fmap.get_root().render()
 
 # ── UI ───────────────────────────────────────────────────────────────────────
 
@@ -210,6 +411,15 @@ app_ui = ui.page_fluid(
         Shiny.addCustomMessageHandler("set_fur_filter", function(colors) {
             Shiny.setInputValue("fur", colors, {priority: "event"});
         });
+        // Forward map updates into the map iframe; keep the merged state so a
+        // map that is still loading can pick it up once it initialises.
+        Shiny.addCustomMessageHandler("squirrel_map", function(msg) {
+            window.squirrelMapState = Object.assign(window.squirrelMapState || {}, msg);
+            var frame = document.getElementById("squirrel_map_frame");
+            if (frame && frame.contentWindow && frame.contentWindow.squirrelMap) {
+                frame.contentWindow.squirrelMap.update(msg);
+            }
+        });
         """),
     ),
     # ── Hero banner ──────────────────────────────────────────────────────────
@@ -285,6 +495,9 @@ app_ui = ui.page_fluid(
                         choices=["OpenStreetMap", "CartoDB positron", "CartoDB dark_matter"],
                         selected="OpenStreetMap",
                     ),
+                    ui.input_checkbox("cluster_points", "Cluster points", value=False),
+                    ui.input_checkbox("hectare_layer", "Shade hectares", value=False),
+                    ui.input_checkbox("hotspot_layer", "Hotspots", value=False),
                     ui.input_checkbox_group(
                         "behavior_any", 
                         "Behavior", 
@@ -358,15 +571,19 @@ app_ui = ui.page_fluid(
                                 ui.card_header(
                                     ui.div(
                                         ui.span("Filtered Data Table"),
-                                        ui.download_button(
-                                            "download_csv",
-                                            "Download",
-                                            class_="btn-success btn-sm",
+                                        ui.div(
+                                            ui.input_select("download_format", None, EXPORT_FORMATS, width="120px"),
+                                            ui.download_button(
+                                                "download_csv",
+                                                "Download",
+                                                class_="btn-success btn-sm",
+                                            ),
+                                            style="display:flex; gap:6px; align-items:baseline;",
                                         ),
                                         style="display:flex; justify-content:space-between;",
                                     )
                                 ),
-                                ui.output_data_frame("table_view"),
+                                ui.div(paged_table_ui("table_view", TABLE_VIEW_COLS), id="table_view"),
                                 full_screen=True,
                             ),
                         )
@@ -392,7 +609,7 @@ app_ui = ui.page_fluid(
                                 {"style": "display:flex; flex-direction:column; height:100%;"},
                                 ui.div(
                                     {"style": "flex:1; overflow-y:auto; min-height:0;"},
-                                    qc.ui(),
+                                    ui.output_ui("ai_chat"),
                                 ),
                             ),
                             style="height:100%;",
@@ -435,15 +652,19 @@ app_ui = ui.page_fluid(
                                         ui.output_text("ai_rows"),
                                         style="display:flex; gap:10px; align-items:center;",
                                     ),
-                                    ui.download_button(
-                                        "download_csv_ai",
-                                        "⬇ Download CSV",
-                                        class_="btn-success btn-sm",
+                                    ui.div(
+                                        ui.input_select("download_format_ai", None, EXPORT_FORMATS, width="120px"),
+                                        ui.download_button(
+                                            "download_csv_ai",
+                                            "⬇ Download",
+                                            class_="btn-success btn-sm",
+                                        ),
+                                        style="display:flex; gap:6px; align-items:baseline;",
                                     ),
                                     style="display:flex; justify-content:space-between;",
                                 )
                             ),
-                            ui.output_data_frame("ai_table_view"),
+                            ui.div(paged_table_ui("ai_table_view", AI_TABLE_COLS, height="340px"), id="ai_table_view"),
                             full_screen=True,
                             style="flex:2;",
                         ),
@@ -454,261 +675,329 @@ app_ui = ui.page_fluid(
     )
 )
 def server(input, output, session):
-    qc_vals = qc.server()
+    queries = _query_pool.cursor()
+    session.on_ended(queries.close)
+
+    # The chat module starts once the AI tab's chat panel has rendered and
+    # reported back, so its first messages reach an element that exists.
+    # Until then the AI outputs show the unfiltered data.
+    chat_vals = reactive.value(None)
+
+    @render.ui
+    def ai_chat():
+        return ui.TagList(
+            get_querychat().ui(),
+            ui.tags.script('Shiny.setInputValue("ai_chat_ready", true);'),
+        )
+
+    @reactive.effect
+    @reactive.event(input.ai_chat_ready)
+    def _start_chat():
+        if chat_vals() is None:
+            chat_vals.set(get_querychat().server())
+
+    @reactive.calc
+    def ai_sql() -> str:
+        vals = chat_vals()
+        return "" if vals is None else (vals.sql() or "")
+
+    @reactive.calc
+    def ai_query() -> str:
+        return ai_sql() or 'SELECT * FROM "squirrels"'
+
+    # The AI tab's outputs query the chat database directly, on this
+    # session's own cursor through the query pool, opened on first use.
+    chat_queries: SessionCursor | None = None
+
+    def chat_cursor() -> SessionCursor:
+        nonlocal chat_queries
+        if chat_queries is None:
+            chat_queries = SessionCursor(_query_pool, get_chat_database().cursor())
+            session.on_ended(chat_queries.close)
+        return chat_queries
+
+    # One aggregate per querychat filter, shared by the AI tab's row count
+    # and charts and cached across sessions.
+    @reactive.calc
+    async def ai_counts() -> dict[str, pd.DataFrame]:
+        key, query = ai_key(), ai_query()
+        return await chat_cursor().run(lambda cur: _render_cache.get_or_render(
+            ("ai_counts", key),
+            lambda: query_counts(cur, query, ["primary_fur_color", "shift"], flags=BEHAVIOR_COLS),
+        ))
 
     # ── Tab 1 outputs and calculations ─────────────────────────────────────────────────
+    # Everything downstream of the sidebar reads this canonical filter state
+    # rather than the inputs, so a burst of clicks or the fur legend's round
+    # trip through the checkbox group (which reports the same selection
+    # again) recomputes the mask, map and charts once.
+    filters = coalesce(
+        lambda: SidebarFilters.of(input.shift(), input.fur(), input.age(), input.behavior_any()),
+        stats=_filter_stats,
+    )
+
     @reactive.calc
-    def filtered_df() -> pd.DataFrame:
-        selected_shift    = list(input.shift()        or [])
-        selected_fur      = list(input.fur()          or [])
-        selected_age      = list(input.age()          or [])
-        selected_behavior = list(input.behavior_any() or [])
-
-        conditions = []
-        if selected_shift:
-            placeholders = ", ".join(f"'{v}'" for v in selected_shift)
-            conditions.append(f"shift IN ({placeholders})")
-        if selected_fur:
-            placeholders = ", ".join(f"'{v}'" for v in selected_fur)
-            conditions.append(f"primary_fur_color IN ({placeholders})")
-        if selected_age:
-            placeholders = ", ".join(f"'{v}'" for v in selected_age)
-            conditions.append(f"age IN ({placeholders})")
-        valid_behavior = [c for c in selected_behavior if c in BEHAVIOR_COLS]
-        if valid_behavior:
-            behavior_clause = " OR ".join(f"{c} = TRUE" for c in valid_behavior)
-            conditions.append(f"({behavior_clause})")
- 
-        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-        query = f"""
-            SELECT
-                unique_squirrel_id, date, shift, age,
-                primary_fur_color, hectare,
-                {', '.join(BEHAVIOR_COLS)}
-            FROM squirrels
-            {where}
-        """
-        return con.execute(query).df()
+    def filtered_mask() -> np.ndarray:
+        state = filters()
+        return _index.mask(
+            {
+                "shift": state.shift,
+                "primary_fur_color": state.fur,
+                "age": state.age,
+            },
+            any_flags=state.behavior,
+        )
+
+    @reactive.calc
+    def sidebar_key() -> tuple:
+        return filters().key()
+
+    @reactive.calc
+    def ai_key() -> str:
+        return sql_key(ai_sql())
 
     @reactive.calc
-    def filtered_gdf() -> gpd.GeoDataFrame:
-        ids = set(filtered_df()["unique_squirrel_id"])
-        return _gdf[_gdf["unique_squirrel_id"].isin(ids)]
+    def map_mask() -> np.ndarray:
+        return filtered_mask()[_map_rows]
 
     @output
     @render.text
     def rows() -> str:
-        return f"Squirrels: {len(filtered_df()):,}"
+        return f"Squirrels: {int(filtered_mask().sum()):,}"
+
+    # The map document is built once per session on the render pool; filter
+    # and basemap changes are pushed into it by the squirrel_map effects below.
+    @reactive.extended_task
+    async def map_document(basemap: str, fur: list[str]) -> str:
+        return await _render_pool.run(lambda: _render_cache.get_or_render(
+            ("map", basemap, filter_key(fur=fur)),
+            lambda: map_html(_map_points.iloc[:0], basemap, fur, _map_bounds, _hectare_geometry)
+            if VIEWPORT_MODE
+            else map_html(_map_points, basemap, fur, hectares=_hectare_geometry),
+        ))
+
+    @reactive.effect
+    def _build_map():
+        with reactive.isolate():
+            basemap, fur = input.basemap(), list(filters().fur)
+        map_document(basemap, fur)
 
     @output
     @render.ui
     def map_view():
-        html_str = map_html(filtered_gdf(), input.basemap(), list(input.fur()))
         return ui.tags.iframe(
-            srcdoc=html_str,
+            id="squirrel_map_frame",
+            srcdoc=task_result(map_document),
             style="height: 100%; min-height: 480px; width: 100%; border: 0;",
         )
-    
+
+    @reactive.effect
+    async def _push_map_filter():
+        mask = map_mask()
+        legend = {"selected": list(filters().fur), "total": int(mask.sum())}
+        if VIEWPORT_MODE:
+            # Points are re-sent for the view by _push_view instead.
+            await session.send_custom_message("squirrel_map", {"legend": legend})
+            return
+        encoded = _render_cache.get_or_render(
+            ("map_mask", sidebar_key()), lambda: encode_mask(mask)
+        )
+        await session.send_custom_message("squirrel_map", {"mask": encoded, "legend": legend})
+
+    # The map reports its zoom and bounds as map_view_state after every move.
+    # In cluster mode it shows server-side grid clusters for that view instead
+    # of individual points; in viewport mode it holds only the filtered points
+    # in the padded view last sent (`loaded`), refetched when the view leaves
+    # it or the filters change.
+    clustered = False
+    loaded = None
+
+    @reactive.effect
+    async def _push_view():
+        nonlocal clustered, loaded
+        if not input.cluster_points() and not VIEWPORT_MODE:
+            if clustered:
+                clustered = False
+                await session.send_custom_message("squirrel_map", {"clusters": None})
+            return
+        view, mask, key = input.map_view_state(), map_mask(), sidebar_key()
+        bounds = (view["west"], view["south"], view["east"], view["north"])
+
+        if not input.cluster_points():
+            if loaded is not None and loaded[0] == key and bounds_contain(loaded[1], bounds):
+                return
+            padded = pad_bounds(bounds, VIEW_MARGIN)
+            rows = await _render_pool.run(lambda: _grid.query(padded, mask))
+            if len(rows) <= MAX_VIEW_POINTS:
+                payload = await _render_pool.run(lambda: point_payload(_map_points.iloc[rows]))
+                loaded, clustered = (key, padded), False
+                await session.send_custom_message("squirrel_map", {"points": payload, "clusters": None})
+                return
+            # Too many points in view even for viewport mode: cluster it.
+
+        payload = await _render_pool.run(
+            lambda: cluster_payload(_clusters.query(mask, view["zoom"], bounds))
+        )
+        loaded, clustered = None, True
+        await session.send_custom_message("squirrel_map", {"clusters": payload})
+
+    # Hectare choropleth: per-hectare counts of the filtered sightings, drawn
+    # over polygons already in the map document.
+    shaded = False
+
+    @reactive.effect
+    async def _push_hectares():
+        nonlocal shaded
+        if not input.hectare_layer():
+            if shaded:
+                shaded = False
+                await session.send_custom_message("squirrel_map", {"hectares": None})
+            return
+        mask = filtered_mask()
+        payload = _render_cache.get_or_render(
+            ("hectares", sidebar_key()), lambda: hectare_counts_payload(_hectares.counts(mask))
+        )
+        shaded = True
+        await session.send_custom_message("squirrel_map", {"hectares": payload})
+
+    # Hotspot layer: a kernel density image of the filtered sightings.
+    hot = False
+
+    @reactive.effect
+    async def _push_hotspots():
+        nonlocal hot
+        if not input.hotspot_layer():
+            if hot:
+                hot = False
+                await session.send_custom_message("squirrel_map", {"hotspots": None})
+            return
+        mask, key = filtered_mask(), sidebar_key()
+        payload = await _render_pool.run(lambda: _render_cache.get_or_render(
+            ("hotspots", key), lambda: density_payload(_density.density(mask), _density.bounds)
+        ))
+        hot = True
+        await session.send_custom_message("squirrel_map", {"hotspots": payload})
+
+    @reactive.effect
+    @reactive.event(input.basemap, ignore_init=True)
+    async def _push_basemap():
+        await session.send_custom_message("squirrel_map", {"tiles": tile_spec(input.basemap())})
+
+    # Legend clicks set input.fur directly; reflect them in the checkbox group.
     @reactive.effect
     def _sync_fur_checkbox():
-        ui.update_checkbox_group("fur", selected=list(input.fur()))
+        ui.update_checkbox_group("fur", selected=list(filters().fur))
+
+    @reactive.calc
+    def filtered_counts() -> dict[str, pd.DataFrame]:
+        return chart_counts(
+            _index, filtered_mask(), ["primary_fur_color", "shift"], flags=BEHAVIOR_COLS
+        )
+
+    # Chart specs are built on the render pool as an extended task. A filter
+    # change cancels the build for the previous state: one still queued never
+    # runs, one already running finishes and its result is discarded.
+    @reactive.extended_task
+    async def sidebar_charts(key: tuple, counts: dict[str, pd.DataFrame]) -> dict[str, str | ui.Tag]:
+        return await _render_pool.run(lambda: sidebar_chart_specs(key, counts))
+
+    @reactive.effect
+    def _build_sidebar_charts():
+        key, counts = sidebar_key(), filtered_counts()
+        sidebar_charts.cancel()
+        sidebar_charts(key, counts)
 
     @output
     @render.ui
     def fur_color_hist():
-        df = filtered_df()
-        if df.empty or "primary_fur_color" not in df.columns:
-            return ui.em("No data.")
-
-        chart = (
-            alt.Chart(df)
-            .mark_bar()
-            .encode(
-                x=alt.X("count():Q", title="Sightings"),
-                y=alt.Y("primary_fur_color:N", title="Fur color", sort=FUR_ORDER),
-                color=alt.Color(
-                    "primary_fur_color:N",
-                    scale=alt.Scale(domain=FUR_ORDER, range=FUR_COLOURS),
-                    legend=None,
-                ),
-            )
-            .properties(height=60, width="container")
-        )
-        return chart_html(chart, element_id="fur_color_hist_chart")
+        return chart_output(task_result(sidebar_charts)["fur_color_hist_chart"], "fur_color_hist_chart")
 
     @output
     @render.ui
     def shift_hist():
-        df = filtered_df()
-        if df.empty or "shift" not in df.columns:
-            return ui.em("No data.")
-
-        chart = (
-            alt.Chart(df)
-            .mark_bar()
-            .encode(
-                x=alt.X("count():Q", title="Sightings"),
-                y=alt.Y("shift:N", title="Shift", sort=SHIFT_ORDER),
-                color=alt.Color(
-                    "shift:N",
-                    scale=alt.Scale(domain=SHIFT_ORDER, range=SHIFT_COLOURS),
-                    legend=None,
-                ),
-            )
-            .properties(height=60, width="container")
-        )
-        return chart_html(chart, element_id="shift_hist_chart")
+        return chart_output(task_result(sidebar_charts)["shift_hist_chart"], "shift_hist_chart")
 
     @output
     @render.ui
     def behavior_hist():
-        df = filtered_df()
-        if df.empty:
-            return ui.em("No data.")
-
-        cols = [c for c in BEHAVIOR_COLS if c in df.columns]
-        if not cols:
-            return ui.em("No behavior data.")
-
-        counts = (
-            df[cols]
-            .apply(lambda s: s.eq(True).sum())
-            .reset_index()
-        )
-        counts.columns = ["behavior", "count"]
-        counts = counts.nlargest(5, "count")
-        counts["behavior"] = counts["behavior"].str.replace("_", " ").str.title()
+        return chart_output(task_result(sidebar_charts)["behavior_hist_chart"], "behavior_hist_chart")
 
-        chart = (
-            alt.Chart(counts)
-            .mark_bar()
-            .encode(
-                x=alt.X("count:Q", title="Sightings"),
-                y=alt.Y("behavior:N", title="Behavior", sort="-x"),
-                color=alt.value(BEHAVIOUR_COLOUR),
-            )
-            .properties(height=60, width="container")
+    # The tables page, sort and filter in DuckDB: the sidebar table queries
+    # the squirrels view with the sidebar's filter as a WHERE clause.
+    @reactive.calc
+    def table_source() -> TableSource:
+        state = filters()
+        where, params = filter_where(
+            {
+                "shift": state.shift,
+                "primary_fur_color": state.fur,
+                "age": state.age,
+            },
+            any_flags=state.behavior,
         )
-
-        return chart_html(chart, element_id="behavior_hist_chart")
-
-    @output
-    @render.data_frame
-    def table_view():
-        df = filtered_df().copy()
-        if df.empty:
-            return render.DataGrid(pd.DataFrame({"message": ["No rows for current filters"]}))
-
-        cols = [
-            "unique_squirrel_id",
-            "date",
-            "shift",
-            "age",
-            "primary_fur_color",
-            "hectare",
-            "longitude",
-            "latitude",
-        ]
-        available = [c for c in cols if c in df.columns]
-        table_df = df[available].rename(columns={"date_clean": "date"})
-        return render.DataGrid(table_df, filters=True, height="470px")
-
-    @render.download(filename="squirrel_report.csv")
-    def download_csv():
-        yield filtered_df().to_csv(index=False)
+        return "squirrels", where, params
+
+    paged_table_server("table_view", TABLE_VIEW_COLS, table_source, lambda: queries, key="unique_squirrel_id")
+
+    # Downloads stream from a cursor of their own, so a long export does not
+    # hold up the session's other queries. Parquet and Arrow add coordinates.
+    @render.download(filename=lambda: export_filename("squirrel_report", input.download_format()))
+    async def download_csv():
+        fmt = input.download_format()
+        _, where, params = table_source()
+        columns = ", ".join(quote_identifier(c) for c in TABLE_COLS)
+        if fmt != "csv":
+            columns += ", x AS longitude, y AS latitude"
+        sql = f"SELECT {columns} FROM squirrels {where}"
+        async for chunk in stream_export(_query_pool.cursor(), sql, params, fmt):
+            yield chunk
 
     # ── Tab 2 outputs: charts ─────────────────────────────────────────────────
     @output
     @render.text
-    def ai_rows() -> str:
-        df = qc_vals.df()
-        try:
-            return f"({len(df):,} squirrels)"
-        except Exception:
-            return "(— squirrels)"
+    async def ai_rows() -> str:
+        counts = await ai_counts()
+        return f"({int(counts['total']['count'].iloc[0]):,} squirrels)"
+
+    @reactive.extended_task
+    async def ai_charts(key: str, counts: dict[str, pd.DataFrame]) -> dict[str, str | ui.Tag]:
+        return await _render_pool.run(lambda: ai_chart_specs(key, counts))
+
+    @reactive.effect
+    async def _build_ai_charts():
+        # Only once the AI tab has been opened, as its outputs are hidden until then.
+        req(input.ai_chat_ready())
+        key, counts = ai_key(), await ai_counts()
+        ai_charts.cancel()
+        ai_charts(key, counts)
 
     @output
     @render.ui
-    def ai_fur_chart(): 
-        df = pd.DataFrame(qc_vals.df())  # uses querychat df
-        if df.empty or "primary_fur_color" not in df.columns:
-            return ui.em("No data.")
-        chart = (
-            alt.Chart(df)
-            .mark_bar(cornerRadiusTopRight=4, cornerRadiusBottomRight=4)
-            .encode(
-                x=alt.X("count():Q", title="Sightings"),
-                y=alt.Y("primary_fur_color:N", title=None, sort="-x"),
-                color=alt.Color(
-                    "primary_fur_color:N", 
-                    scale=alt.Scale(domain=FUR_ORDER, range=FUR_COLOURS), 
-                    legend=None),
-                tooltip=[alt.Tooltip("primary_fur_color:N", title="Fur Color"), alt.Tooltip("count():Q", title="Count")],
-            )
-            .properties(height=100, width="container")
-        )
-        return chart_html(chart, element_id="ai_fur_chart")
-    
+    def ai_fur_chart():
+        return chart_output(task_result(ai_charts)["ai_fur_chart"], "ai_fur_chart")
+
     @output
     @render.ui
     def ai_shift_chart():
-        df = pd.DataFrame(qc_vals.df())
-        if df.empty or "shift" not in df.columns:
-            return ui.em("No data.")
-        chart = (
-            alt.Chart(df)
-            .mark_bar(cornerRadiusTopRight=4, cornerRadiusBottomRight=4)
-            .encode(
-                x=alt.X("count():Q", title="Sightings"),
-                y=alt.Y("shift:N", title=None, sort=SHIFT_ORDER),
-                color=alt.Color("shift:N", scale=alt.Scale(domain=SHIFT_ORDER, range=SHIFT_COLOURS), legend=None),
-                tooltip=[alt.Tooltip("shift:N", title="Shift"), alt.Tooltip("count():Q", title="Count")],
-            )
-            .properties(height=100, width="container")
-        )
-        return chart_html(chart, element_id="ai_shift_chart")
-    
+        return chart_output(task_result(ai_charts)["ai_shift_chart"], "ai_shift_chart")
+
     @output
     @render.ui
     def ai_behavior_chart():
-        df = pd.DataFrame(qc_vals.df())
-        if df.empty:
-            return ui.em("No data.")
-        cols = [c for c in BEHAVIOR_COLS if c in df.columns]
-        if not cols:
-            return ui.em("No behavior data.")
-        counts = df[cols].apply(lambda s: s.eq(True).sum()).reset_index()
-        counts.columns = ["behavior", "count"]
-        counts = counts.nlargest(5, "count")
-        counts["behavior"] = counts["behavior"].str.replace("_", " ").str.title()
-        chart = (
-            alt.Chart(counts)
-            .mark_bar()
-            .encode(
-                x=alt.X("count:Q", title="Sightings"),
-                y=alt.Y("behavior:N", title="Behavior", sort="-x"),
-                color=alt.value(BEHAVIOUR_COLOUR),
-            )
-            .properties(height=100, width="container")
-        )
-        return chart_html(chart, element_id="ai_behavior_chart_elem")
+        return chart_output(task_result(ai_charts)["ai_behavior_chart_elem"], "ai_behavior_chart_elem")
+
     # ── Tab 2: filtered data table ────────────────────────────────────────────
-    @output
-    @render.data_frame
-    def ai_table_view():
-        df = pd.DataFrame(qc_vals.df())
-        if df.empty:
-            return render.DataGrid(pd.DataFrame({"message": ["No rows for current filters"]}))
-        # longitude/latitude already exist as plain columns in _chat_base_df
-        cols = ["unique_squirrel_id", "date_clean", "shift", "age", "primary_fur_color",
-                "hectare", "longitude", "latitude"] + BEHAVIOR_COLS
-        available = [c for c in cols if c in df.columns]
-        table_df = df[available].rename(columns={"date_clean": "date"})
-        return render.DataGrid(table_df, filters=True, height="340px")
-
-    @render.download(filename="squirrel_chat_filtered.csv")
-    def download_csv_ai():
-        yield pd.DataFrame(qc_vals.df()).to_csv(index=False)
+    @reactive.calc
+    def ai_table_source() -> TableSource:
+        return subquery(ai_query()), "", []
+
+    paged_table_server("ai_table_view", AI_TABLE_COLS, ai_table_source, chat_cursor, key="unique_squirrel_id")
+
+    @render.download(filename=lambda: export_filename("squirrel_chat_filtered", input.download_format_ai()))
+    async def download_csv_ai():
+        cursor = SessionCursor(_query_pool, get_chat_database().cursor())
+        async for chunk in stream_export(cursor, f"SELECT * FROM {subquery(ai_query())}", fmt=input.download_format_ai()):
+            yield chunk
 
 
 app = App(app_ui, server, static_assets={"/img": PROJECT_ROOT / "img"})
\ No newline at end of file
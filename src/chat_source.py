@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import inspect
+import json
+import re
+import uuid
+from collections.abc import AsyncGenerator, Iterable, Sequence
+
+import duckdb
+import pandas as pd
+from chatlas import AssistantTurn, Chat, ContentToolRequest, ContentToolResult, Turn, UserTurn
+from chatlas.types import ContentText, ToolInfo
+from querychat._datasource import (
+    ColumnMeta,
+    duckdb_column_meta,
+    duckdb_column_stats,
+    duckdb_lock_down,
+    format_schema,
+)
+from querychat._utils import check_query
+from querychat._tool_names import (
+    TOOL_QUERY,
+    TOOL_RESET_DASHBOARD,
+    TOOL_UPDATE_DASHBOARD,
+    TOOL_VISUALIZE,
+)
+from querychat.types import DataSource, MissingColumnsError
+
+from prompt_cache import CachedQuery, PromptCache, normalize_prompt
+from query_pool import quote_identifier
+
+# ── Chat database ─────────────────────────────────────────────────────────────
+
+
+class ChatDatabase:
+    """
+    A locked-down in-memory DuckDB database exposing one table to querychat,
+    backed by the caller's DataFrame rather than a copy of it.
+
+    The frame (e.g. SquirrelStore.frame(), with longitude / latitude
+    columns) is registered with DuckDB and scanned in place; a view named
+    `table_name` presents its categorical columns as VARCHAR, so generated
+    SQL can compare them with any string. The database is then locked down
+    as querychat's own data sources are, so that SQL cannot reach files,
+    extensions or settings.
+
+    `con` is the locked-down connection itself, e.g. for DuckDBSource.
+    Registered frames are visible only to the connection that registered
+    them, so `cursor()` registers the frame again on each new cursor.
+    """
+
+    def __init__(self, frame: pd.DataFrame, table_name: str):
+        self.table_name = table_name
+        # DuckDB converts pandas string arrays in full on every scan, but reads
+        # object arrays in place; to_numpy() hands over the same strings uncopied.
+        self._frame = pd.DataFrame(
+            {
+                col: pd.Series(values.to_numpy(), index=values.index, dtype=object, copy=False)
+                if isinstance(values.dtype, pd.StringDtype)
+                else values
+                for col, values in frame.items()
+            },
+            copy=False,
+        )
+        self._frame_name = f"_{table_name}_frame"
+        self.con = duckdb.connect(database=":memory:")
+        try:
+            self.con.register(self._frame_name, self._frame)
+            casts = ", ".join(
+                f"CAST({quote_identifier(col)} AS VARCHAR) AS {quote_identifier(col)}"
+                for col, dtype in frame.dtypes.items()
+                if isinstance(dtype, pd.CategoricalDtype)
+            )
+            replace = f" REPLACE ({casts})" if casts else ""
+            self.con.execute(
+                f"CREATE VIEW {quote_identifier(table_name)} AS SELECT *{replace} FROM {self._frame_name}"
+            )
+            duckdb_lock_down(self.con)
+        except Exception:
+            self.con.close()
+            raise
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        cur = self.con.cursor()
+        cur.register(self._frame_name, self._frame)
+        return cur
+
+    def close(self) -> None:
+        self.con.close()
+
+
+def chat_database(frame: pd.DataFrame, table_name: str) -> ChatDatabase:
+    """A locked-down DuckDB database over frame for querychat; see ChatDatabase."""
+    return ChatDatabase(frame, table_name)
+
+
+class DuckDBSource(DataSource[pd.DataFrame]):
+    """
+    querychat data source over a table in an existing DuckDB connection.
+
+    Mirrors querychat's DataFrameSource, but queries the table where it
+    already lives instead of registering a pandas copy of it, so generated
+    SQL runs entirely inside DuckDB. Only the rows a query returns are
+    converted to pandas. The connection belongs to the caller.
+    """
+
+    def __init__(self, con: duckdb.DuckDBPyConnection, table_name: str):
+        self._conn = con
+        self.table_name = table_name
+        self._colnames = [meta.name for meta in self.get_column_metas()]
+
+    def get_db_type(self) -> str:
+        return "DuckDB"
+
+    def get_schema(self, *, categorical_threshold: int) -> str:
+        metas = self.get_column_metas()
+        self.populate_column_stats(metas, categorical_threshold)
+        return format_schema(self.table_name, metas)
+
+    def get_column_metas(self) -> list[ColumnMeta]:
+        result = self._conn.execute(f'SELECT * FROM "{self.table_name}" LIMIT 0')
+        return [duckdb_column_meta(desc[0], desc[1]) for desc in result.description]
+
+    def populate_column_stats(self, columns: list[ColumnMeta], categorical_threshold: int) -> None:
+        duckdb_column_stats(self._conn, self.table_name, columns, categorical_threshold)
+
+    def execute_query(self, query: str) -> pd.DataFrame:
+        check_query(query)
+        return self._conn.execute(query).df()
+
+    def test_query(self, query: str, *, require_all_columns: bool = False) -> pd.DataFrame:
+        check_query(query)
+        result = self._conn.execute(f"{query} LIMIT 1").df()
+        if require_all_columns:
+            missing = set(self._colnames) - set(result.columns)
+            if missing:
+                raise MissingColumnsError(
+                    f"Query result missing required columns: {', '.join(sorted(missing))}. "
+                    f"The query must return all original table columns: {', '.join(self._colnames)}"
+                )
+        return result
+
+    def get_data(self) -> pd.DataFrame:
+        return self._conn.execute(f'SELECT * FROM "{self.table_name}"').df()
+
+    def schema_version(self) -> str:
+        """Hash of the table's column names, types and row count: the prompt cache's dataset key."""
+        columns = self._conn.execute(f'DESCRIBE "{self.table_name}"').fetchall()
+        (n_rows,) = self._conn.execute(f'SELECT count(*) FROM "{self.table_name}"').fetchone()
+        text = repr((self.table_name, [(c[0], c[1]) for c in columns], n_rows))
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def cleanup(self) -> None:
+        # The connection is owned by the caller.
+        pass
+
+
+# ── Chat clients ──────────────────────────────────────────────────────────────
+
+_DASHBOARD_TOOLS = {TOOL_UPDATE_DASHBOARD, TOOL_RESET_DASHBOARD}
+_ANSWER_TOOLS = {TOOL_QUERY, TOOL_VISUALIZE}
+
+
+def dashboard_action(turns: Sequence[Turn]) -> CachedQuery | None:
+    """
+    The dashboard filter a run of chat turns settled on, if that is all it did.
+
+    Returns the last successful update (or reset, as an empty query) made
+    with querychat's dashboard tools. Turns that also ran the query or
+    visualize tools return None: their answer lives in the model's text,
+    which a replayed filter would not reproduce.
+    """
+    action = None
+    for turn in turns:
+        for content in turn.contents:
+            if isinstance(content, ContentToolRequest) and content.name in _ANSWER_TOOLS:
+                return None
+            if not isinstance(content, ContentToolResult) or content.error is not None:
+                continue
+            request = content.request
+            if request is None or request.name not in _DASHBOARD_TOOLS or not isinstance(request.arguments, dict):
+                continue
+            if request.name == TOOL_RESET_DASHBOARD:
+                action = CachedQuery("", "")
+            else:
+                action = CachedQuery(request.arguments["query"], request.arguments.get("title", ""))
+    return action
+
+
+class CachedChat(Chat):
+    """
+    chatlas client that answers repeated filter prompts from a PromptCache.
+
+    A prompt whose normalised text is cached under this dataset's schema
+    version is applied by calling querychat's own dashboard tool with the
+    stored SQL, so the filter is validated and the chat shows the usual
+    filter card, without a model round trip. Any other prompt goes to the
+    model (`translate`), and the filter it settles on is stored. The cache
+    is shared by the per-session copies querychat makes of this client.
+
+    A follow-up such as "now only the PM ones" means something only after
+    the turns before it, so entries are looked up and stored under
+    `cache_scope()`: the schema version alone for a chat's first prompt,
+    with a hash of the conversation so far for any later one.
+    """
+
+    def __init__(self, provider, cache: PromptCache, schema_version: str, table_name: str, **kwargs):
+        super().__init__(provider, **kwargs)
+        self.prompt_cache = cache
+        self.schema_version = schema_version
+        self.table_name = table_name
+
+    @classmethod
+    def wrap(cls, chat: Chat, cache: PromptCache, schema_version: str, table_name: str) -> CachedChat:
+        """A caching client talking to the same provider as `chat`."""
+        return cls(
+            chat.provider, cache, schema_version, table_name,
+            system_prompt=chat.system_prompt, kwargs_chat=chat.kwargs_chat,
+        )
+
+    def __deepcopy__(self, memo):
+        memo[id(self.prompt_cache)] = self.prompt_cache
+        return super().__deepcopy__(memo)
+
+    def cache_scope(self) -> str:
+        """
+        The prompt cache scope for the next prompt. Within a conversation the
+        user's prompts, the model's text and the dashboard tools it called
+        (hence the filter now applied) are hashed; tool call ids and results
+        are not, so replaying the same cached turns gives the same scope.
+        """
+        turns = self.get_turns()
+        if not turns:
+            return self.schema_version
+        digest = hashlib.sha1()
+        for turn in turns:
+            for content in turn.contents:
+                if isinstance(content, ContentToolRequest):
+                    part = f"{content.name} {json.dumps(content.arguments, sort_keys=True, default=str)}"
+                elif isinstance(content, ContentText):
+                    part = normalize_prompt(content.text) if turn.role == "user" else content.text
+                else:
+                    continue
+                digest.update(f"{turn.role}\x1f{part}\x1e".encode("utf-8"))
+        return f"{self.schema_version}:{digest.hexdigest()}"
+
+    async def stream_async(self, *args, content="text", **kwargs) -> AsyncGenerator:
+        prompt = args[0] if len(args) == 1 and isinstance(args[0], str) else None
+        if prompt is None or not self._tools.keys() >= _DASHBOARD_TOOLS:
+            return await super().stream_async(*args, content=content, **kwargs)
+
+        scope = self.cache_scope()
+        cached = self.prompt_cache.get(scope, prompt)
+        if cached is not None:
+            replay = await self._apply(prompt, cached, content)
+            if replay is not None:
+                return replay
+            self.prompt_cache.discard(scope, prompt)
+        return await self.translate(prompt, content=content, **kwargs)
+
+    async def translate(self, prompt: str, *, content="text", **kwargs) -> AsyncGenerator:
+        """Ask the model, then cache the filter it applied under the scope the prompt was asked in."""
+        scope = self.cache_scope()
+        start = len(self.get_turns())
+        stream = await super().stream_async(prompt, content=content, **kwargs)
+
+        async def recorded() -> AsyncGenerator:
+            async for chunk in stream:
+                yield chunk
+            action = dashboard_action(self.get_turns()[start:])
+            if action is not None:
+                self.prompt_cache.put(scope, prompt, action.query, action.title)
+
+        return recorded()
+
+    async def _apply(self, prompt: str, action: CachedQuery, content="text") -> AsyncGenerator | None:
+        """
+        Run the dashboard tool for action and record the exchange in the chat
+        history as the model would have. None if the tool rejects the query.
+        """
+        if action.query:
+            name, arguments = TOOL_UPDATE_DASHBOARD, {"table": self.table_name, "query": action.query, "title": action.title}
+            reply = f"Filtered to **{action.title}**." if action.title else "Filter applied."
+        else:
+            name, arguments = TOOL_RESET_DASHBOARD, {"table": self.table_name}
+            reply = "Showing all squirrels again."
+        tool = self._tools[name]
+        request = ContentToolRequest(
+            id=f"cached_{uuid.uuid4().hex[:12]}", name=name, arguments=arguments, tool=ToolInfo.from_tool(tool)
+        )
+        result = tool.func(**arguments)
+        if inspect.isawaitable(result):
+            result = await result
+        if not isinstance(result, ContentToolResult):
+            result = ContentToolResult(value=result)
+        result.request = request
+        if result.error is not None:
+            return None
+
+        self.add_turn(UserTurn(prompt))
+        self.add_turn(AssistantTurn([request]))
+        self.add_turn(UserTurn([result]))
+        self.add_turn(AssistantTurn(reply))
+
+        async def replay() -> AsyncGenerator:
+            if content == "all":
+                yield request
+                yield result
+            else:
+                yield "\n\n"
+            yield reply
+
+        return replay()
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Whole prompts, as normalize_prompt leaves them, that clear the filter.
+_RESET_PHRASES = {
+    "all", "reset", "everything", "clear", "show all", "show everything", "all squirrels",
+    "show all squirrels", "reset the filter", "clear the filter", "reset filters", "clear filters",
+}
+_RESET_WORDS = {"all", "reset", "everything", "clear"}
+
+
+class StubChat(CachedChat):
+    """
+    Offline stand-in for the LLM client, for tests, benchmarks and local
+    development (SQUIRREL_CHAT_CLIENT=stub).
+
+    Prompts are translated by keyword instead of by a model: each word that
+    names a value of one of `categories` (or one of its `synonyms`) keeps
+    rows with that value, values of the same column are OR-ed, and a word
+    starting like one of the boolean `flags` keeps rows where it is True.
+    A prompt that is only a reset phrase ("show all", "reset the filter"),
+    or that names no value or flag but says "all" / "reset" / "everything" /
+    "clear", clears the filter; "all black squirrels" still filters. Results
+    go through the same tool calls and prompt cache as the real client;
+    `latency` seconds of sleep stand in for the model round trip on a cache
+    miss.
+    """
+
+    def __init__(
+        self,
+        cache: PromptCache,
+        schema_version: str,
+        table_name: str,
+        categories: dict[str, Iterable[str]],
+        flags: Iterable[str] = (),
+        synonyms: dict[str, str] | None = None,
+        latency: float = 0.0,
+        **kwargs,
+    ):
+        super().__init__(None, cache, schema_version, table_name, **kwargs)
+        self.latency = latency
+        self._values: dict[str, tuple[str, str]] = {}
+        for col, values in categories.items():
+            for value in values:
+                self._values[str(value).casefold()] = (col, str(value))
+        for word, value in (synonyms or {}).items():
+            for col, values in categories.items():
+                if value in values:
+                    self._values[word] = (col, value)
+        self._flags = list(flags)
+
+    def sql_for(self, prompt: str) -> CachedQuery | None:
+        """The filter the stub reads from prompt, or None if it finds no keyword."""
+        if normalize_prompt(prompt) in _RESET_PHRASES:
+            return CachedQuery("", "")
+        words = _WORD.findall(prompt.casefold())
+        selected: dict[str, list[str]] = {}
+        flags: list[str] = []
+        for word in words:
+            if word in self._values:
+                col, value = self._values[word]
+                if value not in selected.setdefault(col, []):
+                    selected[col].append(value)
+            for flag in self._flags:
+                if len(word) >= 4 and word[:4] == flag[:4] and flag not in flags:
+                    flags.append(flag)
+        if not selected and not flags:
+            return CachedQuery("", "") if _RESET_WORDS.intersection(words) else None
+        where = [
+            f"{quote_identifier(col)} IN ({', '.join(_literal(v) for v in values)})" for col, values in selected.items()
+        ]
+        where += [quote_identifier(flag) for flag in flags]
+        query = f'SELECT * FROM "{self.table_name}" WHERE ' + " AND ".join(where)
+        title = " ".join([v for values in selected.values() for v in values] + flags) + " squirrels"
+        return CachedQuery(query, title[0].upper() + title[1:])
+
+    async def translate(self, prompt: str, *, content="text", **kwargs) -> AsyncGenerator:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        scope = self.cache_scope()
+        action = self.sql_for(prompt)
+        replay = await self._apply(prompt, action, content) if action is not None else None
+        if replay is not None:
+            self.prompt_cache.put(scope, prompt, action.query, action.title)
+            return replay
+
+        reply = "The offline client only understands filters such as *gray adult squirrels that were foraging*."
+        self.add_turn(UserTurn(prompt))
+        self.add_turn(AssistantTurn(reply))
+
+        async def answer() -> AsyncGenerator:
+            yield reply
+
+        return answer()
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
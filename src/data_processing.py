@@ -1,12 +1,22 @@
 from __future__ import annotations
  
+import hashlib
+import json
 import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING
  
 import duckdb
-import geopandas as gpd
+import numpy as np
 import pandas as pd
-from pyproj import datadir as pyproj_datadir
+
+# geopandas / pyproj are only needed to build or fall back to the GeoJSON, so
+# they are imported on first use rather than by every app worker.
+if TYPE_CHECKING:
+    import geopandas as gpd
 
 # ── Paths ─────────────────────────────────────────────────────────────────────
 
@@ -16,6 +26,19 @@ RAW_GEOJSON = "data/raw/2018_Central_Park_Squirrel_Census_-_Squirrel_Data_202602
 OUT_CSV = "data/processed/squirrels.csv"
 OUT_PAR = "data/processed/squirrels.parquet"
 OUT_GEOJSON = "data/processed/squirrels_clean.geojson"
+OUT_POINTS = "data/processed/squirrels_points.npy"
+OUT_CATALOG = "data/processed/catalog.json"
+OUT_PARTITIONED = "data/processed/squirrels_partitioned"
+MANIFEST = "data/processed/manifest.json"
+
+# Binary point sidecar: one fixed-width record per processed row, in the same
+# order as the Parquet file, so the app can memory-map coordinates instead of
+# parsing GeoJSON.
+POINT_DTYPE = np.dtype([
+    ("unique_squirrel_id", "S16"),
+    ("longitude", "<f4"),
+    ("latitude", "<f4"),
+])
 
 BEHAVIOR_COLS = [
     "running",
@@ -24,6 +47,35 @@ BEHAVIOR_COLS = [
     "eating",
     "foraging",
 ]
+
+# Every true/false column in the raw census schema: activities, sounds,
+# tail signals and reactions to people.
+BOOL_COLS = [
+    *BEHAVIOR_COLS,
+    "kuks",
+    "quaas",
+    "moans",
+    "tail_flags",
+    "tail_twitches",
+    "approaches",
+    "indifferent",
+    "runs_from",
+]
+
+# Categorical columns whose nulls and '?' placeholders become 'Unknown'.
+UNKNOWN_COLS = ["shift", "primary_fur_color", "age"]
+
+# Columns whose distinct values and counts are listed in the catalog.
+CATALOG_COLS = [*UNKNOWN_COLS, "hectare"]
+
+# Optional Hive-partitioned layout: one directory per survey date and shift,
+# rows sorted by hectare inside each file so row-group min/max statistics
+# cover narrow hectare ranges. Partition values are read back with these types.
+PARTITION_COLS = {"date": "TIMESTAMP_NS", "shift": "VARCHAR"}
+PARTITION_SORT = ["hectare", "unique_squirrel_id"]
+PARTITION_ROW_GROUP_SIZE = 32_768
+
+TRUE_TOKENS = {"true", "t", "1", "yes"}
  
 REQUIRED_COLS = [
     "shift",
@@ -42,17 +94,47 @@ def _set_proj_data_dir() -> None:
     if conda_prefix:
         proj_dir = Path(conda_prefix) / "share" / "proj"
         if proj_dir.exists():
+            from pyproj import datadir as pyproj_datadir
+
             pyproj_datadir.set_data_dir(str(proj_dir))
  
 def to_bool(series: pd.Series) -> pd.Series:
-    """Coerce a messy boolean-ish column to a clean bool Series."""
+    """
+    Coerce a messy boolean-ish column to a clean bool Series.
+
+    Each distinct raw value is normalised once (str / strip / lower, matched
+    against TRUE_TOKENS) and the result is broadcast back through the
+    factorized codes; missing values are False.
+    """
     if series.dtype == bool:
         return series.fillna(False)
-    normalized = series.astype(str).str.strip().str.lower()
-    return normalized.isin({"true", "t", "1", "yes"}).fillna(False)
+    codes, uniques = pd.factorize(series)
+    # Trailing False is what the -1 code for missing values indexes.
+    lookup = np.array(
+        [str(value).strip().lower() in TRUE_TOKENS for value in uniques] + [False]
+    )
+    return pd.Series(lookup[codes], index=series.index, name=series.name)
+
+def fill_unknown(series: pd.Series) -> pd.Series:
+    """
+    Replace nulls and '?' with 'Unknown', mapping each distinct value once.
+    Same result as `series.fillna("Unknown").replace("?", "Unknown")`.
+    """
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return series.fillna("Unknown").replace("?", "Unknown")
+    codes, uniques = pd.factorize(series)
+    # Trailing 'Unknown' is what the -1 code for missing values takes.
+    values = ["Unknown" if value == "?" else value for value in uniques] + ["Unknown"]
+    if pd.api.types.is_object_dtype(series):
+        labels = np.array(values, dtype=object)
+    else:
+        labels = pd.array(values, dtype=series.dtype)
+    return pd.Series(labels.take(codes), index=series.index, name=series.name, dtype=series.dtype)
  
 def _read_geojson(path: str) -> gpd.GeoDataFrame:
     """Read a GeoJSON file, falling back to fiona if the default engine fails."""
+    import geopandas as gpd
+
     try:
         return gpd.read_file(path)
     except Exception:
@@ -79,14 +161,16 @@ def process_geojson(
     for col in REQUIRED_COLS:
         if col not in gdf.columns:
             gdf[col] = "Unknown"
-    # Ensure behaviour columns exist and are clean booleans
+    # Ensure behaviour columns exist, and every true/false column is a clean boolean
     for col in BEHAVIOR_COLS:
         if col not in gdf.columns:
             gdf[col] = False
-        gdf[col] = to_bool(gdf[col])
+    for col in BOOL_COLS:
+        if col in gdf.columns:
+            gdf[col] = to_bool(gdf[col])
     # Fill nulls and replace '?' in categorical columns
-    for col in ("shift", "primary_fur_color", "age"):
-        gdf[col] = gdf[col].fillna("Unknown").replace("?", "Unknown")
+    for col in UNKNOWN_COLS:
+        gdf[col] = fill_unknown(gdf[col])
     # Parse date — store as ISO string so GeoJSON serialises cleanly
     gdf["date_clean"] = (
         pd.to_datetime(gdf["date"].astype(str), format="%m%d%Y", errors="coerce")
@@ -120,27 +204,74 @@ def to_flat_df(gdf: gpd.GeoDataFrame) -> pd.DataFrame:
     return df
  
  
+# ── Point sidecar ─────────────────────────────────────────────────────────────
+
+def point_records(ids, lon, lat) -> np.ndarray:
+    """Pack row keys and coordinates into a POINT_DTYPE record array."""
+    records = np.empty(len(ids), dtype=POINT_DTYPE)
+    records["unique_squirrel_id"] = np.asarray(ids, dtype=str)
+    records["longitude"] = np.asarray(lon, dtype=np.float32)
+    records["latitude"] = np.asarray(lat, dtype=np.float32)
+    return records
+
+def write_points(records: np.ndarray, dst: str = OUT_POINTS) -> None:
+    """Write a point record array as a memory-mappable .npy file."""
+    Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    np.save(dst, records, allow_pickle=False)
+
+def load_points(path: str = OUT_POINTS, fallback: str | None = OUT_GEOJSON) -> np.ndarray:
+    """
+    Memory-map the point sidecar written by process_csv(). The records are
+    read-only views of the file; pages are loaded lazily and shared between
+    worker processes through the OS page cache.
+
+    If the sidecar is missing or unreadable and a fallback GeoJSON is given,
+    the points are rebuilt from its geometry instead.
+    """
+    try:
+        records = np.load(path, mmap_mode="r", allow_pickle=False)
+        if records.dtype == POINT_DTYPE:
+            return records
+    except (FileNotFoundError, ValueError):
+        pass
+    if fallback is None:
+        raise FileNotFoundError(f"No point sidecar at {path}")
+    return points_from_geojson(fallback)
+
+def points_from_geojson(path: str = OUT_GEOJSON) -> np.ndarray:
+    """Point records from a processed GeoJSON (the slow path)."""
+    gdf = load_geojson(path)
+    return point_records(gdf["unique_squirrel_id"], gdf.geometry.x, gdf.geometry.y)
+
+
 # ── CSV clean and save ──────────────────────────────────────────────────────────────
  
 def process_csv(
     src: str = RAW_CSV,
     dst_csv: str = OUT_CSV,
     dst_par: str = OUT_PAR,
+    dst_points: str = OUT_POINTS,
+    dst_catalog: str | None = None,
 ) -> pd.DataFrame:
-    """Clean the raw CSV and write processed outputs (CSV + Parquet)."""
+    """
+    Clean the raw CSV and write processed outputs (CSV + Parquet + point
+    sidecar + catalog). dst_catalog may only be left out when every other
+    output goes to its default path; see catalog_path().
+    """
+    dst_catalog = catalog_path(dst_csv, dst_par, dst_points, dst_catalog)
     squirrels = pd.read_csv(src)
     # Normalise column names
     squirrels.columns = squirrels.columns.str.lower().str.replace(" ", "_")
-    # Parse date
-    squirrels["date"] = pd.to_datetime(squirrels["date"], format="%m%d%Y")
-    # Coerce behaviour columns
-    for col in BEHAVIOR_COLS:
+    # Parse date (nanosecond precision whatever the pandas default)
+    squirrels["date"] = pd.to_datetime(squirrels["date"], format="%m%d%Y").astype("datetime64[ns]")
+    # Coerce every true/false column
+    for col in BOOL_COLS:
         if col in squirrels.columns:
             squirrels[col] = to_bool(squirrels[col])
     # Fill nulls and replace '?' in key categorical columns
-    for col in ("shift", "primary_fur_color", "age"):
+    for col in UNKNOWN_COLS:
         if col in squirrels.columns:
-            squirrels[col] = squirrels[col].fillna("Unknown").replace("?", "Unknown")
+            squirrels[col] = fill_unknown(squirrels[col])
     
     Path(dst_csv).parent.mkdir(parents=True, exist_ok=True)
     # save to csv
@@ -150,16 +281,376 @@ def process_csv(
         COPY (SELECT * FROM squirrels)
         TO '{dst_par}' (FORMAT PARQUET)
     """)
+    # save lon / lat point sidecar
+    write_points(
+        point_records(squirrels["unique_squirrel_id"], squirrels["x"], squirrels["y"]),
+        dst_points,
+    )
+    # save catalog
+    write_catalog(dst_par, dst_catalog)
  
     return squirrels
+
+
+# ── Streaming CSV pipeline ────────────────────────────────────────────────────
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _sql_str(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _clean_select(raw_cols: list[str], source: str) -> str:
+    """
+    DuckDB SELECT applying the same cleaning as process_csv(): snake_case
+    names, %m%d%Y dates, to_bool() on true/false columns and 'Unknown' for
+    null / '?' categories.
+    """
+    exprs = []
+    for raw in raw_cols:
+        col, name = _quote(raw), raw.lower().replace(" ", "_")
+        if name == "date":
+            expr = f"CAST(strptime({col}, '%m%d%Y') AS TIMESTAMP_NS)"
+        elif name in BOOL_COLS:
+            expr = f"coalesce(lower(trim(CAST({col} AS VARCHAR))) IN ('true', 't', '1', 'yes'), false)"
+        elif name in UNKNOWN_COLS:
+            expr = f"CASE WHEN {col} IS NULL OR {col} = '?' THEN 'Unknown' ELSE {col} END"
+        else:
+            expr = col
+        exprs.append(f"{expr} AS {_quote(name)}")
+    return f"SELECT {', '.join(exprs)} FROM {source}"
+
+def _csv_select(columns: list[tuple[str, str]], source: str) -> str:
+    """SELECT formatting dates and booleans the way pandas' to_csv writes them."""
+    exprs = []
+    for name, dtype in columns:
+        col = _quote(name)
+        if dtype.startswith("TIMESTAMP"):
+            col = f"strftime({col}, '%Y-%m-%d') AS {col}"
+        elif dtype == "BOOLEAN":
+            col = f"CASE WHEN {col} THEN 'True' WHEN NOT {col} THEN 'False' END AS {col}"
+        exprs.append(col)
+    return f"SELECT {', '.join(exprs)} FROM {source}"
+
+def process_csv_streaming(
+    src: str = RAW_CSV,
+    dst_csv: str = OUT_CSV,
+    dst_par: str = OUT_PAR,
+    dst_points: str = OUT_POINTS,
+    dst_catalog: str | None = None,
+    row_group_size: int = 122_880,
+    memory_limit: str | None = None,
+) -> int:
+    """
+    Same outputs as process_csv(), produced without loading the file into
+    pandas, for census dumps larger than memory.
+
+    The raw CSV is cleaned inside DuckDB and streamed to Parquet in row groups
+    of `row_group_size` rows; the processed CSV and the point sidecar are then
+    streamed from that Parquet file. Memory use depends on the row group size,
+    not the input size. Returns the number of rows written.
+    """
+    dst_catalog = catalog_path(dst_csv, dst_par, dst_points, dst_catalog)
+    Path(dst_par).parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect()
+    try:
+        if memory_limit:
+            con.execute(f"SET memory_limit = {_sql_str(memory_limit)}")
+        # Sniff types from a sample first; sniffing the whole file holds it in
+        # memory, so only fall back to that if a later row does not fit.
+        for sample_size in (20_480, -1):
+            source = (
+                f"read_csv({_sql_str(src)}, header = true, sample_size = {sample_size}, "
+                "types = {'Date': 'VARCHAR'})"
+            )
+            raw_cols = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+            try:
+                con.execute(f"""
+                    COPY ({_clean_select(raw_cols, source)})
+                    TO {_sql_str(dst_par)} (FORMAT PARQUET, ROW_GROUP_SIZE {int(row_group_size)})
+                """)
+                break
+            except (duckdb.ConversionException, duckdb.InvalidInputException):
+                if sample_size == -1:
+                    raise
+
+        processed = f"read_parquet({_sql_str(dst_par)})"
+        columns = [(row[0], row[1]) for row in con.execute(f"DESCRIBE SELECT * FROM {processed}").fetchall()]
+        con.execute(f"COPY ({_csv_select(columns, processed)}) TO {_sql_str(dst_csv)} (HEADER, DELIMITER ',')")
+
+        n_rows = con.execute(f"SELECT count(*) FROM {processed}").fetchone()[0]
+        records = np.lib.format.open_memmap(dst_points, mode="w+", dtype=POINT_DTYPE, shape=(n_rows,))
+        cursor = con.execute(f"SELECT unique_squirrel_id, x, y FROM {processed}")
+        start = 0
+        while len(chunk := cursor.fetch_df_chunk(64)):
+            stop = start + len(chunk)
+            records[start:stop] = point_records(chunk["unique_squirrel_id"], chunk["x"], chunk["y"])
+            start = stop
+        records.flush()
+        del records
+    finally:
+        con.close()
+    write_catalog(dst_par, dst_catalog)
+    return n_rows
+ 
+ 
+# ── Partitioned layout ────────────────────────────────────────────────────────
+
+def parquet_source(path: str | Path) -> str:
+    """
+    DuckDB read_parquet(...) call for either processed layout: a single
+    Parquet file, or a Hive-partitioned directory written by
+    write_partitioned(), whose partition columns come back with their
+    original types (they are appended after the file columns).
+    """
+    path = Path(path)
+    if not path.is_dir():
+        return f"read_parquet({_sql_str(path.as_posix())})"
+    types = ", ".join(f"{_sql_str(col)}: {_sql_str(dtype)}" for col, dtype in PARTITION_COLS.items())
+    return (
+        f"read_parquet({_sql_str(f'{path.as_posix()}/**/*.parquet')}, "
+        f"hive_partitioning = true, hive_types = {{{types}}})"
+    )
+
+def write_partitioned(
+    src_par: str = OUT_PAR,
+    dst: str = OUT_PARTITIONED,
+    row_group_size: int = PARTITION_ROW_GROUP_SIZE,
+) -> int:
+    """
+    Rewrite a processed Parquet file as a Hive-partitioned directory
+    (dst/date=YYYY-MM-DD/shift=AM/*.parquet), sorted by PARTITION_SORT within
+    each partition and split into row groups of `row_group_size` rows.
+
+    DuckDB then skips whole files for date / shift filters and, using the
+    row-group statistics, most of each file for hectare filters. The
+    directory is written next to dst and swapped in once complete. Returns
+    the number of rows written.
+    """
+    tmp = Path(f"{dst}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    sorted_par = tmp / "_sorted.parquet"
+    keys = [_quote(col) for col in PARTITION_COLS]
+    order = ", ".join(_quote(col) for col in [*PARTITION_COLS, *PARTITION_SORT])
+    options = f"FORMAT PARQUET, ROW_GROUP_SIZE {int(row_group_size)}"
+    con = duckdb.connect()
+    try:
+        # DuckDB's PARTITION_BY writer does not keep an ORDER BY, so sort once
+        # into a single file and copy each partition's (contiguous) rows out
+        # of it. Dates are whole days: partition on the DATE for readable paths.
+        con.execute(f"""
+            COPY (
+                SELECT * REPLACE (CAST(date AS DATE) AS date)
+                FROM read_parquet({_sql_str(src_par)})
+                ORDER BY {order}
+            ) TO {_sql_str(sorted_par.as_posix())} ({options})
+        """)
+        source = f"read_parquet({_sql_str(sorted_par.as_posix())})"
+        partitions = con.execute(f"SELECT DISTINCT {', '.join(keys)} FROM {source} ORDER BY ALL").fetchall()
+        for values in partitions:
+            part = tmp.joinpath(*(f"{col}={'NULL' if value is None else value}" for col, value in zip(PARTITION_COLS, values)))
+            part.mkdir(parents=True)
+            where = " AND ".join(f"{key} IS NOT DISTINCT FROM ?" for key in keys)
+            con.execute(
+                f"COPY (SELECT * EXCLUDE ({', '.join(keys)}) FROM {source} WHERE {where}) "
+                f"TO {_sql_str((part / 'data_0.parquet').as_posix())} ({options})",
+                list(values),
+            )
+        sorted_par.unlink()
+        (n_rows,) = con.execute(f"SELECT count(*) FROM {parquet_source(tmp)}").fetchone()
+    finally:
+        con.close()
+    shutil.rmtree(dst, ignore_errors=True)
+    os.replace(tmp, dst)
+    return n_rows
+
+
+# ── Catalog ───────────────────────────────────────────────────────────────────
+
+def build_catalog(con: duckdb.DuckDBPyConnection, source: str) -> dict:
+    """
+    Summary of a processed table for building the app UI: row count, schema,
+    [value, count] pairs per CATALOG_COLS column (ordered by value, as the
+    sidebar lists them), the date range and the lon / lat bounding box.
+    `source` is a table, view or table function such as read_parquet(...).
+    """
+    schema = {row[0]: row[1] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+    n_rows, first, last, x0, y0, x1, y1 = con.execute(
+        f"SELECT count(*), min(date), max(date), min(x), min(y), max(x), max(y) FROM {source}"
+    ).fetchone()
+    categories = {}
+    for col in CATALOG_COLS:
+        if col in schema:
+            rows = con.execute(
+                f"SELECT {_quote(col)}, count(*) FROM {source} GROUP BY 1 ORDER BY 1"
+            ).fetchall()
+            categories[col] = [list(row) for row in rows]
+    return {
+        "row_count": n_rows,
+        "schema": schema,
+        "categories": categories,
+        "date_range": [first.date().isoformat(), last.date().isoformat()] if n_rows else None,
+        "bbox": [x0, y0, x1, y1] if n_rows else None,
+    }
+
+def catalog_path(dst_csv: str, dst_par: str, dst_points: str, dst_catalog: str | None) -> str:
+    """
+    Where a CSV pipeline writes its catalog: dst_catalog, or OUT_CATALOG if
+    it is None and the other outputs are the defaults too. Outputs written
+    elsewhere (tests, benchmarks) must name their catalog, so they never
+    overwrite the one the app reads.
+    """
+    if dst_catalog is not None:
+        return dst_catalog
+    if (dst_csv, dst_par, dst_points) != (OUT_CSV, OUT_PAR, OUT_POINTS):
+        raise ValueError("dst_catalog is required when the processed outputs are not the default paths")
+    return OUT_CATALOG
+
+def write_catalog(src_par: str = OUT_PAR, dst: str = OUT_CATALOG) -> dict:
+    """Write the catalog JSON for a processed Parquet file."""
+    con = duckdb.connect()
+    try:
+        catalog = build_catalog(con, f"read_parquet({_sql_str(src_par)})")
+    finally:
+        con.close()
+    catalog["parquet"] = {
+        "bytes": os.path.getsize(src_par),
+        "rows": catalog["row_count"],
+        "sha256": file_hash(src_par),
+    }
+    Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    with open(dst, "w") as fh:
+        json.dump(catalog, fh, indent=2)
+    return catalog
+
+def load_catalog(path: str = OUT_CATALOG, src_par: str = OUT_PAR) -> dict | None:
+    """
+    The catalog for src_par, or None if it is missing or stale. It counts as
+    stale when the Parquet file's size or SHA-256 no longer match, so a
+    rewrite with the same size and row count (corrected values, say) is
+    caught too.
+    """
+    try:
+        with open(path) as fh:
+            catalog = json.load(fh)
+        recorded = catalog["parquet"]
+        if os.path.getsize(src_par) != recorded["bytes"]:
+            return None
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+    return catalog if file_hash(src_par) == recorded.get("sha256") else None
+
+
+# ── Incremental build ─────────────────────────────────────────────────────────
+
+# Each stage rebuilds its outputs from its inputs and is independent of the
+# other, so they can run side by side.
+STAGES = {
+    "geojson": {"run": process_geojson, "inputs": [RAW_GEOJSON], "outputs": [OUT_GEOJSON]},
+    "csv": {"run": process_csv, "inputs": [RAW_CSV], "outputs": [OUT_CSV, OUT_PAR, OUT_POINTS, OUT_CATALOG]},
+}
+
+def file_hash(path: str) -> str | None:
+    """
+    SHA-256 of a file's contents, or None if it does not exist. A directory
+    hashes the relative paths and contents of every file under it.
+    """
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for child in sorted(p for p in Path(path).rglob("*") if p.is_file()):
+            digest.update(child.relative_to(path).as_posix().encode("utf-8"))
+            digest.update(bytes.fromhex(file_hash(child)))
+        return digest.hexdigest()
+    try:
+        with open(path, "rb") as fh:
+            return hashlib.file_digest(fh, "sha256").hexdigest()
+    except FileNotFoundError:
+        return None
+
+def _run_stage(run) -> None:
+    run()
+
+def _run_then_partition(run) -> None:
+    run()
+    write_partitioned()
+
+def build(
+    stages: dict[str, dict] = STAGES,
+    manifest: str = MANIFEST,
+    force: bool = False,
+) -> dict[str, bool]:
+    """
+    Run the stages whose inputs, cleaning code or outputs changed since the
+    last build, in parallel worker processes.
+
+    The manifest records, per stage, the hash of every input, of this module
+    (the cleaning-code version), the stage's run flags (its optional "flags",
+    e.g. ["--streaming"]) and the hash of every output it wrote. A stage is
+    skipped when all four still match. Returns {stage: rebuilt}.
+    """
+    try:
+        with open(manifest) as fh:
+            previous = json.load(fh)
+    except FileNotFoundError:
+        previous = {}
+    code = file_hash(__file__)
+
+    stale = {}
+    for name, stage in stages.items():
+        record = {
+            "code": code,
+            "flags": sorted(stage.get("flags", [])),
+            "inputs": {p: file_hash(p) for p in stage["inputs"]},
+        }
+        old = previous.get(name, {})
+        outputs = {p: file_hash(p) for p in stage["outputs"]}
+        if force or any(old.get(key) != value for key, value in record.items()) or old.get("outputs") != outputs:
+            stale[name] = record
+
+    results = {}
+    if stale:
+        with ProcessPoolExecutor(max_workers=len(stale)) as pool:
+            futures = {name: pool.submit(_run_stage, stages[name]["run"]) for name in stale}
+            results = {name: future.exception() for name, future in futures.items()}
+
+    errors = []
+    for name, error in results.items():
+        if error is not None:
+            previous.pop(name, None)
+            errors.append(error)
+        else:
+            outputs = {p: file_hash(p) for p in stages[name]["outputs"]}
+            previous[name] = {**stale[name], "outputs": outputs}
+
+    if stale:
+        Path(manifest).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{manifest}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(previous, fh, indent=2, sort_keys=True)
+        os.replace(tmp, manifest)
+    if errors:
+        raise errors[0]
+    return {name: name in stale for name in stages}
  
  
 # ── Entry point ───────────────────────────────────────────────────────────────
  
 if __name__ == "__main__":
-    process_geojson()
-    print(f"Processed GeoJSON → {OUT_GEOJSON}")
- 
-    process_csv()
-    print(f"Processed CSV     → {OUT_CSV}")
-    print(f"Processed Parquet → {OUT_PAR}")
\ No newline at end of file
+    import sys
+
+    args = sys.argv[1:]
+    stages = dict(STAGES)
+    if "--streaming" in args:
+        stages["csv"] = {**stages["csv"], "run": process_csv_streaming, "flags": ["--streaming"]}
+    if "--partitioned" in args:
+        stages["csv"] = {
+            **stages["csv"],
+            "run": partial(_run_then_partition, stages["csv"]["run"]),
+            "outputs": [*stages["csv"]["outputs"], OUT_PARTITIONED],
+            "flags": [*stages["csv"].get("flags", []), "--partitioned"],
+        }
+    for name, rebuilt in build(stages, force="--force" in args).items():
+        status = "rebuilt" if rebuilt else "up to date"
+        for path in stages[name]["outputs"]:
+            print(f"{status:<10} → {path}")
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+from collections.abc import AsyncIterator, Iterable
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from query_pool import SessionCursor, quote_identifier
+
+EXPORT_CHUNK_ROWS = int(os.environ.get("SQUIRREL_EXPORT_CHUNK_ROWS", "65536"))
+FILE_CHUNK_BYTES = 1 << 20
+VECTOR_ROWS = 2048  # rows in one DuckDB vector, the unit fetch_df_chunk counts in
+
+EXPORT_FORMATS = {"csv": "CSV", "parquet": "Parquet", "arrow": "Arrow IPC"}
+
+EXPORT_EXTENSIONS = {"csv": "csv", "parquet": "parquet", "arrow": "arrows"}
+
+
+def export_filename(stem: str, fmt: str) -> str:
+    return f"{stem}.{EXPORT_EXTENSIONS[fmt]}"
+
+
+async def stream_export(
+    cursor: SessionCursor,
+    sql: str,
+    params: Iterable[Any] | None = None,
+    fmt: str = "csv",
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> AsyncIterator[bytes]:
+    """
+    Yield a query's result as a CSV, Parquet or Arrow IPC stream file in
+    chunks, each fetched or encoded on the query pool.
+
+    CSV and Arrow batches of about `chunk_rows` rows are read from the open
+    DuckDB result and sent as they are encoded, so memory stays at one batch
+    and the first bytes leave before the query has been fully read. Parquet
+    keeps its footer at the end of the file, so DuckDB writes it to a
+    temporary file that is then sent in 1 MiB pieces. The cursor should be
+    one opened for this export; it is closed when the stream ends.
+    """
+    params = list(params or [])
+    try:
+        if fmt == "csv":
+            chunks = _csv_chunks(cursor, sql, params, chunk_rows)
+        elif fmt == "parquet":
+            chunks = _parquet_chunks(cursor, sql, params, chunk_rows)
+        elif fmt == "arrow":
+            chunks = _arrow_chunks(cursor, sql, params, chunk_rows)
+        else:
+            raise ValueError(f"Unknown export format: {fmt!r}")
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        cursor.close()
+
+
+async def _csv_chunks(cursor: SessionCursor, sql: str, params: list, chunk_rows: int) -> AsyncIterator[bytes]:
+    vectors = max(1, chunk_rows // VECTOR_ROWS)
+    await cursor.run(lambda cur: cur.execute(sql, params))
+    header = True
+    while True:
+        df = await cursor.run(lambda cur: cur.fetch_df_chunk(vectors))
+        if df.empty and not header:
+            return
+        yield df.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+async def _parquet_chunks(cursor: SessionCursor, sql: str, params: list, chunk_rows: int) -> AsyncIterator[bytes]:
+    with tempfile.TemporaryDirectory(prefix="squirrel_export_") as tmp:
+        path = Path(tmp) / "export.parquet"
+        (writable,) = await cursor.run(
+            lambda cur: cur.execute("SELECT current_setting('enable_external_access')").fetchone()
+        )
+        if writable:
+            await cursor.run(lambda cur: cur.execute(_copy_parquet(sql, path), params))
+        else:
+            await _stage_parquet(cursor, sql, params, path, chunk_rows)
+        with open(path, "rb") as fh:
+            while chunk := await cursor.pool.run(lambda: fh.read(FILE_CHUNK_BYTES)):
+                yield chunk
+
+
+def _copy_parquet(sql: str, path: Path) -> str:
+    return f"COPY ({sql}) TO '{path.as_posix()}' (FORMAT parquet, COMPRESSION zstd)"
+
+
+async def _stage_parquet(cursor: SessionCursor, sql: str, params: list, path: Path, chunk_rows: int) -> None:
+    """
+    Write a locked-down database's query result to Parquet. Such a database
+    (the querychat one) cannot write files, so its rows are copied chunk by
+    chunk into a scratch on-disk database, which writes the file.
+    """
+    vectors = max(1, chunk_rows // VECTOR_ROWS)
+    scratch = duckdb.connect(str(path.with_suffix(".duckdb")))
+    try:
+        description = await cursor.run(lambda cur: cur.execute(sql, params).description)
+        columns = ", ".join(f"{quote_identifier(name)} {type_}" for name, type_, *_ in description)
+        scratch.execute(f"CREATE TABLE export ({columns})")
+
+        def insert(df: pd.DataFrame) -> None:
+            scratch.register("chunk", df)
+            scratch.execute("INSERT INTO export SELECT * FROM chunk")
+            scratch.unregister("chunk")
+
+        while not (df := await cursor.run(lambda cur: cur.fetch_df_chunk(vectors))).empty:
+            await cursor.pool.run(lambda: insert(df))
+        await cursor.pool.run(lambda: scratch.execute(_copy_parquet("SELECT * FROM export", path)))
+    finally:
+        scratch.close()
+
+
+async def _arrow_chunks(cursor: SessionCursor, sql: str, params: list, chunk_rows: int) -> AsyncIterator[bytes]:
+    reader = await cursor.run(lambda cur: cur.execute(sql, params).to_arrow_reader(chunk_rows))
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, reader.schema)
+    done = False
+
+    def encode_next() -> bytes | None:
+        nonlocal done
+        if done:
+            return None
+        try:
+            writer.write_batch(reader.read_next_batch())
+        except StopIteration:
+            writer.close()
+            done = True
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    while chunk := await cursor.run(lambda cur: encode_next()):
+        yield chunk
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+# ── Bitmap index ──────────────────────────────────────────────────────────────
+
+
+def pack_mask(mask: np.ndarray) -> np.ndarray:
+    """Pack a boolean row mask into a little-endian bitset."""
+    return np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+
+
+def popcount(bits: np.ndarray) -> int:
+    """Number of set bits in a packed bitset."""
+    return int(np.unpackbits(bits).sum())
+
+
+def _category_codes(series: pd.Series) -> tuple[np.ndarray, list[str]]:
+    """Integer codes and labels for a column, reusing a Categorical's own codes."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.array.codes
+        labels = [str(value) for value in series.cat.categories]
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(labels), codes)
+            labels.append("nan")
+        return codes, labels
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes, [str(value) for value in uniques]
+
+
+class FilterIndex:
+    """
+    Bitmap index over the low-cardinality sidebar filter columns.
+
+    Built once at startup: every (column, value) pair and every boolean flag
+    column gets a packed bitset with one bit per row. A filter combination is
+    then answered with a handful of vectorised OR/AND operations over those
+    bitsets instead of a scan of the table.
+
+    Semantics match the sidebar SQL: values within a column are OR'd, columns
+    are AND'd, an empty selection places no constraint, and selected flags are
+    OR'd together (a row matches if any of them is True).
+
+    The integer category codes behind each bitmap are kept as well (`codes`,
+    `labels`) so aggregations can group the matching rows without strings.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str], flags: Iterable[str] = ()):
+        self.n_rows = len(df)
+        self._empty = pack_mask(np.zeros(self.n_rows, dtype=bool))
+        self._full = pack_mask(np.ones(self.n_rows, dtype=bool))
+        self.bitmaps: dict[str, dict[str, np.ndarray]] = {}
+        self.codes: dict[str, np.ndarray] = {}
+        self.labels: dict[str, list[str]] = {}
+        for col in columns:
+            codes, labels = _category_codes(df[col])
+            self.codes[col] = codes
+            self.labels[col] = labels
+            self.bitmaps[col] = {
+                label: pack_mask(codes == code) for code, label in enumerate(self.labels[col])
+            }
+        self.flags: dict[str, np.ndarray] = {
+            col: pack_mask(df[col].fillna(False).to_numpy(dtype=bool)) for col in flags
+        }
+
+    def _any_of(self, bitsets: list[np.ndarray]) -> np.ndarray:
+        if not bitsets:
+            return self._empty
+        return np.bitwise_or.reduce(bitsets)
+
+    def bits(
+        self,
+        selections: Mapping[str, Iterable[str]],
+        any_flags: Iterable[str] = (),
+    ) -> np.ndarray:
+        """Packed bitset of the rows matching a filter combination."""
+        result = self._full
+        for col, values in selections.items():
+            values = list(values or [])
+            if not values:
+                continue
+            bitmaps = self.bitmaps[col]
+            matched = self._any_of([bitmaps[v] for v in values if v in bitmaps])
+            result = result & matched
+        flags = [self.flags[c] for c in (any_flags or []) if c in self.flags]
+        if flags:
+            result = result & self._any_of(flags)
+        return result
+
+    def mask(
+        self,
+        selections: Mapping[str, Iterable[str]],
+        any_flags: Iterable[str] = (),
+    ) -> np.ndarray:
+        """Boolean row-position mask of the rows matching a filter combination."""
+        bits = self.bits(selections, any_flags)
+        return np.unpackbits(bits, count=self.n_rows, bitorder="little").view(bool)
+
+    def count(
+        self,
+        selections: Mapping[str, Iterable[str]],
+        any_flags: Iterable[str] = (),
+    ) -> int:
+        """Number of matching rows, counted straight off the packed bitset."""
+        return popcount(self.bits(selections, any_flags))
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable, Iterable
+from typing import NamedTuple, TypeVar
+
+from shiny import reactive
+
+from render_cache import filter_key
+
+T = TypeVar("T")
+
+FILTER_DEBOUNCE = float(os.environ.get("SQUIRREL_FILTER_DEBOUNCE", "0.15"))
+
+# ── State ─────────────────────────────────────────────────────────────────────
+
+
+def _canonical(values: Iterable[str] | str | None) -> tuple[str, ...]:
+    if values is None or isinstance(values, str):
+        values = [values] if values else []
+    return tuple(sorted(set(values)))
+
+
+class SidebarFilters(NamedTuple):
+    """
+    The sidebar's filter selections in canonical form: each a sorted tuple
+    without duplicates, so that the same checkboxes compare equal whatever
+    order they were ticked in or whether the checkbox group or the map
+    legend reported them.
+    """
+
+    shift: tuple[str, ...] = ()
+    fur: tuple[str, ...] = ()
+    age: tuple[str, ...] = ()
+    behavior: tuple[str, ...] = ()
+
+    @classmethod
+    def of(cls, shift=None, fur=None, age=None, behavior=None) -> SidebarFilters:
+        return cls(_canonical(shift), _canonical(fur), _canonical(age), _canonical(behavior))
+
+    def key(self) -> tuple:
+        """The render cache key for this state, as render_cache.filter_key builds it."""
+        return filter_key(**self._asdict())
+
+
+# ── Coalescing ────────────────────────────────────────────────────────────────
+
+
+class CoalesceStats:
+    """
+    Counters for coalesce: input changes seen, states published to the
+    reactive graph, and the changes that published nothing because a newer
+    one arrived within the debounce window (`coalesced`) or the state they
+    settled on equalled the current one (`duplicates`). Each of the latter
+    is one recomputation of everything downstream avoided.
+    """
+
+    def __init__(self):
+        self.changes = 0
+        self.published = 0
+        self.coalesced = 0
+        self.duplicates = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "changes": self.changes,
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "duplicates": self.duplicates,
+            "avoided": self.coalesced + self.duplicates,
+        }
+
+
+def coalesce(
+    read: Callable[[], T],
+    delay: float = FILTER_DEBOUNCE,
+    stats: CoalesceStats | None = None,
+) -> Callable[[], T]:
+    """
+    A reactive read of `read()` that changes only when its value does.
+
+    `read` reads reactive inputs and returns a canonical, comparable value.
+    Changes are debounced: a value is published once no newer change has
+    arrived for `delay` seconds (0 publishes within the same flush), and only
+    if it differs from the value already published. Dependents are therefore
+    invalidated once per burst of input events, and not at all by an input
+    that round-trips back to the same state. Must be called in a session's
+    server function.
+    """
+    stats = stats if stats is not None else CoalesceStats()
+    with reactive.isolate():
+        published = reactive.value(read())
+    changed = reactive.value(0)
+    first = True
+    latest = None
+    pending = False
+    deadline = 0.0
+
+    @reactive.effect(priority=2)
+    def _collect():
+        nonlocal first, latest, pending, deadline
+        value = read()
+        if first:
+            first = False
+            return
+        stats.changes += 1
+        if pending:
+            stats.coalesced += 1
+        latest, pending = value, True
+        deadline = time.monotonic() + delay
+        with reactive.isolate():
+            changed.set(changed() + 1)
+
+    @reactive.effect(priority=2)
+    def _publish():
+        nonlocal pending
+        changed()
+        if not pending:
+            return
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            reactive.invalidate_later(remaining)
+            return
+        pending = False
+        with reactive.isolate():
+            current = published()
+        if latest == current:
+            stats.duplicates += 1
+        else:
+            stats.published += 1
+            published.set(latest)
+
+    return published.get
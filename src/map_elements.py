@@ -0,0 +1,80 @@
+"""
+The Leaflet elements map_render.map_html adds to its folium map: the
+columnar point layer and the widget the app drives it through. Kept apart
+from map_render so that folium and branca load with the first map document
+rather than with the app.
+"""
+from __future__ import annotations
+
+import folium
+from branca.element import MacroElement
+from jinja2 import Template
+
+from map_render import MAP_JS, point_payload
+from utils import FUR_FALLBACK, FUR_PALETTE
+
+
+class PointLayer(MacroElement):
+    """All squirrel sightings as one columnar Leaflet layer."""
+
+    _template = Template("""
+        {% macro header(this, kwargs) %}
+            <script>{{ this.library }}</script>
+        {% endmacro %}
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = squirrelPointLayer(
+                {{ this.payload|tojson }},
+                {{ this.options|tojson }}
+            ).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, points, colour_field: str = "primary_fur_color"):
+        super().__init__()
+        self._name = "PointLayer"
+        self.library = MAP_JS.read_text()
+        self.payload = point_payload(points)
+        self.options = {
+            "colourField": colour_field,
+            "palette": FUR_PALETTE,
+            "fallback": FUR_FALLBACK,
+        }
+
+
+class MapWidget(MacroElement):
+    """
+    Exposes `window.squirrelMap.update(msg)` so the app can push visibility
+    masks, legend state, basemap swaps, clusters, hectare counts and hotspot
+    surfaces into an already-rendered map. Any state the parent page received
+    before the map loaded is applied on init. The map's zoom and bounds are
+    reported back to the app as the `map_view_state` input after every move.
+
+    `hectares` is a hectare_payload(); the choropleth is drawn from it once
+    the app sends counts.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            window.squirrelMap = squirrelMapWidget(
+                {{ this._parent.get_name() }},
+                {{ this.points.get_name() }},
+                {{ this.tiles.get_name() }},
+                {{ this.options|tojson }}
+            );
+            if (window.parent && window.parent.squirrelMapState) {
+                window.squirrelMap.update(window.parent.squirrelMapState);
+            }
+        {% endmacro %}
+    """)
+
+    def __init__(self, points: PointLayer, tiles: folium.TileLayer, hectares: dict | None = None):
+        super().__init__()
+        self._name = "MapWidget"
+        self.points = points
+        self.tiles = tiles
+        self.options = {
+            "palette": FUR_PALETTE,
+            "fallback": FUR_FALLBACK,
+            "points": points.options,
+            "hectares": hectares,
+        }
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import base64
+import io
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import color_for_fur
+
+# ── Config ────────────────────────────────────────────────────────────────────
+
+DEFAULT_CENTER = (40.78204, -73.96399)
+DEFAULT_ZOOM = 14
+
+MAP_JS = Path(__file__).resolve().parent / "www" / "squirrel_map.js"
+
+# Fur colours in the map legend, in display order, drawn in the same
+# FUR_PALETTE colours as the points.
+LEGEND_FUR = ["Gray", "Cinnamon", "Black"]
+
+# Columns shown in the marker tooltip, in display order.
+TOOLTIP_FIELDS = [
+    ("unique_squirrel_id", "ID"),
+    ("hectare", "Hectare"),
+    ("shift", "Shift"),
+    ("primary_fur_color", "Fur"),
+    ("age", "Age"),
+    ("date", "Date"),
+]
+
+# ── Columnar payload ──────────────────────────────────────────────────────────
+
+
+def _b64(values: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(values).tobytes()).decode("ascii")
+
+
+def _code_dtype(n_labels: int) -> str:
+    if n_labels <= np.iinfo(np.uint8).max + 1:
+        return "uint8"
+    if n_labels <= np.iinfo(np.uint16).max + 1:
+        return "uint16"
+    return "uint32"
+
+
+def encode_column(values: pd.Series) -> tuple[np.ndarray, list[str]]:
+    """
+    Dictionary-encode a column as (codes, labels). Missing values map to an
+    'Unknown' label and dates are rendered as YYYY-MM-DD, once per distinct value.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.array.codes
+        labels = [str(v) for v in values.cat.categories]
+    else:
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime("%Y-%m-%d")
+        codes, uniques = pd.factorize(values)
+        labels = [str(v) for v in uniques]
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes)
+        labels.append("Unknown")
+    return codes, labels
+
+
+def valid_points(points: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows without coordinates; the map layer indexes what is left."""
+    return points[(points["longitude"].notna() & points["latitude"].notna()).to_numpy()]
+
+
+def encode_mask(mask: np.ndarray) -> str:
+    """Pack a boolean visibility mask into a base64 little-endian bitset."""
+    return _b64(np.packbits(np.asarray(mask, dtype=bool), bitorder="little"))
+
+
+def tile_spec(tile_choice: str) -> dict:
+    """Leaflet tile URL and options for a folium basemap name."""
+    import folium
+    from folium.utilities import camelize
+
+    layer = folium.TileLayer(tile_choice)
+    return {
+        "url": layer.tiles,
+        "options": {camelize(k): v for k, v in layer.options.items()},
+    }
+
+
+def point_payload(points: pd.DataFrame) -> dict:
+    """
+    Build the columnar map payload for a frame with longitude / latitude columns.
+
+    Coordinates are shipped as base64 little-endian float32 arrays and each
+    tooltip column as base64 integer codes plus a label dictionary, so the
+    payload is built from whole arrays with no per-row Python work.
+    """
+    points = valid_points(points)
+    fields = []
+    for name, title in TOOLTIP_FIELDS:
+        if name in points.columns:
+            codes, labels = encode_column(points[name])
+        else:
+            codes, labels = np.zeros(len(points), dtype=np.int64), ["Unknown"]
+        dtype = _code_dtype(len(labels))
+        fields.append({
+            "name": name,
+            "title": title,
+            "dtype": dtype,
+            "codes": _b64(codes.astype(f"<u{np.dtype(dtype).itemsize}")),
+            "labels": labels,
+        })
+    return {
+        "n": int(len(points)),
+        "lon": _b64(points["longitude"].to_numpy(dtype="<f4")),
+        "lat": _b64(points["latitude"].to_numpy(dtype="<f4")),
+        "fields": fields,
+    }
+
+
+def cluster_payload(clusters) -> dict:
+    """
+    Columnar payload for a spatial.Clusters result: float32 centroids,
+    uint32 sizes and a row-major uint32 (cluster x label) count matrix.
+    """
+    return {
+        "n": len(clusters),
+        "zoom": clusters.zoom,
+        "lon": _b64(clusters.lon.astype("<f4")),
+        "lat": _b64(clusters.lat.astype("<f4")),
+        "count": _b64(clusters.count.astype("<u4")),
+        "labels": clusters.labels,
+        "counts": _b64(clusters.counts.astype("<u4")),
+    }
+
+
+def hectare_payload(grid) -> dict:
+    """
+    Geometry of a spatial.HectareGrid for the map document: hectare labels,
+    float32 corner coordinates (four per hectare, row-major) and uint32
+    total sightings per hectare.
+    """
+    return {
+        "n": len(grid),
+        "labels": grid.labels,
+        "lon": _b64(grid.lon.astype("<f4")),
+        "lat": _b64(grid.lat.astype("<f4")),
+        "totals": _b64(grid.totals.astype("<u4")),
+    }
+
+
+def hectare_counts_payload(counts: np.ndarray) -> dict:
+    """Per-hectare sighting counts for the choropleth, as base64 uint32."""
+    return {"count": _b64(np.asarray(counts).astype("<u4")), "max": int(np.max(counts, initial=0))}
+
+
+def density_payload(density: np.ndarray, bounds: tuple[float, float, float, float]) -> dict:
+    """
+    A kernel density surface (row 0 north) as a PNG image overlay: colour
+    from matplotlib's YlOrRd scaled to the surface's own peak, with opacity
+    rising with density so empty ground stays clear. `bounds` is (west,
+    south, east, north); `peak` is in the surface's units.
+    """
+    from matplotlib import colormaps
+    from matplotlib.image import imsave
+
+    peak = float(density.max(initial=0.0))
+    level = density / peak if peak > 0 else np.zeros_like(density)
+    rgba = colormaps["YlOrRd"](level)
+    rgba[..., 3] = np.clip(level * 1.5, 0.0, 0.85)
+    buf = io.BytesIO()
+    imsave(buf, rgba, format="png")
+    west, south, east, north = bounds
+    return {
+        "image": "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii"),
+        "bounds": [[south, west], [north, east]],
+        "peak": peak,
+    }
+
+
+# ── Map document ──────────────────────────────────────────────────────────────
+
+
+def map_html(
+    filtered: pd.DataFrame,
+    tile_choice: str,
+    selected_fur: list,
+    bounds: tuple[float, float, float, float] | None = None,
+    hectares: dict | None = None,
+) -> str:
+    """
+    The map document. The view fits `bounds` (west, south, east, north) if
+    given, else the extent of the points. `hectares` (a hectare_payload())
+    enables the hectare choropleth.
+    """
+    # folium (and branca, behind the map elements) load on the first map
+    # built rather than with the app.
+    import folium
+
+    from map_elements import MapWidget, PointLayer
+
+    fmap = folium.Map(
+        location=DEFAULT_CENTER,
+        zoom_start=DEFAULT_ZOOM,
+        tiles=None,
+        control_scale=True,
+    )
+
+    tiles = folium.TileLayer(tile_choice).add_to(fmap)
+    points = PointLayer(filtered).add_to(fmap)
+    MapWidget(points, tiles, hectares).add_to(fmap)
+
+    if bounds is None and not filtered.empty:
+        lon, lat = filtered["longitude"], filtered["latitude"]
+        bounds = (float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max()))
+    if bounds is not None:
+        west, south, east, north = bounds
+        fmap.fit_bounds([[south, west], [north, east]])
+
+    selected_json = json.dumps(selected_fur)
+    all_fur_json  = json.dumps(LEGEND_FUR)
+
+    legend_items_html = "".join(
+        f"""
+        <div class="legend-item" data-fur="{name}"
+             style="display:flex; align-items:center; gap:7px; padding:4px 6px;
+                    border-radius:5px; cursor:pointer; transition:background 0.15s;
+                    background: {'rgba(255,255,255,0.25)' if name in selected_fur else 'transparent'};">
+            <span style="display:inline-block; width:13px; height:13px; border-radius:50%;
+                         background:{color_for_fur(name)}; flex-shrink:0;
+                         opacity:{'1' if name in selected_fur else '0.35'};"></span>
+            <span style="font-size:12px; font-weight:500;
+                         opacity:{'1' if name in selected_fur else '0.45'}">{name}</span>
+        </div>
+        """
+        for name in LEGEND_FUR
+    )
+
+    total_squirrels = len(filtered)
+
+    legend_html = f"""
+    <div id="fur-legend"
+         style="position:absolute; top:12px; right:12px; z-index:9999;
+                background:rgba(255,255,255,0.88); backdrop-filter:blur(4px);
+                border-radius:8px; padding:8px 10px; box-shadow:0 2px 8px rgba(0,0,0,0.18);
+                min-width:110px; user-select:none;">
+        <div style="font-size:11px; font-weight:700; color:#444;
+                    margin-bottom:5px; letter-spacing:0.04em;">FUR COLOR</div>
+        {legend_items_html}
+
+        <div style="border-top:1px solid rgba(0,0,0,0.1); margin-top:8px; padding-top:8px;">
+            <div style="font-size:11px; color:#666; margin-bottom:2px;">Total Squirrels</div>
+            <div id="fur-legend-total"
+                 style="font-size:18px; font-weight:700; color:#6A9E6F;">{total_squirrels:,}</div>
+        </div>
+    </div>
+
+    <script>
+    (function() {{
+        var selected = {selected_json};
+        var allFur   = {all_fur_json};
+
+        function updateVisuals() {{
+            document.querySelectorAll('.legend-item').forEach(function(el) {{
+                var fur = el.getAttribute('data-fur');
+                var active = selected.indexOf(fur) >= 0;
+                el.style.background = active ? 'rgba(255,255,255,0.25)' : 'transparent';
+                el.querySelectorAll('span').forEach(function(s, i) {{
+                    s.style.opacity = active ? '1' : (i === 0 ? '0.35' : '0.45');
+                }});
+            }});
+        }}
+
+        document.querySelectorAll('.legend-item').forEach(function(el) {{
+            el.addEventListener('click', function() {{
+                var fur = el.getAttribute('data-fur');
+                var idx = selected.indexOf(fur);
+                if (idx >= 0) {{
+                    // Don't allow deselecting all
+                    if (selected.length > 1) selected.splice(idx, 1);
+                }} else {{
+                    selected.push(fur);
+                }}
+                updateVisuals();
+                // Push new value into Shiny input 'fur'
+                if (window.parent && window.parent.Shiny) {{
+                    window.parent.Shiny.setInputValue('fur', selected, {{priority: 'event'}});
+                }}
+            }});
+        }});
+
+        // Called by squirrelMap.update when the server pushes new filter state
+        window.squirrelLegend = {{
+            update: function(newSelected, total) {{
+                selected = newSelected.slice();
+                updateVisuals();
+                document.getElementById('fur-legend-total').textContent =
+                    total.toLocaleString('en-US');
+            }}
+        }};
+    }})();
+    </script>
+    """
+
+    fmap.get_root().html.add_child(folium.Element(legend_html))
+    return fmap.get_root().render()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any
+
+import pandas as pd
+from shiny import module, reactive, render, ui
+
+from query_pool import SessionCursor, quote_identifier
+
+PAGE_ROWS = int(os.environ.get("SQUIRREL_TABLE_PAGE_ROWS", "100"))
+
+# A table's rows: a FROM source (table, view or subquery) and a WHERE clause
+# with its `?` parameters, e.g. ("squirrels", *filter_where(...)).
+TableSource = tuple[str, str, Sequence[Any]]
+
+# ── SQL ───────────────────────────────────────────────────────────────────────
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def filtered_where(where: str, params: Sequence[Any], filters: Mapping[str, str]) -> tuple[str, list[Any]]:
+    """
+    `where` narrowed by per-column text filters, as in a data grid's filter
+    row: a row is kept when each filtered column's text contains the filter
+    value, ignoring case. Values are bound as `?` parameters.
+    """
+    conditions = [where.removeprefix("WHERE ")] if where else []
+    params = list(params)
+    for col, text in filters.items():
+        if text:
+            conditions.append(f"CAST({quote_identifier(col)} AS VARCHAR) ILIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(text)}%")
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+def page_query(
+    source: TableSource,
+    columns: Sequence[str],
+    filters: Mapping[str, str] | None = None,
+    sort: str | None = None,
+    descending: bool = False,
+    key: str | None = None,
+    limit: int = PAGE_ROWS,
+    offset: int = 0,
+) -> tuple[str, list[Any]]:
+    """
+    SQL and parameters for one page of a table, sorted and filtered in DuckDB.
+
+    Sorting by `sort` breaks ties on the unique `key` column so that pages
+    never overlap. Without a sort the source's own order is kept, which
+    DuckDB preserves for scans and ordered subqueries.
+    """
+    table, where, params = source
+    where, params = filtered_where(where, params, filters or {})
+    select = ", ".join(quote_identifier(c) for c in columns)
+    order = ""
+    if sort is not None:
+        direction = "DESC" if descending else "ASC"
+        order = f"ORDER BY {quote_identifier(sort)} {direction} NULLS LAST"
+        if key is not None and key != sort:
+            order += f", {quote_identifier(key)}"
+    return f"SELECT {select} FROM {table} {where} {order} LIMIT ? OFFSET ?", [*params, limit, offset]
+
+
+def count_query(source: TableSource, filters: Mapping[str, str] | None = None) -> tuple[str, list[Any]]:
+    """SQL and parameters counting a table's rows under the same filters as page_query."""
+    table, where, params = source
+    where, params = filtered_where(where, params, filters or {})
+    return f"SELECT count(*) FROM {table} {where}", params
+
+
+# ── Module ────────────────────────────────────────────────────────────────────
+
+
+def _label(col: str) -> str:
+    return col.replace("_", " ")
+
+
+@module.ui
+def paged_table_ui(columns: Sequence[str], height: str = "470px") -> ui.Tag:
+    """
+    A table showing one server-rendered page of rows at a time, with a sort
+    toggle and a text filter per column and previous / next page buttons.
+    """
+    sort_id = module.resolve_id("sort")
+    header = [
+        ui.tags.th(
+            ui.tags.a(
+                _label(col),
+                href="#",
+                onclick=f'Shiny.setInputValue("{sort_id}", "{col}", {{priority: "event"}}); return false;',
+                style="color:inherit; text-decoration:none; white-space:nowrap;",
+            ),
+            ui.output_text(f"sort_{i}", inline=True),
+        )
+        for i, col in enumerate(columns)
+    ]
+    filter_row = [
+        ui.tags.th(ui.input_text(f"filter_{i}", None, placeholder="Filter", width="100%"))
+        for i in range(len(columns))
+    ]
+    return ui.div(
+        ui.div(
+            ui.tags.table(
+                ui.tags.thead(ui.tags.tr(*header), ui.tags.tr(*filter_row), style="position:sticky; top:0; background:white;"),
+                ui.output_ui("rows", container=ui.tags.tbody),
+                class_="table table-sm table-striped",
+            ),
+            style=f"max-height:{height}; overflow:auto;",
+        ),
+        ui.div(
+            ui.output_text("footer", inline=True),
+            ui.div(
+                ui.input_action_button("previous", "‹ Previous", class_="btn-outline-secondary btn-sm"),
+                ui.input_action_button("next", "Next ›", class_="btn-outline-secondary btn-sm"),
+                style="display:flex; gap:6px;",
+            ),
+            style="display:flex; justify-content:space-between; align-items:center; padding-top:6px;",
+        ),
+    )
+
+
+@module.server
+def paged_table_server(
+    input,
+    output,
+    session,
+    columns: Sequence[str],
+    source: Callable[[], TableSource],
+    cursor: Callable[[], SessionCursor],
+    key: str | None = None,
+    page_rows: int = PAGE_ROWS,
+) -> None:
+    """
+    Serve a paged_table_ui: each page is one LIMIT / OFFSET query on the
+    session's cursor and the row count a separate count(*), re-run only when
+    the source or the column filters change. A new source, filter or sort
+    returns to the first page.
+    """
+    sort = reactive.value((None, False))
+    page = reactive.value(0)
+
+    @reactive.effect
+    @reactive.event(input.sort)
+    def _toggle_sort():
+        col = input.sort()
+        current, descending = sort()
+        sort.set((col, not descending if col == current else False))
+
+    @reactive.calc
+    def filters() -> dict[str, str]:
+        return {col: input[f"filter_{i}"]().strip() for i, col in enumerate(columns)}
+
+    # Runs ahead of the outputs so a change never fetches the old page first.
+    @reactive.effect(priority=1)
+    def _first_page():
+        source(), filters(), sort()
+        page.set(0)
+
+    @reactive.calc
+    async def total() -> int:
+        sql, params = count_query(source(), filters())
+        ((n,),) = await cursor().fetchall(sql, params)
+        return n
+
+    async def last_page() -> int:
+        return max(0, (await total() - 1) // page_rows)
+
+    @reactive.effect
+    @reactive.event(input.next)
+    async def _next():
+        page.set(min(page() + 1, await last_page()))
+
+    @reactive.effect
+    @reactive.event(input.previous)
+    def _previous():
+        page.set(max(page() - 1, 0))
+
+    @reactive.calc
+    async def window() -> pd.DataFrame:
+        col, descending = sort()
+        sql, params = page_query(
+            source(), columns, filters(), col, descending, key, limit=page_rows, offset=page() * page_rows
+        )
+        return await cursor().df(sql, params)
+
+    @render.ui
+    async def rows():
+        df = await window()
+        if df.empty:
+            return ui.tags.tr(ui.tags.td("No rows for current filters", colspan=len(columns)))
+        cells = {col: _display(df[col]) for col in columns}
+        return ui.TagList(*[ui.tags.tr(*[ui.tags.td(cells[col][i]) for col in columns]) for i in range(len(df))])
+
+    @render.text
+    async def footer() -> str:
+        n = await total()
+        if n == 0:
+            return "Viewing 0 rows"
+        start = page() * page_rows
+        return f"Viewing rows {start + 1} through {min(start + page_rows, n)} of {n}"
+
+    for i, col in enumerate(columns):
+        output(id=f"sort_{i}")(_sort_marker(sort, col))
+
+
+def _sort_marker(sort: reactive.Value, col: str) -> render.text:
+    @render.text
+    def marker() -> str:
+        current, descending = sort()
+        return (" ▼" if descending else " ▲") if current == col else ""
+
+    return marker
+
+
+def _display(values: pd.Series) -> list[str]:
+    """Cell text for a column: datetimes as dates, missing values blank."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        text = values.dt.strftime("%Y-%m-%d")
+    else:
+        text = values.astype(str)
+    return text.where(values.notna(), "").tolist()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import NamedTuple
+
+DEFAULT_MAXSIZE = int(os.environ.get("SQUIRREL_PROMPT_CACHE_SIZE", "1000"))
+DEFAULT_TTL = float(os.environ.get("SQUIRREL_PROMPT_CACHE_TTL", str(7 * 24 * 3600)))
+
+# ── Keys ──────────────────────────────────────────────────────────────────────
+
+_TRAILING = re.compile(r"[\s.!?]+$")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Cache key for a chat prompt: Unicode-normalised, case-folded, with runs
+    of whitespace collapsed and trailing punctuation dropped, so that
+    "Show only gray squirrels." and "show only  GRAY squirrels" share an entry.
+    """
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    return _TRAILING.sub("", " ".join(text.split()))
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+
+class CachedQuery(NamedTuple):
+    """A dashboard filter produced for a prompt. An empty query resets the filter."""
+
+    query: str
+    title: str
+
+
+class PromptCache:
+    """
+    Persistent prompt → SQL cache for the AI tab, shared by every session and
+    by every worker process that opens the same file.
+
+    Entries are keyed by (schema, normalised prompt), where `schema` is the
+    dataset's schema version, so a rebuilt dataset with a different schema
+    never reuses SQL written for the old one (CachedChat extends it with a
+    hash of the conversation for follow-up prompts).
+    They expire `ttl` seconds after they were stored, and once the cache
+    holds more than `maxsize` entries the least recently used are evicted.
+    `path=None` keeps the cache in memory.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl: float = DEFAULT_TTL,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(
+            ":memory:" if self.path is None else self.path,
+            timeout=5,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        # WAL lets worker processes read while one writes; NORMAL sync skips
+        # an fsync per lookup, at the risk of losing recent entries on power loss.
+        self._con.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS prompts (
+                schema TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                query TEXT NOT NULL,
+                title TEXT NOT NULL,
+                created REAL NOT NULL,
+                used REAL NOT NULL,
+                PRIMARY KEY (schema, prompt)
+            );
+            CREATE INDEX IF NOT EXISTS prompts_used ON prompts (used);
+        """)
+
+    def get(self, schema: str, prompt: str) -> CachedQuery | None:
+        """The cached filter for prompt under schema, or None if absent or expired."""
+        key = (schema, normalize_prompt(prompt))
+        now = time.time()
+        with self._lock:
+            row = self._con.execute(
+                "SELECT query, title, created FROM prompts WHERE schema = ? AND prompt = ?", key
+            ).fetchone()
+            if row is not None and now - row[2] > self.ttl:
+                self._con.execute("DELETE FROM prompts WHERE schema = ? AND prompt = ?", key)
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._con.execute("UPDATE prompts SET used = ? WHERE schema = ? AND prompt = ?", (now, *key))
+            self.hits += 1
+            return CachedQuery(row[0], row[1])
+
+    def put(self, schema: str, prompt: str, query: str, title: str) -> None:
+        """Store the filter for prompt, evicting expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO prompts VALUES (?, ?, ?, ?, ?, ?)",
+                (schema, normalize_prompt(prompt), query, title, now, now),
+            )
+            evicted = self._con.execute("DELETE FROM prompts WHERE created < ?", (now - self.ttl,)).rowcount
+            evicted += self._con.execute(
+                "DELETE FROM prompts WHERE rowid IN "
+                "(SELECT rowid FROM prompts ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (max(self.maxsize, 0),),
+            ).rowcount
+            self.evictions += evicted
+
+    def discard(self, schema: str, prompt: str) -> None:
+        """Drop the entry for prompt, e.g. when its SQL no longer validates."""
+        with self._lock:
+            self._con.execute(
+                "DELETE FROM prompts WHERE schema = ? AND prompt = ?", (schema, normalize_prompt(prompt))
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._con.execute("DELETE FROM prompts")
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._con.execute("SELECT count(*) FROM prompts").fetchone()[0]
+
+    def stats(self) -> dict[str, int]:
+        size = len(self)
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": size,
+                "maxsize": self.maxsize,
+                "evictions": self.evictions,
+            }
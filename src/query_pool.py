@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+import duckdb
+import pandas as pd
+
+DEFAULT_WORKERS = int(os.environ.get("SQUIRREL_QUERY_WORKERS", "4"))
+
+T = TypeVar("T")
+
+# ── SQL helpers ───────────────────────────────────────────────────────────────
+
+
+def quote_identifier(name: str) -> str:
+    """A column or table name as a double-quoted SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def filter_where(
+    selections: Mapping[str, Iterable[str]],
+    any_flags: Iterable[str] = (),
+) -> tuple[str, list[Any]]:
+    """
+    WHERE clause and bound parameters for a sidebar filter state.
+
+    Semantics match FilterIndex: values within a column are OR'd, columns are
+    AND'd, an empty selection places no constraint, and selected flags are
+    OR'd together (NULL counts as False). Column names are quoted
+    identifiers; values are only ever passed as `?` parameters.
+    """
+    conditions: list[str] = []
+    params: list[Any] = []
+    for col, values in selections.items():
+        values = list(values or [])
+        if not values:
+            continue
+        conditions.append(f"{quote_identifier(col)} IN ({', '.join(['?'] * len(values))})")
+        params += values
+    flags = list(any_flags or [])
+    if flags:
+        conditions.append("(" + " OR ".join(f"coalesce({quote_identifier(c)}, false)" for c in flags) + ")")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def subquery(query: str) -> str:
+    """A SELECT statement (e.g. querychat's generated SQL) as a FROM item."""
+    return f"({query.strip().rstrip(';')}) AS result"
+
+
+def result_columns(con: duckdb.DuckDBPyConnection, query: str) -> list[str]:
+    """Names of the columns a query returns, from its plan alone."""
+    return [desc[0] for desc in con.execute(f"SELECT * FROM {subquery(query)} LIMIT 0").description]
+
+
+# ── Pool ──────────────────────────────────────────────────────────────────────
+
+
+class WorkerPool:
+    """
+    Bounded thread pool awaited from the Shiny event loop.
+
+    At most `max_workers` jobs run at once; the rest wait in the executor's
+    queue, and `stats()` reports the queue depth and how long jobs waited.
+    Cancelling the awaiting coroutine drops a job that has not started yet;
+    a running one finishes and its result is discarded (SessionCursor
+    interrupts a running DuckDB query instead).
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "worker"):
+        self.max_workers = max_workers
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.max_queued = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+    async def run(self, fn: Callable[[], T]) -> T:
+        """Await fn() on the pool, recording how long it queued."""
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        def job() -> T:
+            wait = time.perf_counter() - submitted
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        future = self._executor.submit(job)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A job that had not started yet is dropped from the queue.
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+                    self.cancelled += 1
+            raise
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "max_queued": self.max_queued,
+                "wait_ms_avg": 1000 * self._wait_total / self.completed if self.completed else 0.0,
+                "wait_ms_max": 1000 * self._wait_max,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class QueryPool(WorkerPool):
+    """
+    Runs DuckDB queries for every session in a worker process on a bounded
+    thread pool, so the Shiny event loop never blocks on a scan.
+
+    Sessions each get their own cursor (`cursor()`) on the one shared
+    database instead of serialising on a single connection.
+    """
+
+    def __init__(self, con: duckdb.DuckDBPyConnection, max_workers: int = DEFAULT_WORKERS):
+        super().__init__(max_workers, thread_name_prefix="duckdb-query")
+        self.con = con
+
+    def cursor(self) -> SessionCursor:
+        """A new cursor on the shared database, for one session."""
+        return SessionCursor(self, self.con.cursor())
+
+
+class SessionCursor:
+    """
+    One session's DuckDB cursor. Queries are awaited through the pool; a
+    cursor is not safe to share between threads, so the session's own
+    queries run one at a time. Cancelling an await whose query is already
+    running interrupts it, so the worker is freed rather than left to finish
+    a scan nobody will read.
+    """
+
+    def __init__(self, pool: QueryPool, cursor: duckdb.DuckDBPyConnection):
+        self.pool = pool
+        self.cursor = cursor
+        self.interrupted = 0
+        self._lock = threading.Lock()
+        self._state = threading.Lock()
+        self._running: object | None = None
+
+    async def run(self, fn: Callable[[duckdb.DuckDBPyConnection], T]) -> T:
+        """Await fn(cursor) on the pool, for work that takes several queries."""
+        token = object()
+
+        def job() -> T:
+            with self._lock:
+                with self._state:
+                    self._running = token
+                try:
+                    return fn(self.cursor)
+                finally:
+                    with self._state:
+                        self._running = None
+
+        try:
+            return await self.pool.run(job)
+        except asyncio.CancelledError:
+            # Only this job's own query is interrupted, never a later one's.
+            with self._state:
+                if self._running is token:
+                    self.cursor.interrupt()
+                    self.interrupted += 1
+            raise
+
+    async def df(self, sql: str, params: Iterable[Any] | None = None) -> pd.DataFrame:
+        """Result of a query as a DataFrame."""
+        return await self.run(lambda cur: cur.execute(sql, list(params or [])).df())
+
+    async def fetchall(self, sql: str, params: Iterable[Any] | None = None) -> list[tuple]:
+        """Result of a query as a list of tuples."""
+        return await self.run(lambda cur: cur.execute(sql, list(params or [])).fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self.cursor.close()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from pathlib import Path
+from typing import Any
+
+DEFAULT_MAXSIZE = int(os.environ.get("SQUIRREL_RENDER_CACHE_SIZE", "256"))
+
+# ── Keys ──────────────────────────────────────────────────────────────────────
+
+
+def filter_key(**selections: Iterable[str] | str | None) -> tuple:
+    """
+    Canonical, hashable key for a filter state.
+
+    Selections are sorted and de-duplicated so that the same set of checkboxes
+    maps to the same key regardless of click order; None and [] are equal.
+    """
+    key = []
+    for name in sorted(selections):
+        value = selections[name]
+        if value is None or isinstance(value, str):
+            value = [value] if value else []
+        key.append((name, tuple(sorted(set(value)))))
+    return tuple(key)
+
+
+def sql_key(sql: str | None) -> str:
+    """Key for a querychat filter: a hash of its whitespace-normalised SQL."""
+    normalized = " ".join((sql or "").split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+
+class RenderCache:
+    """
+    Thread-safe LRU cache of rendered outputs, shared by every session in a
+    worker process.
+
+    Entries are dropped wholesale when any watched source file changes (its
+    mtime or size differs from when the cache was last filled), so a rebuilt
+    Parquet file never serves stale charts.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, sources: Iterable[Path | str] = ()):
+        self.maxsize = maxsize
+        self.sources = [Path(p) for p in sources]
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = self._source_signature()
+
+    def _source_signature(self) -> tuple:
+        signature = []
+        for path in self.sources:
+            try:
+                stat = path.stat()
+                signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append((str(path), None, None))
+        return tuple(signature)
+
+    def _check_sources(self) -> None:
+        signature = self._source_signature()
+        if signature != self._signature:
+            self._entries.clear()
+            self._signature = signature
+            self.invalidations += 1
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling render() on a miss."""
+        with self._lock:
+            self._check_sources()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Render outside the lock so one slow render does not block other sessions.
+        value = render()
+        if self.maxsize <= 0:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "invalidations": self.invalidations,
+            }
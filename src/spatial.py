@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+# Grid cells are CELL_PX screen pixels square at every zoom level, so one
+# cell at zoom z is exactly four cells at zoom z + 1.
+CELL_PX = 64
+TILE_PX = 256
+MAX_ZOOM = 20
+CELL_BITS = MAX_ZOOM + int(np.log2(TILE_PX // CELL_PX))
+
+# Clusters returned for one view are capped; a denser view is answered from a
+# coarser zoom level.
+MAX_CLUSTERS = 2_000
+
+# ── Web Mercator grid ─────────────────────────────────────────────────────────
+
+
+def mercator(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Normalised Web Mercator coordinates in [0, 1), y growing southwards."""
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -85.05112878, 85.05112878)
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) / (2 * np.pi)
+    return np.clip(x, 0.0, np.nextafter(1.0, 0.0)), np.clip(y, 0.0, np.nextafter(1.0, 0.0))
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Insert a zero bit between each of the low 32 bits of v."""
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in [
+        (16, 0x0000FFFF0000FFFF),
+        (8, 0x00FF00FF00FF00FF),
+        (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333),
+        (1, 0x5555555555555555),
+    ]:
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton_keys(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """
+    Z-order key of each point's grid cell at MAX_ZOOM. The cell containing a
+    point at zoom z is `key >> 2 * (MAX_ZOOM - z)`.
+    """
+    x, y = mercator(lon, lat)
+    scale = float(1 << CELL_BITS)
+    cx = (x * scale).astype(np.uint64)
+    cy = (y * scale).astype(np.uint64)
+    return _spread_bits(cx) | (_spread_bits(cy) << np.uint64(1))
+
+
+# ── Cluster index ─────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Clusters:
+    """Clusters for one view: centroid, size and per-category counts of each."""
+
+    lon: np.ndarray
+    lat: np.ndarray
+    count: np.ndarray
+    counts: np.ndarray  # (clusters, labels)
+    labels: list[str]
+    zoom: int
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+
+class ClusterIndex:
+    """
+    Hierarchical grid clustering over point coordinates.
+
+    Points are sorted once, at startup, by the Z-order key of their grid cell
+    at MAX_ZOOM. Because every cell at a coarser zoom is a run of consecutive
+    finer cells, the members of any cell at any zoom level are then a
+    contiguous slice, and clustering a view is a handful of vectorised passes
+    over the matching points: no per-zoom tree has to be stored.
+
+    `codes` / `labels` give each point a category (fur colour) so clusters
+    carry per-category counts.
+    """
+
+    def __init__(self, lon: np.ndarray, lat: np.ndarray, codes: np.ndarray, labels: list[str]):
+        keys = morton_keys(lon, lat)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        self.lon = np.asarray(lon, dtype=np.float32)[self.order]
+        self.lat = np.asarray(lat, dtype=np.float32)[self.order]
+        self.codes = np.asarray(codes)[self.order]
+        self.labels = list(labels)
+        self.n_points = len(keys)
+
+    def query(
+        self,
+        mask: np.ndarray | None = None,
+        zoom: int = MAX_ZOOM,
+        bounds: tuple[float, float, float, float] | None = None,
+        max_clusters: int = MAX_CLUSTERS,
+    ) -> Clusters:
+        """
+        Clusters of the points selected by `mask` (in the caller's row order)
+        that fall inside `bounds` (west, south, east, north), at `zoom`.
+        If there would be more than `max_clusters`, coarser zoom levels are
+        used until there are not.
+        """
+        selected = np.ones(self.n_points, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)[self.order]
+        if bounds is not None:
+            west, south, east, north = bounds
+            selected &= (self.lon >= west) & (self.lon <= east) & (self.lat >= south) & (self.lat <= north)
+        rows = np.flatnonzero(selected)
+        zoom = int(min(max(zoom, 0), MAX_ZOOM))
+
+        while True:
+            cells = self.keys[rows] >> np.uint64(2 * (MAX_ZOOM - zoom))
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = cells[1:] != cells[:-1]
+            if first.sum() <= max_clusters or zoom == 0:
+                break
+            zoom -= 1
+
+        starts = np.flatnonzero(first)
+        rank = np.cumsum(first) - 1
+        n_clusters, n_labels = len(starts), len(self.labels)
+        count = np.diff(np.append(starts, len(rows))).astype(np.uint32)
+        if n_clusters:
+            lon = (np.add.reduceat(self.lon[rows].astype(np.float64), starts) / count).astype(np.float32)
+            lat = (np.add.reduceat(self.lat[rows].astype(np.float64), starts) / count).astype(np.float32)
+        else:
+            lon = lat = np.zeros(0, dtype=np.float32)
+        counts = np.bincount(
+            rank * n_labels + self.codes[rows], minlength=n_clusters * n_labels
+        ).reshape(n_clusters, n_labels).astype(np.uint32)
+        return Clusters(lon, lat, count, counts, self.labels, zoom)
+
+
+# ── Viewport index ────────────────────────────────────────────────────────────
+
+Bounds = tuple[float, float, float, float]  # west, south, east, north
+
+
+def pad_bounds(bounds: Bounds, margin: float) -> Bounds:
+    """Grow a box on every side by `margin` times its width / height."""
+    west, south, east, north = bounds
+    dx, dy = (east - west) * margin, (north - south) * margin
+    return west - dx, south - dy, east + dx, north + dy
+
+
+def bounds_contain(outer: Bounds, inner: Bounds) -> bool:
+    """Whether `inner` lies entirely within `outer`."""
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+
+class GridIndex:
+    """
+    Uniform-grid spatial index for bounding-box queries.
+
+    Points are bucketed into a `size` x `size` grid over their bounding box
+    and stored cell by cell, row-major, with an offset array marking where
+    each cell starts. The cells a box overlaps in one grid row are therefore
+    one contiguous slice, so a query touches only the points in those cells
+    and then applies the exact bounds and the caller's row mask together in
+    one vectorised pass.
+    """
+
+    def __init__(self, lon: np.ndarray, lat: np.ndarray, size: int | None = None):
+        lon = np.asarray(lon, dtype=np.float32)
+        lat = np.asarray(lat, dtype=np.float32)
+        n = len(lon)
+        # About 16 points per cell on average by default.
+        self.size = size or int(np.clip(np.sqrt(n / 16), 1, 1024))
+        if n:
+            self.x0, self.x1 = float(lon.min()), float(lon.max())
+            self.y0, self.y1 = float(lat.min()), float(lat.max())
+        else:
+            self.x0 = self.x1 = self.y0 = self.y1 = 0.0
+        cx, cy = self._cell(lon, self.x0, self.x1), self._cell(lat, self.y0, self.y1)
+        cells = cy * self.size + cx
+        self.order = np.argsort(cells, kind="stable")
+        self.starts = np.searchsorted(cells[self.order], np.arange(self.size * self.size + 1))
+        self.lon = lon[self.order]
+        self.lat = lat[self.order]
+        self.n_points = n
+
+    def _cell(self, values, lo: float, hi: float) -> np.ndarray:
+        span = (hi - lo) or 1.0
+        scaled = (np.asarray(values, dtype=np.float64) - lo) / span * self.size
+        return np.clip(np.floor(scaled), 0, self.size - 1).astype(np.int64)
+
+    def query(
+        self,
+        bounds: Bounds,
+        mask: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Positions, ascending and in the caller's row order, of the points
+        inside `bounds` (west, south, east, north) that `mask` selects.
+        """
+        west, south, east, north = bounds
+        if not self.n_points or east < self.x0 or west > self.x1 or north < self.y0 or south > self.y1:
+            return np.zeros(0, dtype=np.int64)
+        cx0, cx1 = self._cell([west, east], self.x0, self.x1)
+        cy0, cy1 = self._cell([south, north], self.y0, self.y1)
+        rows = np.arange(cy0, cy1 + 1) * self.size
+        lo, hi = self.starts[rows + cx0], self.starts[rows + cx1 + 1]
+        lengths = hi - lo
+        if lengths.sum() > self.n_points // 4:
+            # A box covering most of the data is cheaper to scan whole.
+            lon, lat, positions = self.lon, self.lat, self.order
+        else:
+            # Concatenated aranges lo[i]..hi[i] without a Python loop.
+            offsets = np.repeat(lo - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+            candidates = offsets + np.arange(lengths.sum())
+            lon, lat, positions = self.lon[candidates], self.lat[candidates], self.order[candidates]
+        keep = (lon >= west) & (lon <= east) & (lat >= south) & (lat <= north)
+        if mask is not None:
+            keep &= np.asarray(mask, dtype=bool)[positions]
+        return np.sort(positions[keep])
+
+
+# ── Hectare grid ──────────────────────────────────────────────────────────────
+
+# Census hectare codes: grid row 1-42 running north up the park, then the
+# column letter A-I running east.
+HECTARE_CODE = re.compile(r"^(\d+)([A-Z])$")
+
+
+class HectareGrid:
+    """
+    The census hectare grid as polygons, with per-hectare sighting counts.
+
+    The park's hectares form a regular (rotated) grid, so a least-squares
+    affine map from (row, column) to lon / lat is fitted once to the hectares'
+    point centroids and each hectare's polygon is the image of its unit cell.
+    `codes` / `labels` give each sighting's hectare, in the caller's row
+    order; counting a filter combination is then one np.bincount, so its cost
+    depends on the number of hectares, not on how the sightings are drawn.
+    """
+
+    def __init__(self, codes: np.ndarray, labels: list[str], lon: np.ndarray, lat: np.ndarray):
+        parsed = [HECTARE_CODE.match(str(label)) for label in labels]
+        valid = np.array([m is not None for m in parsed], dtype=bool)
+        self.labels = [str(label) for label, ok in zip(labels, valid) if ok]
+        row = np.array([int(m.group(1)) for m in parsed if m], dtype=np.float64)
+        col = np.array([ord(m.group(2)) - ord("A") for m in parsed if m], dtype=np.float64)
+
+        # Sighting code -> hectare position; -1 for missing or malformed codes.
+        lookup = np.full(len(labels) + 1, -1, dtype=np.int64)
+        lookup[np.flatnonzero(valid)] = np.arange(valid.sum())
+        codes = np.asarray(codes)
+        self.codes = lookup[np.where(codes < 0, len(labels), codes)]
+
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        located = (self.codes >= 0) & np.isfinite(lon) & np.isfinite(lat)
+        n = len(self.labels)
+        seen = np.bincount(self.codes[located], minlength=n)
+        cx = np.bincount(self.codes[located], weights=lon[located], minlength=n)
+        cy = np.bincount(self.codes[located], weights=lat[located], minlength=n)
+        fit = seen > 0
+        design = np.column_stack([np.ones(fit.sum()), row[fit], col[fit]])
+        centroids = np.column_stack([cx[fit], cy[fit]]) / seen[fit, None]
+        self.affine = np.linalg.lstsq(design, centroids, rcond=None)[0]  # (3, 2)
+
+        corners = np.array([(-0.5, -0.5), (-0.5, 0.5), (0.5, 0.5), (0.5, -0.5)])
+        cell_row = row[:, None] + corners[:, 0]
+        cell_col = col[:, None] + corners[:, 1]
+        self.lon = (self.affine[0, 0] + self.affine[1, 0] * cell_row + self.affine[2, 0] * cell_col).astype(np.float32)
+        self.lat = (self.affine[0, 1] + self.affine[1, 1] * cell_row + self.affine[2, 1] * cell_col).astype(np.float32)
+        self.totals = self.counts()
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def counts(self, mask: np.ndarray | None = None) -> np.ndarray:
+        """Sightings per hectare among the rows `mask` selects (default: all)."""
+        keep = self.codes >= 0
+        if mask is not None:
+            keep &= np.asarray(mask, dtype=bool)
+        return np.bincount(self.codes[keep], minlength=len(self.labels))
+
+    def rates(self, mask: np.ndarray) -> np.ndarray:
+        """Share of each hectare's sightings that `mask` selects (0 where it has none)."""
+        return np.divide(self.counts(mask), self.totals, out=np.zeros(len(self.labels)), where=self.totals > 0)
+
+
+# ── Kernel density ────────────────────────────────────────────────────────────
+
+# Gaussian kernel bandwidth for the hotspot surface, in metres. Grid cells are
+# a quarter of it, so binning points to cell centres moves the estimate little.
+DEFAULT_BANDWIDTH_M = 40.0
+METRES_PER_DEGREE_LAT = 110_540.0
+METRES_PER_DEGREE_LON = 111_320.0
+
+
+class KernelDensity:
+    """
+    Gaussian kernel density surface of point sightings, by binned FFT
+    convolution.
+
+    At startup each point is assigned, once, to a cell of a fixed grid in
+    local metres covering the points plus a margin of four bandwidths, and
+    the kernel's Fourier transform is computed for the zero-padded grid. The
+    surface for a filter combination is then a np.bincount of the selected
+    points' cells and one real FFT convolution, so its cost is one pass over
+    the mask plus a term in the grid size, not points x cells. Binning to
+    cell centres shifts each point by at most an eighth of a bandwidth, which
+    keeps the surface within a few percent of the peak of a direct per-point
+    sum (benchmarks/bench_density.py).
+
+    `density()` is in sightings per hectare, row 0 at the north edge, over
+    `bounds` (west, south, east, north).
+    """
+
+    def __init__(self, lon: np.ndarray, lat: np.ndarray, bandwidth_m: float = DEFAULT_BANDWIDTH_M):
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        located = np.isfinite(lon) & np.isfinite(lat)
+        self.bandwidth_m = bandwidth_m
+        self.cell_m = bandwidth_m / 4
+        if located.any():
+            west, east = lon[located].min(), lon[located].max()
+            south, north = lat[located].min(), lat[located].max()
+        else:
+            west = east = south = north = 0.0
+
+        self.m_per_lon = METRES_PER_DEGREE_LON * np.cos(np.radians((south + north) / 2))
+        margin = 4 * bandwidth_m
+        west -= margin / self.m_per_lon
+        north += margin / METRES_PER_DEGREE_LAT
+        self.width = int(np.ceil((east - west) * self.m_per_lon / self.cell_m + margin / self.cell_m))
+        self.height = int(np.ceil((north - south) * METRES_PER_DEGREE_LAT / self.cell_m + margin / self.cell_m))
+        east = west + self.width * self.cell_m / self.m_per_lon
+        south = north - self.height * self.cell_m / METRES_PER_DEGREE_LAT
+        self.bounds = (float(west), float(south), float(east), float(north))
+
+        col = np.floor((lon - west) * self.m_per_lon / self.cell_m)
+        row = np.floor((north - lat) * METRES_PER_DEGREE_LAT / self.cell_m)
+        # Points without coordinates go to one spare cell past the grid.
+        cells = np.where(located, row * self.width + col, self.width * self.height)
+        self.cells = np.nan_to_num(cells, nan=self.width * self.height).astype(np.int32)
+
+        # Kernel truncated at four bandwidths, normalised to sum to one over
+        # cells; the grid is zero-padded by its radius so the FFT's circular
+        # convolution does not wrap density across the edges.
+        radius = int(np.ceil(4 * bandwidth_m / self.cell_m))
+        offsets = np.arange(-radius, radius + 1) * self.cell_m
+        kernel = np.exp(-0.5 * (offsets / bandwidth_m) ** 2)
+        kernel = np.outer(kernel, kernel)
+        kernel /= kernel.sum()
+        self._radius = radius
+        self._shape = (self.height + 2 * radius, self.width + 2 * radius)
+        padded = np.zeros(self._shape)
+        padded[: 2 * radius + 1, : 2 * radius + 1] = kernel
+        self._kernel_fft = np.fft.rfft2(np.roll(padded, (-radius, -radius), axis=(0, 1)))
+
+    def counts(self, mask: np.ndarray | None = None) -> np.ndarray:
+        """Selected sightings per grid cell, as a (height, width) array."""
+        cells = self.cells if mask is None else self.cells[np.asarray(mask, dtype=bool)]
+        n_cells = self.width * self.height
+        return np.bincount(cells, minlength=n_cells + 1)[:n_cells].reshape(self.height, self.width)
+
+    def density(self, mask: np.ndarray | None = None) -> np.ndarray:
+        """Kernel density of the selected sightings, in sightings per hectare."""
+        grid = np.zeros(self._shape)
+        grid[: self.height, : self.width] = self.counts(mask)
+        smoothed = np.fft.irfft2(np.fft.rfft2(grid) * self._kernel_fft, s=self._shape)
+        cell_ha = self.cell_m**2 / 10_000
+        # Rounding noise from the transform can dip just below zero.
+        return np.clip(smoothed[: self.height, : self.width], 0, None) / cell_ha
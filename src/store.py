@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+# Low-cardinality text columns held as pandas Categoricals (int8/int16 codes).
+CATEGORY_COLS = [
+    "shift",
+    "primary_fur_color",
+    "age",
+    "hectare",
+]
+
+# Redundant with the float32 longitude / latitude columns.
+DROP_COLS = ["x", "y", "lat/long", "geometry"]
+
+# ── Columnar store ────────────────────────────────────────────────────────────
+
+
+class SquirrelStore:
+    """
+    The one in-memory copy of the processed census, shared by both app tabs.
+
+    - CATEGORY_COLS are Categoricals: small integer codes plus one label list
+    - every boolean column (behaviours, vocalisations, interactions) is a
+      packed little-endian bitset, one bit per row
+    - longitude / latitude are float32 arrays
+    - remaining columns keep the dtype they were loaded with
+
+    `frame()` assembles DataFrames on demand from these arrays. Without a
+    mask, categorical, float and text columns are handed over without copying;
+    only the requested boolean columns are unpacked.
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, object],
+        flags: dict[str, np.ndarray],
+        n_rows: int,
+        order: list[str],
+    ):
+        self.columns = columns
+        self.flags = flags
+        self.n_rows = n_rows
+        self.order = order
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, lon=None, lat=None) -> SquirrelStore:
+        """
+        Build a store from a processed DataFrame. lon / lat default to the
+        frame's x / y columns.
+        """
+        lon = df["x"] if lon is None else lon
+        lat = df["y"] if lat is None else lat
+        columns: dict[str, object] = {}
+        flags: dict[str, np.ndarray] = {}
+        order: list[str] = []
+        for col in df.columns:
+            if col in DROP_COLS:
+                continue
+            series = df[col]
+            if pd.api.types.is_bool_dtype(series):
+                flags[col] = np.packbits(series.to_numpy(dtype=bool), bitorder="little")
+            elif col in CATEGORY_COLS:
+                columns[col] = pd.Categorical(series)
+            else:
+                columns[col] = series.array
+            order.append(col)
+        columns["longitude"] = np.asarray(lon, dtype=np.float32)
+        columns["latitude"] = np.asarray(lat, dtype=np.float32)
+        order += ["longitude", "latitude"]
+        return cls(columns, flags, len(df), order)
+
+    def _column(self, name: str, mask: np.ndarray | None):
+        if name in self.flags:
+            values = np.unpackbits(self.flags[name], count=self.n_rows, bitorder="little").view(bool)
+            return values if mask is None else values[mask]
+        values = self.columns[name]
+        if mask is None:
+            return values
+        if isinstance(values, pd.Categorical):
+            return pd.Categorical.from_codes(values.codes[mask], dtype=values.dtype)
+        return values[mask]
+
+    def frame(
+        self,
+        columns: Iterable[str] | None = None,
+        mask: np.ndarray | None = None,
+    ) -> pd.DataFrame:
+        """DataFrame of the given columns (default: all), optionally for masked rows only."""
+        names = self.order if columns is None else [c for c in columns if c in self.order]
+        return pd.DataFrame(
+            {name: self._column(name, mask) for name in names},
+            copy=False,
+        )
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store's arrays."""
+        total = sum(bits.nbytes for bits in self.flags.values())
+        for values in self.columns.values():
+            if isinstance(values, pd.Categorical):
+                total += values.codes.nbytes + pd.Series(values.categories).memory_usage(deep=True)
+            else:
+                total += pd.Series(values, copy=False).memory_usage(deep=True, index=False)
+        return int(total)
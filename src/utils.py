@@ -1,17 +1,21 @@
+FUR_PALETTE = {
+    "Gray": "#808080",
+    "Cinnamon": "#B87333",
+    "Black": "#1F1F1F",
+    "Unknown": "#4AA3DF",
+}
+FUR_FALLBACK = "#6E8BAA"
+
+SHIFT_PALETTE = {
+    "AM": "#D9C27A",
+    "PM": "#5B87D9"
+}
+SHIFT_FALLBACK = "#A0A0A0"
+
 def color_for_fur(fur: str) -> str:
     """Returns a hex color string based on the squirrel's primary fur color."""
-    palette = {
-        "Gray": "#808080",
-        "Cinnamon": "#B87333",
-        "Black": "#1F1F1F",
-        "Unknown": "#4AA3DF",
-    }
-    return palette.get(fur, "#6E8BAA")
+    return FUR_PALETTE.get(fur, FUR_FALLBACK)
 
 def color_for_shift(shift: str) -> str:
     """Returns a hex color string based on the observation shift."""
-    palette = {
-        "AM": "#D9C27A",
-        "PM": "#5B87D9"
-    }
-    return palette.get(shift, "#A0A0A0")
\ No newline at end of file
+    return SHIFT_PALETTE.get(shift, SHIFT_FALLBACK)
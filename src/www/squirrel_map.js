@@ -0,0 +1,303 @@
+// Columnar point layer for the squirrel map.
+//
+// The server ships every sighting as one payload: base64 float32 lon/lat
+// arrays plus dictionary-encoded attribute columns (see map_render.py).
+// Markers are styled client-side from the fur palette and tooltips are only
+// built when a marker is actually hovered.
+//
+// The map document is built once per session; afterwards the server only
+// sends small update messages (visibility bitmask, legend state, basemap,
+// clusters, hectare counts, hotspot images) which squirrelMapWidget applies in place. The widget reports the
+// map's zoom and bounds back to Shiny so clusters can follow the view. For
+// large datasets the document embeds no points and the server sends only the
+// filtered points around the current view, replacing the layer as it pans.
+(function (global) {
+    "use strict";
+
+    var CODE_ARRAYS = {uint8: Uint8Array, uint16: Uint16Array, uint32: Uint32Array};
+
+    function decodeBytes(b64) {
+        var bin = global.atob(b64);
+        var bytes = new Uint8Array(bin.length);
+        for (var i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+        return bytes.buffer;
+    }
+
+    function escapeHtml(value) {
+        return String(value)
+            .replace(/&/g, "&amp;")
+            .replace(/</g, "&lt;")
+            .replace(/>/g, "&gt;")
+            .replace(/"/g, "&quot;")
+            .replace(/'/g, "&#x27;");
+    }
+
+    function decodeColumn(field) {
+        return {
+            name: field.name,
+            title: field.title,
+            labels: field.labels,
+            codes: new CODE_ARRAYS[field.dtype](decodeBytes(field.codes)),
+        };
+    }
+
+    function decodePayload(payload) {
+        var columns = {};
+        var fields = payload.fields.map(decodeColumn);
+        fields.forEach(function (col) { columns[col.name] = col; });
+        return {
+            n: payload.n,
+            lon: new Float32Array(decodeBytes(payload.lon)),
+            lat: new Float32Array(decodeBytes(payload.lat)),
+            fields: fields,
+            columns: columns,
+        };
+    }
+
+    function tooltipFor(data, i) {
+        var rows = data.fields.map(function (col) {
+            var label = col.labels[col.codes[i]];
+            return "<b>" + escapeHtml(col.title) + ":</b> " + escapeHtml(label);
+        });
+        return '<div style="max-width:250px;">' + rows.join("<br/>") + "</div>";
+    }
+
+    // Build a feature group holding one canvas circle marker per point.
+    global.squirrelPointLayer = function (payload, options) {
+        var data = decodePayload(payload);
+        var colourBy = data.columns[options.colourField];
+        var renderer = L.canvas({padding: 0.5});
+        var group = L.featureGroup();
+        group.markers = new Array(data.n);
+
+        for (var i = 0; i < data.n; i++) {
+            var key = colourBy ? colourBy.labels[colourBy.codes[i]] : null;
+            var colour = options.palette[key] || options.fallback;
+            var marker = L.circleMarker([data.lat[i], data.lon[i]], {
+                renderer: renderer,
+                radius: 4,
+                color: colour,
+                fill: true,
+                fillColor: colour,
+                fillOpacity: 0.8,
+                weight: 0,
+            });
+            marker.bindTooltip(tooltipFor.bind(null, data, i));
+            group.markers[i] = marker;
+            group.addLayer(marker);
+        }
+        return group;
+    };
+
+    function clusterTooltip(data, i) {
+        var rows = ["<b>" + data.count[i].toLocaleString("en-US") + " squirrels</b>"];
+        for (var k = 0; k < data.labels.length; k++) {
+            var n = data.counts[i * data.labels.length + k];
+            if (n) rows.push(escapeHtml(data.labels[k]) + ": " + n.toLocaleString("en-US"));
+        }
+        return rows.join("<br/>");
+    }
+
+    // Grid clusters from the server: one circle per cluster, sized by its
+    // count and coloured by its most common fur colour. Clicking a cluster
+    // zooms in on it.
+    function clusterLayer(map, payload, options) {
+        var data = {
+            n: payload.n,
+            labels: payload.labels,
+            lon: new Float32Array(decodeBytes(payload.lon)),
+            lat: new Float32Array(decodeBytes(payload.lat)),
+            count: new Uint32Array(decodeBytes(payload.count)),
+            counts: new Uint32Array(decodeBytes(payload.counts)),
+        };
+        var renderer = L.canvas({padding: 0.5});
+        var group = L.featureGroup();
+        for (var i = 0; i < data.n; i++) {
+            var top = 0;
+            for (var k = 1; k < data.labels.length; k++) {
+                if (data.counts[i * data.labels.length + k] > data.counts[i * data.labels.length + top]) top = k;
+            }
+            var colour = options.palette[data.labels[top]] || options.fallback;
+            var single = data.count[i] === 1;
+            var marker = L.circleMarker([data.lat[i], data.lon[i]], {
+                renderer: renderer,
+                radius: single ? 4 : Math.min(6 + 3 * Math.sqrt(data.count[i]), 30),
+                color: single ? colour : "#ffffff",
+                weight: single ? 0 : 1.5,
+                fill: true,
+                fillColor: colour,
+                fillOpacity: single ? 0.8 : 0.65,
+            });
+            marker.bindTooltip(clusterTooltip.bind(null, data, i));
+            if (!single) {
+                marker.on("click", function (e) {
+                    map.setView(e.latlng, Math.min(map.getZoom() + 2, map.getMaxZoom()));
+                });
+            }
+            group.addLayer(marker);
+        }
+        return group;
+    }
+
+    var HECTARE_RAMP = ["#ffffb2", "#fecc5c", "#fd8d3c", "#f03b20", "#bd0026"];
+
+    // Hectare choropleth: one polygon per census hectare, built once from the
+    // geometry in the document in a pane below the point layer. setCounts()
+    // restyles the polygons from the per-hectare counts the server sends, so
+    // an update costs one pass over the hectares whatever the number of
+    // sightings.
+    function hectareLayer(map, geometry) {
+        if (!map.getPane("hectares")) map.createPane("hectares").style.zIndex = 350;
+        var lon = new Float32Array(decodeBytes(geometry.lon));
+        var lat = new Float32Array(decodeBytes(geometry.lat));
+        var totals = new Uint32Array(decodeBytes(geometry.totals));
+        var count = new Uint32Array(geometry.n);
+        var renderer = L.canvas({padding: 0.5, pane: "hectares"});
+        var group = L.featureGroup();
+        var polygons = new Array(geometry.n);
+
+        function tooltip(i) {
+            var share = totals[i] ? Math.round(100 * count[i] / totals[i]) : 0;
+            return "<b>Hectare " + escapeHtml(geometry.labels[i]) + "</b><br/>" +
+                count[i].toLocaleString("en-US") + " of " + totals[i].toLocaleString("en-US") +
+                " sightings (" + share + "%)";
+        }
+
+        for (var i = 0; i < geometry.n; i++) {
+            var ring = [];
+            for (var k = 0; k < 4; k++) ring.push([lat[4 * i + k], lon[4 * i + k]]);
+            polygons[i] = L.polygon(ring, {
+                pane: "hectares",
+                renderer: renderer,
+                color: "#555",
+                weight: 0.5,
+                fillOpacity: 0,
+            });
+            polygons[i].bindTooltip(tooltip.bind(null, i));
+            group.addLayer(polygons[i]);
+        }
+
+        group.setCounts = function (payload) {
+            count = new Uint32Array(decodeBytes(payload.count));
+            for (var i = 0; i < geometry.n; i++) {
+                var level = payload.max ? count[i] / payload.max : 0;
+                var step = Math.min(Math.floor(level * HECTARE_RAMP.length), HECTARE_RAMP.length - 1);
+                polygons[i].setStyle({
+                    fillColor: HECTARE_RAMP[step],
+                    fillOpacity: count[i] ? 0.6 : 0,
+                });
+            }
+        };
+        return group;
+    }
+
+    // In-place updates for a rendered map. `points` is a squirrelPointLayer,
+    // `tiles` the current basemap layer.
+    global.squirrelMapWidget = function (map, points, tiles, options) {
+        var visible = new Uint8Array(points.markers.length).fill(1);
+        var clusters = null;
+        var hectares = null;
+        var hotspots = null;
+
+        // Viewport mode: the server replaces the whole point layer with the
+        // filtered points around the current view.
+        function setPoints(payload) {
+            var shown = map.hasLayer(points);
+            map.removeLayer(points);
+            points = global.squirrelPointLayer(payload, options.points);
+            visible = new Uint8Array(points.markers.length).fill(1);
+            if (shown) points.addTo(map);
+        }
+
+        function applyMask(b64) {
+            var bits = new Uint8Array(decodeBytes(b64));
+            for (var i = 0; i < visible.length; i++) {
+                var on = (bits[i >> 3] >> (i & 7)) & 1;
+                if (on === visible[i]) continue;
+                visible[i] = on;
+                if (on) points.addLayer(points.markers[i]);
+                else points.removeLayer(points.markers[i]);
+            }
+        }
+
+        function setTiles(spec) {
+            if (tiles._url === spec.url) return;
+            var next = L.tileLayer(spec.url, spec.options).addTo(map);
+            next.bringToBack();
+            map.removeLayer(tiles);
+            tiles = next;
+        }
+
+        // Clusters replace the point layer until the server sends null.
+        function setClusters(payload) {
+            if (clusters) map.removeLayer(clusters);
+            clusters = null;
+            if (payload) {
+                map.removeLayer(points);
+                clusters = clusterLayer(map, payload, options).addTo(map);
+            } else if (!map.hasLayer(points)) {
+                points.addTo(map);
+            }
+        }
+
+        // The choropleth stays on the map until the server sends null.
+        function setHectares(payload) {
+            if (!payload) {
+                if (hectares) map.removeLayer(hectares);
+                return;
+            }
+            if (!options.hectares) return;
+            if (!hectares) hectares = hectareLayer(map, options.hectares);
+            hectares.setCounts(payload);
+            if (!map.hasLayer(hectares)) hectares.addTo(map);
+        }
+
+        // Kernel density hotspots: a server-rendered PNG stretched over its
+        // bounds, in a pane between the hectare polygons and the points.
+        function setHotspots(payload) {
+            if (!payload) {
+                if (hotspots) map.removeLayer(hotspots);
+                hotspots = null;
+                return;
+            }
+            if (!map.getPane("hotspots")) map.createPane("hotspots").style.zIndex = 360;
+            if (hotspots) {
+                hotspots.setUrl(payload.image);
+                hotspots.setBounds(payload.bounds);
+            } else {
+                hotspots = L.imageOverlay(payload.image, payload.bounds, {
+                    pane: "hotspots",
+                    interactive: false,
+                }).addTo(map);
+            }
+        }
+
+        function reportView() {
+            if (!global.parent || !global.parent.Shiny || !global.parent.Shiny.setInputValue) return;
+            var b = map.getBounds();
+            global.parent.Shiny.setInputValue("map_view_state", {
+                zoom: map.getZoom(),
+                west: b.getWest(),
+                south: b.getSouth(),
+                east: b.getEast(),
+                north: b.getNorth(),
+            });
+        }
+        map.on("moveend", reportView);
+        reportView();
+
+        return {
+            update: function (msg) {
+                if (msg.points) setPoints(msg.points);
+                if (msg.mask) applyMask(msg.mask);
+                if (msg.tiles) setTiles(msg.tiles);
+                if ("clusters" in msg) setClusters(msg.clusters);
+                if ("hectares" in msg) setHectares(msg.hectares);
+                if ("hotspots" in msg) setHotspots(msg.hotspots);
+                if (msg.legend && global.squirrelLegend) {
+                    global.squirrelLegend.update(msg.legend.selected, msg.legend.total);
+                }
+            },
+        };
+    };
+})(window);
@@ -0,0 +1,21 @@
+"""Shared helper for the tests in this folder that drive coroutines."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Coroutine
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion on a fresh event loop in a worker thread.
+
+    Playwright's sync fixtures (tests/test_app.py) leave an event loop
+    running on the main thread for the rest of the session, and there
+    asyncio.run() refuses to start another.
+    """
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
@@ -0,0 +1,79 @@
+import duckdb
+import numpy as np
+import pandas as pd
+
+from aggregations import chart_counts, query_counts
+from filter_index import FilterIndex
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        "primary_fur_color": rng.choice(["Gray", "Cinnamon", "Black", "Unknown"], size=n),
+        "shift": rng.choice(["AM", "PM"], size=n),
+        "running": rng.random(n) < 0.2,
+        "eating": rng.random(n) < 0.3,
+        "tail_flags": rng.random(n) < 0.05,
+    })
+
+
+def test_chart_counts_match_pandas_group_counts():
+    """Verifies the single-pass bincount aggregation returns the same per-category counts as pandas value_counts on the filtered rows."""
+    df = _frame()
+    index = FilterIndex(df, ["primary_fur_color", "shift"], flags=["running", "eating", "tail_flags"])
+    mask = (df["shift"] == "PM").to_numpy()
+
+    counts = chart_counts(index, mask, ["primary_fur_color", "shift"], flags=["running", "eating", "tail_flags"], top_n=2)
+
+    expected = df[mask]["primary_fur_color"].value_counts()
+    got = counts["primary_fur_color"].set_index("primary_fur_color")["count"]
+    assert got.sort_index().to_dict() == expected.sort_index().to_dict()
+    assert counts["shift"].to_dict("records") == [{"shift": "PM", "count": int(mask.sum())}]
+    assert counts["total"]["count"].iloc[0] == mask.sum()
+
+    assert counts["behavior"]["behavior"].tolist() == ["Eating", "Running"]
+    assert counts["behavior"]["count"].tolist() == [
+        int(df[mask]["eating"].sum()),
+        int(df[mask]["running"].sum()),
+    ]
+
+
+def test_chart_counts_empty_mask():
+    """Ensures an empty filter result yields empty category tables and a zero total rather than an error."""
+    df = _frame()
+    index = FilterIndex(df, ["primary_fur_color", "shift"], flags=["running"])
+    counts = chart_counts(index, np.zeros(len(df), dtype=bool), ["primary_fur_color", "shift"], flags=["running"])
+    assert counts["primary_fur_color"].empty
+    assert counts["total"]["count"].iloc[0] == 0
+
+
+def test_query_counts_match_chart_counts_for_the_same_rows():
+    """Checks that the DuckDB aggregate of a SQL filter returns the same tables as the bitmap aggregation of the equivalent mask."""
+    df = _frame()
+    con = duckdb.connect()
+    con.execute("CREATE TABLE squirrels AS SELECT * FROM df")
+    index = FilterIndex(df, ["primary_fur_color", "shift"], flags=["running", "eating", "tail_flags"])
+    mask = ((df["shift"] == "AM") & df["eating"]).to_numpy()
+    flags = ["running", "eating", "tail_flags"]
+
+    got = query_counts(con, "SELECT * FROM squirrels WHERE shift = 'AM' AND eating;", ["primary_fur_color", "shift"], flags, top_n=2)
+    expected = chart_counts(index, mask, ["primary_fur_color", "shift"], flags=flags, top_n=2)
+    for key in ["primary_fur_color", "shift", "behavior", "total"]:
+        pd.testing.assert_frame_equal(
+            got[key].sort_values(got[key].columns[0]).reset_index(drop=True),
+            expected[key].sort_values(expected[key].columns[0]).reset_index(drop=True),
+            check_dtype=False,
+        )
+
+
+def test_query_counts_skip_columns_the_query_drops():
+    """Ensures columns and flags missing from a query's result are left out instead of failing, and an empty result counts zero."""
+    df = _frame()
+    con = duckdb.connect()
+    con.execute("CREATE TABLE squirrels AS SELECT * FROM df")
+    counts = query_counts(con, "SELECT shift, running FROM squirrels WHERE false", ["primary_fur_color", "shift"], ["running", "eating"])
+    assert "primary_fur_color" not in counts
+    assert counts["shift"].empty
+    assert counts["behavior"]["behavior"].tolist() == ["Running"]
+    assert counts["total"]["count"].iloc[0] == 0
@@ -0,0 +1,139 @@
+import duckdb
+import pandas as pd
+import pytest
+from chatlas import AssistantTurn, ContentToolRequest, ContentToolResult, UserTurn
+from querychat import QueryChat
+from querychat.types import MissingColumnsError, UnsafeQueryError
+
+from _async import run_async
+from chat_source import CachedChat, DuckDBSource, StubChat, chat_database, dashboard_action
+from prompt_cache import CachedQuery, PromptCache
+from store import SquirrelStore
+
+
+def _database(tmp_path):
+    df = pd.DataFrame({
+        "x": [-73.97, -73.96, -73.95],
+        "y": [40.78, 40.79, 40.80],
+        "lat/long": ["POINT (-73.97 40.78)", "POINT (-73.96 40.79)", "POINT (-73.95 40.80)"],
+        "unique_squirrel_id": ["1A-AM-1006-01", "2B-PM-1007-02", "3C-AM-1006-03"],
+        "shift": ["AM", "PM", "AM"],
+        "running": [True, False, False],
+    })
+    path = tmp_path / "squirrels.parquet"
+    duckdb.sql("SELECT * FROM df").write_parquet(str(path))
+    store = SquirrelStore.from_frame(duckdb.sql(f"SELECT * FROM read_parquet('{path.as_posix()}')").df())
+    return chat_database(store.frame(), "squirrels")
+
+
+def test_chat_source_runs_queries_inside_duckdb(tmp_path):
+    """Verifies generated SQL runs on the store's frame, from any cursor, with coordinates exposed as longitude / latitude."""
+    database = _database(tmp_path)
+    source = DuckDBSource(database.con, "squirrels")
+    assert source.get_db_type() == "DuckDB"
+    assert database.cursor().execute("SELECT count(*) FROM squirrels WHERE shift = 'Night'").fetchone() == (0,)
+    result = source.execute_query("SELECT * FROM squirrels WHERE shift = 'AM'")
+    assert result["unique_squirrel_id"].tolist() == ["1A-AM-1006-01", "3C-AM-1006-03"]
+    assert list(result.columns) == ["unique_squirrel_id", "shift", "running", "longitude", "latitude"]
+    assert "Categorical values: 'AM', 'PM'" in source.get_schema(categorical_threshold=10)
+    assert len(source.get_data()) == 3
+
+
+def test_chat_source_rejects_writes_files_and_partial_filters(tmp_path):
+    """Ensures write statements and file access are refused, and filter queries must keep every column."""
+    source = DuckDBSource(_database(tmp_path).con, "squirrels")
+    with pytest.raises(UnsafeQueryError):
+        source.execute_query("DROP TABLE squirrels")
+    with pytest.raises(duckdb.PermissionException):
+        source.execute_query(f"SELECT * FROM read_parquet('{(tmp_path / 'squirrels.parquet').as_posix()}')")
+    with pytest.raises(MissingColumnsError):
+        source.test_query("SELECT shift FROM squirrels", require_all_columns=True)
+    assert len(source.test_query("SELECT * FROM squirrels", require_all_columns=True)) == 1
+
+
+def _ask(qc, prompt):
+    updates = []
+    client = qc.client(update_dashboard=updates.append, reset_dashboard=lambda table: updates.append(None))
+
+    async def main():
+        return [chunk async for chunk in await client.stream_async(prompt, content="all")]
+
+    return updates, run_async(main()), client
+
+
+def test_stub_client_filters_offline_and_fills_the_cache(tmp_path):
+    """Verifies the stub translates keywords to a filter through querychat's tool, and that a repeated prompt is served from the cache."""
+    source = DuckDBSource(_database(tmp_path).con, "squirrels")
+    cache = PromptCache()
+    stub = StubChat(cache, source.schema_version(), "squirrels", {"shift": ["AM", "PM"]}, flags=["running"], synonyms={"morning": "AM"})
+    qc = QueryChat(source, "squirrels", client=stub, greeting="Hi", tools="update")
+
+    updates, chunks, client = _ask(qc, "Morning squirrels that were running")
+    assert updates == [{"table": "squirrels", "query": 'SELECT * FROM "squirrels" WHERE "shift" IN (\'AM\') AND "running"', "title": "AM running squirrels"}]
+    assert isinstance(chunks[0], ContentToolRequest) and isinstance(chunks[1], ContentToolResult)
+    assert len(client.get_turns()) == 4
+    assert source.execute_query(updates[0]["query"])["unique_squirrel_id"].tolist() == ["1A-AM-1006-01"]
+
+    assert _ask(qc, "morning squirrels that were RUNNING.")[0] == updates
+    assert _ask(qc, "show everything")[0] == [None]
+    assert _ask(qc, "all morning squirrels")[0][0]["title"] == "AM squirrels"
+    assert _ask(qc, "show me all of them again")[0] == [None]
+    assert _ask(qc, "what is a squirrel?")[0] == []
+    assert cache.stats()["hits"] == 1 and cache.stats()["size"] == 4
+
+
+def test_follow_up_prompts_are_cached_per_conversation(tmp_path):
+    """Ensures a follow-up prompt neither hits nor overwrites the entry for the same text asked as a first prompt."""
+    source = DuckDBSource(_database(tmp_path).con, "squirrels")
+    cache = PromptCache()
+    version = source.schema_version()
+    cache.put(version, "now only the running ones", 'SELECT * FROM "squirrels" WHERE "shift" IN (\'PM\')', "PM squirrels")
+    stub = StubChat(cache, version, "squirrels", {"shift": ["AM", "PM"]}, flags=["running"], synonyms={"morning": "AM"})
+    qc = QueryChat(source, "squirrels", client=stub, greeting="Hi", tools="update")
+
+    updates = []
+    client = qc.client(update_dashboard=updates.append, reset_dashboard=lambda table: updates.append(None))
+
+    async def main():
+        for prompt in ["morning squirrels", "now only the running ones"]:
+            [chunk async for chunk in await client.stream_async(prompt)]
+
+    run_async(main())
+    assert [update["title"] for update in updates] == ["AM squirrels", "Running squirrels"]
+    assert cache.stats()["hits"] == 0
+
+    # The same conversation again is answered from the cache, turn by turn.
+    updates.clear()
+    client = qc.client(update_dashboard=updates.append, reset_dashboard=lambda table: updates.append(None))
+    run_async(main())
+    assert [update["title"] for update in updates] == ["AM squirrels", "Running squirrels"]
+    assert cache.stats()["hits"] == 2
+    assert cache.get(version, "now only the running ones").title == "PM squirrels"
+    assert _ask(qc, "now only the running ones")[0][0]["title"] == "PM squirrels"
+
+
+def test_cached_chat_replays_without_the_model_and_records_its_filters(tmp_path):
+    """Ensures a cache hit never reaches the provider, a stale entry is dropped, and only filter-only turns are recorded."""
+    source = DuckDBSource(_database(tmp_path).con, "squirrels")
+    cache = PromptCache()
+    version = source.schema_version()
+    cache.put(version, "PM squirrels", 'SELECT * FROM "squirrels" WHERE shift = \'PM\'', "PM squirrels")
+    qc = QueryChat(source, "squirrels", client=CachedChat(None, cache, version, "squirrels"), greeting="Hi", tools="update")
+
+    updates, chunks, _ = _ask(qc, "pm squirrels")
+    assert updates[0]["query"] == 'SELECT * FROM "squirrels" WHERE shift = \'PM\''
+    assert chunks[-1] == "Filtered to **PM squirrels**."
+
+    # SQL that no longer validates is dropped and the prompt goes to the translator.
+    cache.put(version, "old squirrels", 'SELECT shift FROM "squirrels"', "Old")
+    stub = QueryChat(source, "squirrels", client=StubChat(cache, version, "squirrels", {}), greeting="Hi", tools="update")
+    assert _ask(stub, "old squirrels")[0] == []
+    assert cache.get(version, "old squirrels") is None
+
+    update = ContentToolRequest(id="1", name="querychat_update_dashboard", arguments={"table": "squirrels", "query": "SELECT 1", "title": "One"})
+    query = ContentToolRequest(id="2", name="querychat_query", arguments={"query": "SELECT 2"})
+    turns = [UserTurn("one"), AssistantTurn([update]), UserTurn([ContentToolResult(value="ok", request=update)]), AssistantTurn("Done.")]
+    assert dashboard_action(turns) == CachedQuery("SELECT 1", "One")
+    assert dashboard_action([*turns, AssistantTurn([query])]) is None
+    failed = ContentToolResult(value="bad", error=Exception("bad"), request=update)
+    assert dashboard_action([turns[1], UserTurn([failed])]) is None
@@ -0,0 +1,199 @@
+import shutil
+from functools import partial
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import Point
+
+from data_processing import (
+    POINT_DTYPE,
+    build,
+    fill_unknown,
+    load_catalog,
+    load_points,
+    parquet_source,
+    point_records,
+    to_bool,
+    write_catalog,
+    write_partitioned,
+    write_points,
+)
+
+
+def test_to_bool_matches_string_normalisation():
+    """Verifies that the per-distinct-value to_bool gives exactly the result of normalising every string in turn."""
+    import pandas as pd
+
+    for series in [
+        pd.Series(["True", " yes", "no", None, np.nan, "T", "1", "0"], name="kuks", index=[7, 6, 5, 4, 3, 2, 1, 0]),
+        pd.Series([True, None, False], dtype=object),
+        pd.Series([1.0, np.nan, 0.0]),
+    ]:
+        expected = series.astype(str).str.strip().str.lower().isin({"true", "t", "1", "yes"}).fillna(False)
+        pd.testing.assert_series_equal(to_bool(series), expected)
+
+
+def test_fill_unknown_matches_fillna_replace():
+    """Ensures fill_unknown keeps the dtype, index and values of the fillna / replace chain it stands in for."""
+    import pandas as pd
+
+    for series in [
+        pd.Series(["Gray", "?", None, "Black"], name="primary_fur_color"),
+        pd.Series(["Adult", "?", np.nan], dtype=object, index=[2, 1, 0]),
+    ]:
+        pd.testing.assert_series_equal(fill_unknown(series), series.fillna("Unknown").replace("?", "Unknown"))
+
+
+def test_point_sidecar_round_trips_as_memory_map(tmp_path):
+    """Verifies that the point sidecar is read back as a read-only memory map with the same ids and float32 coordinates."""
+    path = tmp_path / "points.npy"
+    write_points(point_records(["1A-AM-1006-01", "2B-PM-1007-02"], [-73.97, -73.96], [40.78, 40.79]), str(path))
+    records = load_points(str(path), fallback=None)
+    assert isinstance(records, np.memmap)
+    assert not records.flags.writeable
+    assert records.dtype == POINT_DTYPE
+    assert records["unique_squirrel_id"].tolist() == [b"1A-AM-1006-01", b"2B-PM-1007-02"]
+    np.testing.assert_allclose(records["latitude"], [40.78, 40.79], rtol=1e-6)
+
+
+def test_missing_sidecar_falls_back_to_geojson(tmp_path):
+    """Ensures the app can still start from the processed GeoJSON when the point sidecar has not been built."""
+    geojson = tmp_path / "squirrels.geojson"
+    gpd.GeoDataFrame(
+        {"unique_squirrel_id": ["1A-AM-1006-01"]},
+        geometry=[Point(-73.97, 40.78)],
+        crs="EPSG:4326",
+    ).to_file(geojson, driver="GeoJSON")
+    records = load_points(str(tmp_path / "missing.npy"), fallback=str(geojson))
+    assert records["unique_squirrel_id"].tolist() == [b"1A-AM-1006-01"]
+    np.testing.assert_allclose(records["longitude"], [-73.97], rtol=1e-6)
+
+
+def test_streaming_csv_matches_pandas_pipeline(tmp_path):
+    """Checks that the DuckDB streaming pipeline writes the same Parquet rows and point sidecar as the pandas one, and that neither falls back to the app's catalog path for outputs written elsewhere."""
+    import duckdb
+    import pandas as pd
+
+    from data_processing import process_csv, process_csv_streaming
+
+    raw = tmp_path / "raw.csv"
+    raw.write_text(
+        '"X","Y","Unique Squirrel ID","Shift","Date","Age","Primary Fur Color",'
+        '"Running","Chasing","Climbing","Eating","Foraging","Kuks"\n'
+        '-73.97,40.78,"1A-AM-1006-01","AM","10062018","Adult","Gray",true,false,false,false,yes,false\n'
+        '-73.96,40.79,"2B-PM-1007-02","PM","10072018","?",,false,true,false,true,no,true\n'
+        '-73.95,40.80,"3C-AM-1006-03",,"10062018",,"Black",false,false,true,false,,false\n'
+    )
+    outputs = {}
+    for name, process in [("pandas", process_csv), ("stream", process_csv_streaming)]:
+        with pytest.raises(ValueError):
+            process(str(raw), str(tmp_path / "s.csv"), str(tmp_path / "s.parquet"), str(tmp_path / "p.npy"))
+        out = tmp_path / name
+        out.mkdir()
+        process(str(raw), str(out / "s.csv"), str(out / "s.parquet"), str(out / "p.npy"), str(out / "catalog.json"))
+        outputs[name] = (
+            duckdb.execute(f"SELECT * FROM read_parquet('{out / 's.parquet'}')").df(),
+            np.load(out / "p.npy"),
+            pd.read_csv(out / "s.csv"),
+        )
+    expected, got = outputs["pandas"], outputs["stream"]
+    pd.testing.assert_frame_equal(got[0], expected[0])
+    assert got[0]["foraging"].tolist() == [True, False, False]
+    assert got[0]["age"].tolist() == ["Adult", "Unknown", "Unknown"]
+    assert got[1].tobytes() == expected[1].tobytes()
+    pd.testing.assert_frame_equal(got[2], expected[2])
+
+
+def test_build_skips_stages_whose_inputs_and_outputs_are_unchanged(tmp_path):
+    """Checks that the manifest build reruns only the stage whose raw input, output or run flags changed."""
+    stages = {}
+    for name in ("a", "b"):
+        raw, out = tmp_path / f"{name}.raw", tmp_path / f"{name}.out"
+        raw.write_text(name)
+        stages[name] = {"run": partial(shutil.copyfile, raw, out), "inputs": [str(raw)], "outputs": [str(out)]}
+    manifest = str(tmp_path / "manifest.json")
+
+    assert build(stages, manifest) == {"a": True, "b": True}
+    assert build(stages, manifest) == {"a": False, "b": False}
+
+    (tmp_path / "a.raw").write_text("a, resurveyed")
+    assert build(stages, manifest) == {"a": True, "b": False}
+    assert (tmp_path / "a.out").read_text() == "a, resurveyed"
+
+    (tmp_path / "b.out").unlink()
+    assert build(stages, manifest) == {"a": False, "b": True}
+
+    stages["a"] = {**stages["a"], "flags": ["--streaming"]}
+    assert build(stages, manifest) == {"a": True, "b": False}
+    assert build(stages, manifest) == {"a": False, "b": False}
+
+
+def test_catalog_summarises_parquet_and_detects_staleness(tmp_path):
+    """Verifies the catalog's counts, date range and bounds, and that it is ignored once the Parquet file is rewritten."""
+    import duckdb
+
+    parquet, catalog_path = tmp_path / "s.parquet", tmp_path / "catalog.json"
+
+    def write(n, even="AM", odd="PM"):
+        duckdb.execute(f"""
+            COPY (
+                SELECT -73.97 + i / 100 AS x, 40.78 + i / 100 AS y,
+                       CASE WHEN i % 2 = 0 THEN '{even}' ELSE '{odd}' END AS shift,
+                       TIMESTAMP '2018-10-06' + INTERVAL (i) DAY AS date
+                FROM range({n}) t(i)
+            ) TO '{parquet}' (FORMAT PARQUET)
+        """)
+
+    write(3)
+    catalog = write_catalog(str(parquet), str(catalog_path))
+    assert catalog["row_count"] == 3
+    assert catalog["categories"] == {"shift": [["AM", 2], ["PM", 1]]}
+    assert catalog["date_range"] == ["2018-10-06", "2018-10-08"]
+    np.testing.assert_allclose(catalog["bbox"], [-73.97, 40.78, -73.95, 40.80])
+    assert load_catalog(str(catalog_path), str(parquet)) == catalog
+
+    # Corrected values, same size and row count.
+    size = parquet.stat().st_size
+    write(3, even="PM", odd="AM")
+    assert parquet.stat().st_size == size
+    assert load_catalog(str(catalog_path), str(parquet)) is None
+
+    write(300)
+    assert load_catalog(str(catalog_path), str(parquet)) is None
+    assert load_catalog(str(tmp_path / "missing.json"), str(parquet)) is None
+
+
+def test_partitioned_layout_holds_the_same_rows_and_prunes_files(tmp_path):
+    """Checks the Hive-partitioned copy reads back the single file's rows and types, sorted by hectare per partition, and skips files for a date / shift filter."""
+    import duckdb
+
+    single = "data/processed/squirrels.parquet"
+    partitioned = tmp_path / "partitioned"
+    con = duckdb.connect()
+    n_rows = con.execute(f"SELECT count(*) FROM {parquet_source(single)}").fetchone()[0]
+
+    assert write_partitioned(single, str(partitioned), row_group_size=64) == n_rows
+    assert sorted(p.name for p in partitioned.glob("date=2018-10-06/*")) == ["shift=AM", "shift=PM"]
+
+    schema = {row[0]: row[1] for row in con.execute(f"DESCRIBE SELECT * FROM {parquet_source(single)}").fetchall()}
+    types = {row[0]: row[1] for row in con.execute(f"DESCRIBE SELECT * FROM {parquet_source(partitioned)}").fetchall()}
+    assert types == schema
+    columns = ", ".join(f'"{c}"' for c in types)
+    assert con.execute(f"""
+        SELECT count(*) FROM (
+            (SELECT {columns} FROM {parquet_source(single)} EXCEPT ALL SELECT {columns} FROM {parquet_source(partitioned)})
+            UNION ALL
+            (SELECT {columns} FROM {parquet_source(partitioned)} EXCEPT ALL SELECT {columns} FROM {parquet_source(single)})
+        )
+    """).fetchone()[0] == 0
+
+    for path in partitioned.rglob("*.parquet"):
+        hectares = [row[0] for row in con.execute("SELECT hectare FROM read_parquet(?)", [str(path)]).fetchall()]
+        assert hectares == sorted(hectares)
+
+    plan = con.execute(f"""
+        EXPLAIN ANALYZE SELECT count(*) FROM {parquet_source(partitioned)}
+        WHERE date = '2018-10-13' AND shift = 'AM'
+    """).fetchall()[0][1]
+    assert "Scanning Files: 1/" in plan
@@ -0,0 +1,84 @@
+import io
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from _async import run_async
+from chat_source import chat_database
+from exports import stream_export
+from query_pool import QueryPool, SessionCursor
+from store import SquirrelStore
+
+
+def _frame(n):
+    return pd.DataFrame({
+        "x": [-73.95 - i * 1e-5 for i in range(n)],
+        "y": [40.78 + i * 1e-5 for i in range(n)],
+        "lat/long": [f"POINT ({-73.95 - i * 1e-5} {40.78 + i * 1e-5})" for i in range(n)],
+        "unique_squirrel_id": [f"{i:05d}" for i in range(n)],
+        "shift": ["AM", "PM"] * (n // 2),
+        "running": [True, False, False, True] * (n // 4),
+    })
+
+
+def _export(cursor, sql, params=None, fmt="csv", chunk_rows=2048):
+    async def collect():
+        return [chunk async for chunk in stream_export(cursor, sql, params, fmt, chunk_rows)]
+
+    return run_async(collect())
+
+
+def test_csv_export_streams_the_result_in_chunks():
+    """Checks that a CSV export arrives in several chunks whose concatenation matches pandas' to_csv, header once."""
+    df = _frame(8000)
+    con = duckdb.connect()
+    con.execute("CREATE TABLE squirrels AS SELECT * FROM df")
+    cursor = QueryPool(con).cursor()
+    chunks = _export(cursor, "SELECT * FROM squirrels WHERE shift = ?", ["AM"])
+    assert len(chunks) > 1
+    expected = df[df["shift"] == "AM"].to_csv(index=False)
+    assert b"".join(chunks).decode("utf-8") == expected
+
+    empty = _export(QueryPool(con).cursor(), "SELECT * FROM squirrels WHERE shift = 'none'")
+    assert b"".join(empty).decode("utf-8").strip() == ",".join(df.columns)
+
+
+@pytest.mark.parametrize("locked", [False, True])
+def test_parquet_export_round_trips(tmp_path, locked):
+    """Verifies a Parquet export holds the filtered rows, including from the locked-down querychat database."""
+    df = _frame(8000)
+    path = tmp_path / "squirrels.parquet"
+    duckdb.sql("SELECT * FROM df").write_parquet(str(path))
+    source = f"read_parquet('{path.as_posix()}')"
+    main = duckdb.connect()
+    pool = QueryPool(main)
+    if locked:
+        store = SquirrelStore.from_frame(duckdb.sql(f"SELECT * FROM {source}").df())
+        cursor = SessionCursor(pool, chat_database(store.frame(), "squirrels").cursor())
+    else:
+        main.execute(f"CREATE VIEW squirrels AS SELECT * FROM {source}")
+        cursor = pool.cursor()
+    chunks = _export(cursor, "SELECT * FROM squirrels WHERE running", fmt="parquet")
+    out = tmp_path / "export.parquet"
+    out.write_bytes(b"".join(chunks))
+    result = duckdb.sql(f"SELECT * FROM read_parquet('{out.as_posix()}')").df()
+    assert result["unique_squirrel_id"].tolist() == df.loc[df["running"] == True, "unique_squirrel_id"].tolist()
+    assert result["running"].dtype == bool
+
+
+def test_arrow_export_round_trips():
+    """Ensures an Arrow IPC stream export reads back as the query's rows."""
+    df = _frame(8000)
+    con = duckdb.connect()
+    con.execute("CREATE TABLE squirrels AS SELECT * FROM df")
+    chunks = _export(QueryPool(con).cursor(), "SELECT unique_squirrel_id, shift FROM squirrels", fmt="arrow")
+    table = pa.ipc.open_stream(io.BytesIO(b"".join(chunks))).read_all()
+    assert table.column("unique_squirrel_id").to_pylist() == df["unique_squirrel_id"].tolist()
+
+
+def test_unknown_export_format_is_refused():
+    """Ensures an unsupported format raises instead of sending an empty file."""
+    with pytest.raises(ValueError):
+        _export(QueryPool(duckdb.connect()).cursor(), "SELECT 1", fmt="xlsx")
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from filter_index import FilterIndex
+
+
+def _index():
+    df = pd.DataFrame({
+        "shift": ["AM", "PM", "PM", "AM", "PM"],
+        "age": ["Adult", "Juvenile", "Adult", "Unknown", "Adult"],
+        "running": [True, False, False, True, False],
+        "eating": [False, False, True, True, None],
+    })
+    return FilterIndex(df, ["shift", "age"], flags=["running", "eating"])
+
+
+def test_empty_selection_matches_all_rows():
+    """Verifies that an empty selection places no constraint, mirroring the 'show all' sidebar behaviour (Issue #56)."""
+    index = _index()
+    assert index.mask({"shift": [], "age": []}).all()
+    assert index.count({}) == 5
+
+
+def test_values_or_within_column_and_across_columns():
+    """Ensures values are OR'd within a column, columns are AND'd and selected behaviours are OR'd together."""
+    index = _index()
+    mask = index.mask({"shift": ["PM"], "age": ["Adult", "Unknown"]})
+    assert np.flatnonzero(mask).tolist() == [2, 4]
+
+    mask = index.mask({"shift": ["AM", "PM"]}, any_flags=["running", "eating"])
+    assert np.flatnonzero(mask).tolist() == [0, 2, 3]
+    assert index.count({"age": ["Adult"]}, any_flags=["eating"]) == 1
+
+
+def test_unknown_value_matches_nothing():
+    """Checks that selecting a value absent from the data yields no rows, like an SQL IN clause would."""
+    index = _index()
+    assert not index.mask({"shift": ["Night"]}).any()
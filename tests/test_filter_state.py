@@ -0,0 +1,54 @@
+import asyncio
+
+from shiny import reactive
+
+from _async import run_async
+from filter_state import CoalesceStats, SidebarFilters, coalesce
+from render_cache import filter_key
+
+
+def test_sidebar_filters_are_canonical():
+    """Checks that selections compare equal regardless of order, duplicates or None vs empty, and keep the render cache key."""
+    a = SidebarFilters.of(["PM", "AM"], ["Gray", "Black", "Gray"], None, [])
+    b = SidebarFilters.of(("AM", "PM"), ["Black", "Gray"], [], None)
+    assert a == b
+    assert a.key() == filter_key(shift=["AM", "PM"], fur=["Gray", "Black"], age=None, behavior=[])
+
+
+def _drive(delay, steps):
+    async def run():
+        fur = reactive.value(["Gray", "Black"])
+        stats = CoalesceStats()
+        seen = []
+        state = coalesce(lambda: SidebarFilters.of(fur=fur()), delay, stats)
+
+        @reactive.effect
+        def downstream():
+            seen.append(state().fur)
+
+        await reactive.flush()
+        for step in steps:
+            if step is None:
+                await asyncio.sleep(delay + 0.05)
+            else:
+                fur.set(step)
+            await reactive.flush()
+        return seen, stats.stats()
+
+    return run_async(run())
+
+
+def test_coalesce_suppresses_round_trips_to_the_same_state():
+    """Ensures an input re-reporting the published selection in another order does not invalidate dependents."""
+    seen, stats = _drive(0, [["Black", "Gray"], ["Black"], ["Black", "Gray"], ["Gray", "Black"]])
+    assert seen == [("Black", "Gray"), ("Black",), ("Black", "Gray")]
+    assert stats == {"changes": 4, "published": 2, "coalesced": 0, "duplicates": 2, "avoided": 2}
+
+
+def test_coalesce_debounces_bursts():
+    """Verifies a burst of changes within the debounce window publishes only its final state."""
+    seen, stats = _drive(0.1, [["Black"], ["Black", "Cinnamon"], ["Cinnamon"], None, ["Cinnamon"], None])
+    assert seen == [("Black", "Gray"), ("Cinnamon",)]
+    assert stats["published"] == 1
+    assert stats["coalesced"] == 2
+    assert stats["avoided"] == stats["changes"] - stats["published"]
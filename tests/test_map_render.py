@@ -0,0 +1,94 @@
+import base64
+
+import numpy as np
+import pandas as pd
+
+from map_render import (
+    density_payload,
+    encode_column,
+    encode_mask,
+    hectare_counts_payload,
+    hectare_payload,
+    map_html,
+    point_payload,
+)
+from spatial import HectareGrid
+
+
+def _points():
+    return pd.DataFrame({
+        "unique_squirrel_id": ["1A-AM-1006-01", "2B-PM-1007-02", "3C-AM-1006-03"],
+        "hectare": pd.Categorical(["1A", "2B", "3C"]),
+        "shift": ["AM", "PM", "AM"],
+        "primary_fur_color": ["Gray", None, "Black"],
+        "age": ["Adult", "Juvenile", "Adult"],
+        "date": pd.to_datetime(["2018-10-06", "2018-10-07", "2018-10-06"]),
+        "longitude": np.array([-73.97, -73.96, np.nan], dtype=np.float32),
+        "latitude": np.array([40.78, 40.79, np.nan], dtype=np.float32),
+    })
+
+
+def test_encode_column_maps_missing_and_dates():
+    """Verifies that dictionary encoding labels missing values 'Unknown' and formats dates once per distinct value."""
+    codes, labels = encode_column(pd.Series(["Gray", None, "Gray"]))
+    assert [labels[c] for c in codes] == ["Gray", "Unknown", "Gray"]
+
+    codes, labels = encode_column(pd.Series(pd.to_datetime(["2018-10-06", "2018-10-06"])))
+    assert labels == ["2018-10-06"]
+    assert list(codes) == [0, 0]
+
+
+def test_point_payload_round_trips_coordinates_and_fields():
+    """Ensures the columnar payload drops rows without coordinates and decodes back to the original coordinates and tooltip values."""
+    payload = point_payload(_points())
+    assert payload["n"] == 2
+
+    lon = np.frombuffer(base64.b64decode(payload["lon"]), dtype="<f4")
+    lat = np.frombuffer(base64.b64decode(payload["lat"]), dtype="<f4")
+    np.testing.assert_allclose(lon, [-73.97, -73.96], atol=1e-5)
+    np.testing.assert_allclose(lat, [40.78, 40.79], atol=1e-5)
+
+    fields = {f["name"]: f for f in payload["fields"]}
+    fur = fields["primary_fur_color"]
+    codes = np.frombuffer(base64.b64decode(fur["codes"]), dtype=fur["dtype"])
+    assert [fur["labels"][c] for c in codes] == ["Gray", "Unknown"]
+
+
+def test_map_html_emits_single_point_layer():
+    """Checks that the rendered map contains one columnar point layer instead of a marker per squirrel."""
+    doc = map_html(_points(), "OpenStreetMap", ["Gray"])
+    assert doc.count("= squirrelPointLayer(") == 1
+    assert "circle_marker" not in doc
+    assert 'id="fur-legend"' in doc
+
+
+def test_map_html_embeds_hectare_geometry_once():
+    """Ensures hectare polygons ship inside the widget options so choropleth updates only need per-hectare counts."""
+    grid = HectareGrid(np.array([0, 1, 2]), ["1A", "2B", "3C"], [-73.97, -73.96, -73.95], [40.78, 40.79, 40.80])
+    geometry = hectare_payload(grid)
+    doc = map_html(_points(), "OpenStreetMap", ["Gray"], hectares=geometry)
+    assert doc.count(geometry["lon"]) == 1
+    counts = hectare_counts_payload(grid.counts(np.array([True, False, True])))
+    assert np.frombuffer(base64.b64decode(counts["count"]), dtype="<u4").tolist() == [1, 0, 1]
+    assert counts["max"] == 1
+
+
+def test_density_payload_is_a_png_over_the_surface_bounds():
+    """Checks that a density surface becomes a PNG of the same size, placed at [[south, west], [north, east]]."""
+    density = np.zeros((30, 20))
+    density[10, 5] = 3.0
+    payload = density_payload(density, (-73.98, 40.76, -73.95, 40.80))
+    png = base64.b64decode(payload["image"].split(",", 1)[1])
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    assert (int.from_bytes(png[16:20], "big"), int.from_bytes(png[20:24], "big")) == (20, 30)
+    assert payload["bounds"] == [[40.76, -73.98], [40.80, -73.95]]
+    assert payload["peak"] == 3.0
+
+
+def test_encode_mask_is_little_endian_bitset():
+    """Verifies the visibility mask packs one bit per point, lowest bit first, matching the decoder in squirrel_map.js."""
+    mask = np.zeros(11, dtype=bool)
+    mask[[0, 3, 9, 10]] = True
+    packed = np.frombuffer(base64.b64decode(encode_mask(mask)), dtype=np.uint8)
+    assert len(packed) == 2
+    assert np.array_equal(np.unpackbits(packed, bitorder="little")[:11], mask)
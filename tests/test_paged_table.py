@@ -0,0 +1,49 @@
+import duckdb
+import pandas as pd
+
+from paged_table import count_query, page_query
+from query_pool import filter_where
+
+
+def _con():
+    con = duckdb.connect()
+    df = pd.DataFrame({
+        "unique_squirrel_id": [f"{i:02d}" for i in range(10)],
+        "shift": ["AM", "PM"] * 5,
+        "hectare": ["01A", "02B", "01A", "10%", "02B", "01A", "3_C", "02B", "01A", None],
+    })
+    con.execute("CREATE TABLE squirrels AS SELECT * FROM df")
+    return con, df
+
+
+def test_pages_cover_the_sorted_rows_exactly_once():
+    """Checks that consecutive LIMIT / OFFSET pages sorted on a column with ties return every filtered row once, in order."""
+    con, df = _con()
+    source = ("squirrels", *filter_where({"shift": ["AM", "PM"]}))
+    columns = ["unique_squirrel_id", "hectare"]
+    for descending in (False, True):
+        pages = []
+        for offset in range(0, 10, 3):
+            sql, params = page_query(source, columns, sort="hectare", descending=descending, key="unique_squirrel_id", limit=3, offset=offset)
+            pages += [row[0] for row in con.execute(sql, params).fetchall()]
+        expected = df.sort_values(["hectare", "unique_squirrel_id"], ascending=[not descending, True], na_position="last")
+        assert pages == expected["unique_squirrel_id"].tolist()
+
+    sql, params = page_query(("squirrels", "", []), columns, limit=4, offset=2)
+    assert [row[0] for row in con.execute(sql, params).fetchall()] == ["02", "03", "04", "05"]
+
+
+def test_column_filters_match_text_literally_and_agree_with_the_count():
+    """Ensures column filters are case-insensitive substring matches that treat % and _ literally and combine with the source's WHERE clause."""
+    con, _ = _con()
+    source = ("squirrels", *filter_where({"shift": ["PM"]}))
+    for filters, expected in [
+        ({"hectare": "02b"}, ["01", "07"]),  # 04 is AM
+        ({"hectare": "%"}, ["03"]),
+        ({"hectare": "_"}, []),  # 3_C is AM
+        ({"hectare": "", "shift": "pm"}, ["01", "03", "05", "07", "09"]),
+    ]:
+        sql, params = page_query(source, ["unique_squirrel_id"], filters, sort="unique_squirrel_id")
+        assert [row[0] for row in con.execute(sql, params).fetchall()] == expected
+        sql, params = count_query(source, filters)
+        assert con.execute(sql, params).fetchone()[0] == len(expected)
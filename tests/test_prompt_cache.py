@@ -0,0 +1,37 @@
+import time
+
+from prompt_cache import CachedQuery, PromptCache, normalize_prompt
+
+
+def test_prompts_normalise_to_one_key():
+    """Verifies that case, spacing and trailing punctuation do not split a prompt's cache entry."""
+    assert normalize_prompt("  Show only  GRAY squirrels. ") == normalize_prompt("show only gray squirrels?!")
+    assert normalize_prompt("show only gray squirrels") != normalize_prompt("show only black squirrels")
+
+
+def test_lru_ttl_and_schema_keys():
+    """Ensures entries are keyed by schema version, the least recently used is evicted first, and expired entries miss."""
+    cache = PromptCache(maxsize=2, ttl=60)
+    cache.put("v1", "gray squirrels", "SELECT 1", "Gray")
+    cache.put("v1", "black squirrels", "SELECT 2", "Black")
+    assert cache.get("v1", "Gray squirrels.") == CachedQuery("SELECT 1", "Gray")
+    assert cache.get("v2", "gray squirrels") is None
+    time.sleep(0.01)
+    cache.put("v1", "adult squirrels", "SELECT 3", "Adult")  # evicts 'black', used least recently
+    assert cache.get("v1", "black squirrels") is None
+    assert cache.get("v1", "gray squirrels") is not None
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get("v1", "adult squirrels") is None
+    assert cache.stats() == {"hits": 2, "misses": 3, "size": 1, "maxsize": 2, "evictions": 2}
+
+
+def test_cache_persists_across_instances(tmp_path):
+    """Checks that a second cache opened on the same file, as another worker would, sees stored filters."""
+    path = tmp_path / "cache" / "prompts.sqlite3"
+    PromptCache(path).put("v1", "Show only gray squirrels", "SELECT 1", "Gray")
+    other = PromptCache(path)
+    assert other.get("v1", "show only gray squirrels") == CachedQuery("SELECT 1", "Gray")
+    other.discard("v1", "show only gray squirrels")
+    assert len(PromptCache(path)) == 0
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from _async import run_async
+from filter_index import FilterIndex
+from query_pool import QueryPool, WorkerPool, filter_where
+
+
+def _con():
+    con = duckdb.connect()
+    df = pd.DataFrame({
+        "shift": ["AM", "PM", "PM", "AM", "PM"],
+        "age": ["Adult", "Juvenile", "Adult", "O'Brien", "Adult"],
+        "running": [True, False, False, True, False],
+        "eating": [False, False, True, True, None],
+    })
+    con.execute("CREATE TABLE squirrels AS SELECT row_number() OVER () - 1 AS row, * FROM df")
+    return con, df
+
+
+def test_filter_where_matches_bitmap_index():
+    """Ensures the parameterised SQL filter selects exactly the rows the FilterIndex mask does, quotes included."""
+    con, df = _con()
+    index = FilterIndex(df, ["shift", "age"], flags=["running", "eating"])
+    for selections, flags in [
+        ({"shift": [], "age": []}, []),
+        ({"shift": ["PM"], "age": ["Adult"]}, []),
+        ({"shift": ["AM"], "age": ["O'Brien", "Adult"]}, ["eating"]),
+        ({"shift": [], "age": []}, ["running", "eating"]),
+    ]:
+        where, params = filter_where(selections, flags)
+        assert "'" not in where
+        rows = [r[0] for r in con.execute(f"SELECT row FROM squirrels {where} ORDER BY row", params).fetchall()]
+        assert rows == np.flatnonzero(index.mask(selections, any_flags=flags)).tolist()
+
+
+def test_session_cursors_share_the_database():
+    """Checks that each session cursor sees the shared view and that results come back through the pool."""
+    con, _ = _con()
+    pool = QueryPool(con, max_workers=2)
+    a, b = pool.cursor(), pool.cursor()
+
+    async def main():
+        return await asyncio.gather(
+            a.fetchall("SELECT count(*) FROM squirrels WHERE shift = ?", ["PM"]),
+            b.df("SELECT * FROM squirrels WHERE age IN (?, ?)", ["Adult", "Juvenile"]),
+        )
+
+    counts, frame = run_async(main())
+    assert counts == [(3,)]
+    assert len(frame) == 4
+    assert pool.stats()["completed"] == 2
+    a.close()
+    b.close()
+    pool.shutdown()
+
+
+def test_pool_is_bounded_and_reports_queueing():
+    """Verifies that jobs beyond max_workers queue, their wait is recorded, and a cancelled queued job leaves the queue."""
+    pool = WorkerPool(max_workers=1)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(pool.run(lambda: release.wait(5)))
+        second = asyncio.ensure_future(pool.run(lambda: "second"))
+        third = asyncio.ensure_future(pool.run(lambda: "third"))
+        await asyncio.sleep(0.05)
+        assert pool.stats()["queued"] == 2
+        assert pool.stats()["running"] == 1
+        third.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await first, await second, third.cancelled()
+
+    assert run_async(main()) == (True, "second", True)
+    stats = pool.stats()
+    assert stats["queued"] == 0 and stats["running"] == 0
+    assert stats["completed"] == 2 and stats["cancelled"] == 1
+    assert stats["max_queued"] == 2
+    assert stats["wait_ms_max"] >= 40
+    pool.shutdown()
+
+
+def test_cancelled_session_query_is_interrupted():
+    """Checks that cancelling a running session query interrupts it in DuckDB, freeing the worker for the next query."""
+    con, _ = _con()
+    pool = QueryPool(con, max_workers=1)
+    cursor = pool.cursor()
+
+    async def main():
+        slow = asyncio.ensure_future(cursor.fetchall("SELECT count(*) FROM range(10000000000) t WHERE t.range % 7 = 3"))
+        await asyncio.sleep(0.2)
+        slow.cancel()
+        await asyncio.sleep(0)
+        return await asyncio.wait_for(cursor.fetchall("SELECT count(*) FROM squirrels"), timeout=5)
+
+    assert run_async(main()) == [(5,)]
+    assert cursor.interrupted == 1
+    cursor.close()
+    pool.shutdown()
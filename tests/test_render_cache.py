@@ -0,0 +1,44 @@
+import os
+
+from render_cache import RenderCache, filter_key, sql_key
+
+
+def test_filter_key_is_order_insensitive():
+    """Verifies that the same checkbox state maps to one cache key regardless of click order, and that None equals an empty selection."""
+    assert filter_key(fur=["Gray", "Black"], age=None) == filter_key(age=[], fur=["Black", "Gray"])
+    assert filter_key(fur=["Gray"]) != filter_key(fur=["Black"])
+    assert sql_key("SELECT *  FROM squirrels\n") == sql_key("SELECT * FROM squirrels")
+
+
+def test_lru_eviction_and_counters():
+    """Ensures the cache evicts the least recently used entry once full and counts hits and misses."""
+    cache = RenderCache(maxsize=2)
+    calls = []
+
+    def render(value):
+        calls.append(value)
+        return value
+
+    cache.get_or_render("a", lambda: render("a"))
+    cache.get_or_render("b", lambda: render("b"))
+    cache.get_or_render("a", lambda: render("a"))  # hit, 'a' becomes most recent
+    cache.get_or_render("c", lambda: render("c"))  # evicts 'b'
+    cache.get_or_render("b", lambda: render("b"))
+
+    assert calls == ["a", "b", "c", "b"]
+    assert cache.stats() == {"hits": 1, "misses": 4, "size": 2, "maxsize": 2, "invalidations": 0}
+
+
+def test_source_change_invalidates(tmp_path):
+    """Checks that rewriting a watched data file drops every cached render."""
+    source = tmp_path / "squirrels.parquet"
+    source.write_bytes(b"v1")
+    cache = RenderCache(maxsize=8, sources=[source])
+    cache.get_or_render("chart", lambda: "old")
+
+    source.write_bytes(b"v2 rebuilt")
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert cache.get_or_render("chart", lambda: "new") == "new"
+    assert cache.stats()["invalidations"] == 1
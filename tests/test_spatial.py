@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from spatial import (
+    MAX_ZOOM,
+    ClusterIndex,
+    GridIndex,
+    METRES_PER_DEGREE_LAT,
+    HectareGrid,
+    KernelDensity,
+    bounds_contain,
+    mercator,
+    morton_keys,
+    pad_bounds,
+)
+
+
+def _points(n=5_000, seed=0):
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(-73.982, -73.949, n)
+    lat = rng.uniform(40.764, 40.800, n)
+    codes = rng.integers(0, 3, n)
+    return lon, lat, codes
+
+
+def test_clusters_partition_the_selected_points():
+    """Checks that at every zoom the clusters' sizes, per-colour counts and centroids add up to exactly the selected points."""
+    lon, lat, codes = _points()
+    index = ClusterIndex(lon, lat, codes, ["Gray", "Cinnamon", "Black"])
+    mask = np.random.default_rng(1).random(len(lon)) < 0.3
+    for zoom in (0, 12, 15, 18, MAX_ZOOM):
+        clusters = index.query(mask, zoom, max_clusters=10**9)
+        assert clusters.zoom == zoom
+        assert clusters.count.sum() == mask.sum()
+        np.testing.assert_array_equal(clusters.counts.sum(axis=1), clusters.count)
+        np.testing.assert_array_equal(clusters.counts.sum(axis=0), np.bincount(codes[mask], minlength=3))
+        np.testing.assert_allclose((clusters.lon * clusters.count).sum() / mask.sum(), lon[mask].mean(), atol=1e-5)
+
+
+def test_coarser_zoom_merges_whole_cells():
+    """Ensures each cell at zoom z is the union of its four children at z + 1, and that the cluster cap falls back to a coarser zoom."""
+    lon, lat, _ = _points()
+    keys = morton_keys(lon, lat)
+    for zoom in (13, 16):
+        fine = keys >> np.uint64(2 * (MAX_ZOOM - zoom - 1))
+        coarse = keys >> np.uint64(2 * (MAX_ZOOM - zoom))
+        np.testing.assert_array_equal(fine >> np.uint64(2), coarse)
+
+    x, y = mercator(lon, lat)
+    index = ClusterIndex(lon, lat, np.zeros(len(lon), dtype=int), ["Gray"])
+    clusters = index.query(zoom=18, max_clusters=100)
+    assert len(clusters) <= 100 and clusters.zoom < 18
+    cells = np.unique(np.stack([np.floor(x * 2 ** (clusters.zoom + 2)), np.floor(y * 2 ** (clusters.zoom + 2))]), axis=1)
+    assert cells.shape[1] == len(clusters)
+
+
+def test_bounds_limit_the_clustered_points():
+    """Verifies that only points inside the (west, south, east, north) view are clustered."""
+    lon, lat, codes = _points()
+    index = ClusterIndex(lon, lat, codes, ["Gray", "Cinnamon", "Black"])
+    bounds = (-73.97, 40.77, -73.96, 40.78)
+    lon32, lat32 = lon.astype(np.float32), lat.astype(np.float32)  # the index keeps float32 coordinates
+    inside = (lon32 >= bounds[0]) & (lon32 <= bounds[2]) & (lat32 >= bounds[1]) & (lat32 <= bounds[3])
+    clusters = index.query(zoom=16, bounds=bounds)
+    assert clusters.count.sum() == inside.sum()
+    assert clusters.lon.min() >= bounds[0] and clusters.lon.max() <= bounds[2]
+    assert index.query(np.zeros(len(lon), dtype=bool), zoom=16).count.size == 0
+
+
+def test_grid_index_matches_a_brute_force_scan():
+    """Checks that viewport queries return exactly the masked points inside the bounds, for small, large and disjoint boxes."""
+    lon, lat, _ = _points(20_000)
+    lon32, lat32 = lon.astype(np.float32), lat.astype(np.float32)
+    index = GridIndex(lon, lat)
+    mask = np.random.default_rng(2).random(len(lon)) < 0.5
+    for bounds in [
+        (-73.970, 40.775, -73.968, 40.777),  # a few cells
+        (-73.990, 40.700, -73.900, 40.900),  # everything: full-scan path
+        (-73.960, 40.790, -73.950, 40.810),  # overhangs the data
+        (-74.100, 40.700, -74.000, 40.710),  # outside the data
+    ]:
+        inside = (lon32 >= bounds[0]) & (lon32 <= bounds[2]) & (lat32 >= bounds[1]) & (lat32 <= bounds[3])
+        np.testing.assert_array_equal(index.query(bounds), np.flatnonzero(inside))
+        np.testing.assert_array_equal(index.query(bounds, mask), np.flatnonzero(inside & mask))
+    assert GridIndex(np.zeros(0), np.zeros(0)).query((-1, -1, 1, 1)).size == 0
+
+
+def test_padded_bounds_contain_small_pans():
+    """Ensures a view padded by half its size still contains the view after a small pan, but not after a zoom out."""
+    view = (-73.97, 40.775, -73.965, 40.778)
+    padded = pad_bounds(view, 0.5)
+    assert padded == pytest.approx((-73.9725, 40.7735, -73.9625, 40.7795))
+    assert bounds_contain(padded, (-73.971, 40.776, -73.966, 40.779))
+    assert not bounds_contain(padded, pad_bounds(view, 1.0))
+
+
+def test_hectare_grid_fits_cells_and_counts_filters():
+    """Checks that polygons fitted to a rotated grid enclose their hectare's points and that counts and rates follow the mask."""
+    rng = np.random.default_rng(3)
+    labels = [f"{row:02d}{col}" for row in range(1, 11) for col in "ABCD"] + ["bad", "nan"]
+    codes = rng.integers(0, len(labels), 4_000)
+    codes[:5] = -1
+    # Unit cells of a grid rotated like the park's, with points spread over each cell.
+    valid = np.array([c < 40 for c in range(len(labels))])[codes] & (codes >= 0)
+    row = np.where(valid, codes // 4 + 1, 0) + rng.uniform(-0.45, 0.45, len(codes))
+    col = np.where(valid, codes % 4, 0) + rng.uniform(-0.45, 0.45, len(codes))
+    lon = -73.98 + 5.7e-4 * row + 1.0e-3 * col
+    lat = 40.767 + 7.9e-4 * row - 4.2e-4 * col
+
+    grid = HectareGrid(codes, labels, lon, lat)
+    assert grid.labels == labels[:40]
+    np.testing.assert_allclose(grid.affine, [[-73.98, 40.767], [5.7e-4, 7.9e-4], [1.0e-3, -4.2e-4]], atol=2e-5)
+    i = labels.index("03B")
+    inside = codes == i
+    assert grid.lon[i].min() < lon[inside].min() and lon[inside].max() < grid.lon[i].max()
+    assert grid.lat[i].min() < lat[inside].min() and lat[inside].max() < grid.lat[i].max()
+
+    mask = rng.random(len(codes)) < 0.4
+    expected = np.bincount(codes[valid & mask], minlength=40)
+    np.testing.assert_array_equal(grid.counts(mask), expected)
+    np.testing.assert_array_equal(grid.totals, np.bincount(codes[valid], minlength=40))
+    np.testing.assert_allclose(grid.rates(mask), expected / grid.totals)
+
+
+def test_kernel_density_matches_direct_sum_and_keeps_mass():
+    """Verifies the binned FFT surface tracks a direct per-point Gaussian sum and integrates to the number of selected sightings."""
+    lon, lat, _ = _points(1_000)
+    lon[0] = np.nan
+    kde = KernelDensity(lon, lat)
+    mask = np.random.default_rng(4).random(len(lon)) < 0.5
+    density = kde.density(mask)
+    assert density.shape == (kde.height, kde.width)
+    cell_ha = kde.cell_m**2 / 10_000
+    assert density.sum() * cell_ha == pytest.approx((mask & np.isfinite(lon)).sum(), rel=1e-6)
+
+    west, _, _, north = kde.bounds
+    xs = (np.arange(kde.width) + 0.5) * kde.cell_m
+    ys = (np.arange(kde.height) + 0.5) * kde.cell_m
+    keep = mask & np.isfinite(lon)
+    px = (lon[keep] - west) * kde.m_per_lon
+    py = (north - lat[keep]) * METRES_PER_DEGREE_LAT
+    gx = np.exp(-0.5 * ((px[:, None] - xs) / kde.bandwidth_m) ** 2)
+    gy = np.exp(-0.5 * ((py[:, None] - ys) / kde.bandwidth_m) ** 2)
+    direct = gy.T @ gx / (2 * np.pi * kde.bandwidth_m**2) * 10_000
+    # Binning moves each point up to half a cell; isolated points bound the error.
+    assert np.abs(density - direct).max() < 0.1 * direct.max()
+    assert kde.density(np.zeros(len(lon), dtype=bool)).max() == 0
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from store import SquirrelStore
+
+
+def _store():
+    df = pd.DataFrame({
+        "unique_squirrel_id": ["1A-AM-1006-01", "2B-PM-1007-02", "3C-AM-1006-03", "4D-PM-1008-04"],
+        "shift": ["AM", "PM", "AM", "PM"],
+        "primary_fur_color": ["Gray", None, "Black", "Gray"],
+        "running": [True, False, False, True],
+        "x": [-73.97, -73.96, -73.95, -73.94],
+        "y": [40.78, 40.79, 40.80, 40.81],
+    })
+    return df, SquirrelStore.from_frame(df)
+
+
+def test_frame_round_trips_values():
+    """Checks that the store hands back the same values it was built from, with float32 coordinates instead of x / y."""
+    df, store = _store()
+    out = store.frame()
+    assert list(out.columns) == ["unique_squirrel_id", "shift", "primary_fur_color", "running", "longitude", "latitude"]
+    assert out["shift"].astype(str).tolist() == df["shift"].tolist()
+    assert out["primary_fur_color"].isna().tolist() == [False, True, False, False]
+    assert out["running"].tolist() == df["running"].tolist()
+    assert out["longitude"].dtype == np.float32
+    np.testing.assert_allclose(out["latitude"], df["y"], rtol=1e-6)
+
+
+def test_masked_frame_selects_rows():
+    """Ensures a row mask selects the same rows across categorical, flag and coordinate columns."""
+    _, store = _store()
+    mask = np.array([False, True, False, True])
+    out = store.frame(["unique_squirrel_id", "shift", "running", "longitude"], mask)
+    assert out["unique_squirrel_id"].tolist() == ["2B-PM-1007-02", "4D-PM-1008-04"]
+    assert out["shift"].astype(str).tolist() == ["PM", "PM"]
+    assert out["running"].tolist() == [False, True]
+    assert len(out["longitude"]) == 2
+
+
+def test_columns_are_compact():
+    """Verifies that flags are bit-packed and categorical codes are shared with unmasked frames rather than copied."""
+    _, store = _store()
+    assert store.flags["running"].nbytes == 1
+    codes = store.columns["shift"].codes
+    assert np.shares_memory(store.frame(["shift"])["shift"].array.codes, codes)